@@ -1,34 +1,30 @@
-from flask import Flask,request, render_template, send_file
+from functions_folder.model_registry import registry, warm_up_from_env
+from functions_folder.embedding_service import embedding_service
+from flask import Flask,request, render_template, send_file, Response, stream_with_context, jsonify, redirect, url_for
 
-from functions_folder.performance_audit import run_lighthouse_audit
-from functions_folder.content_scorer import content_scorer
+from functions_folder.content_scorer import content_scorer, crawl_documents, export_scores_csv, read_documents, score_batch
 from functions_folder.seo_analyzer import seo_analyzer
-from functions_folder.crawler import crawl_site
-from functions_folder.broken_link_checker import broken_link_checker
-from functions_folder.redirect_mapper import redirect_mapper
+from functions_folder.crawler import stream_crawl_site
+from functions_folder.crawl_store import iter_pages
+from functions_folder.url_canonicalizer import parse_tracking_params
+from functions_folder.broken_link_checker import broken_link_checker, site_broken_link_checker
+from functions_folder.redirect_mapper import bulk_redirect_mapper, export_csv, read_url_list, redirect_mapper
 from functions_folder.image_optimizer import image_optimizer
 from functions_folder.schema_generator import generate_schema_ld
-from functions_folder.internal_link_optimizer import suggest_internal_links
 from functions_folder.content_gap_finder import find_content_gaps
+from functions_folder.corpus_gap_finder import CORPUS_ROOT, corpus_gap_analysis, list_domains
 from functions_folder.headline_optimizer import score_headline
-from functions_folder.brief_generator import generate_brief
-from functions_folder.topic_modeler import lda_topic_modeling, bert_topic_modeling, visualize_topics
-from functions_folder.internal_link_optimizer import extract_internal_links, suggest_internal_links
+from functions_folder.brief_generator import stream_brief
 from functions_folder.intent_classifier import classify_intents, summarize_intents
 from collections import Counter
 
 from functions_folder.trend_visualizer import create_sample_data, plot_trends
 
 
-from functions_folder.ranking_forecast_model import (
-    load_sample_data,
-    ranking_forecast_model,
-    visualize_forecast_results,
-    generate_forecast_summary
-)
-
 from functions_folder.keyword_monitor import perform_google_search, find_keyword_rank, create_timestamped_folder, save_json
+from functions_folder.tool_jobs import job_queue  # registers the long-running tools as background jobs
 import os
+import json
 from dotenv import load_dotenv; load_dotenv()
 
 import pandas as pd
@@ -62,6 +58,90 @@ def aio():
     return render_template('homepage.html')
 
 
+@app.route("/startup-report")
+def startup_report():
+    # Startup time, RSS and per-model load cost; models are loaded lazily by the tools
+    return jsonify(registry.report())
+
+
+@app.route("/embedding-stats")
+def embedding_stats():
+    # Encoder counters and embedding cache hit/miss and memory/disk byte usage
+    return jsonify(embedding_service.report())
+
+
+@app.route("/jobs")
+def jobs_report():
+    # Per-tool pool, concurrency limit and stored jobs by status
+    return jsonify(job_queue.report())
+
+
+# Endpoint of the page that shows each tool's job results
+JOB_PAGES = {
+    "performance_audit": "performance_audit",
+    "brief_generator": "brief_generator",
+    "ranking_forecast": "ranking_forecast",
+    "topic_modeler": "topic_modeler",
+    "website_crawler": "index",
+    "internal_link_optimizer": "internal_link_optimizer",
+}
+
+
+def submit_job(tool, **params):
+    """Queues a tool run and answers at once with its job page."""
+    return redirect(url_for("job_page", job_id=job_queue.submit(tool, params)))
+
+
+def finished_job(tool):
+    """The finished `tool` job named by ?job=, or None."""
+    job_id = request.args.get("job")
+    job = job_queue.get(job_id) if job_id else None
+    if job and job["tool"] == tool and job["status"] == "done":
+        return job
+    return None
+
+
+def sse_response(events):
+    """Streams a generator of event dicts as Server-Sent Events, closing it when the client goes away."""
+    def generate():
+        try:
+            for event in events:
+                if event['event'] == 'keepalive':
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            events.close()
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def job_status(job):
+    status = {key: job[key] for key in ("job_id", "tool", "status", "progress", "message", "error",
+                                        "created_at", "started_at", "finished_at")}
+    status["result_url"] = url_for(JOB_PAGES[job["tool"]], job=job["job_id"]) if job["status"] == "done" else None
+    return status
+
+
+@app.route("/jobs/<job_id>")
+def job_page(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return "Unknown job", 404
+    if job["status"] == "done":
+        return redirect(url_for(JOB_PAGES[job["tool"]], job=job_id))
+    return render_template("job.html", job=job_status(job), tool_url=url_for(JOB_PAGES[job["tool"]]))
+
+
+@app.route("/jobs/<job_id>/status")
+def job_status_route(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job_status(job))
+
+
 @app.route("/<name>")
 def user(name ):
     return f"Hello {name}"
@@ -69,11 +149,49 @@ def user(name ):
 @app.route('/website-crawler', methods=['GET', 'POST'])
 def index():
     results = {}
+    error = None
     if request.method == 'POST':
-        url = request.form['url']
-        max_pages = int(request.form.get('max_pages', 50))
-        results = crawl_site(url, max_pages=max_pages)
-    return render_template('crawler.html', results=results)
+        return submit_job(
+            "website_crawler",
+            url=request.form['url'],
+            max_pages=int(request.form.get('max_pages', 50)),
+            engine=request.form.get('engine', 'async'),
+            max_depth=request.form.get('max_depth', type=int),
+            resume=request.form.get('resume', '').strip() or None,
+            incremental=request.form.get('full_recrawl') != 'yes',
+            changed_only=request.form.get('changed_only') == 'yes',
+            respect_robots=request.form.get('ignore_robots') != 'yes',
+            use_sitemaps=request.form.get('skip_sitemaps') != 'yes',
+            tracking_params=request.form.get('tracking_params', '').strip()
+        )
+
+    job = finished_job("website_crawler")
+    if job:
+        results = job["result"]
+        if 'error' in results:
+            error = results['error']
+            results = {}
+        else:
+            results["pages"] = iter_pages(results["crawl_id"], changed_only=job["params"]["changed_only"])
+    return render_template('crawler.html', results=results, error=error)
+
+@app.route('/website-crawler/stream')
+def crawler_stream():
+    url = request.args.get('url', '').strip()
+    if not url and not request.args.get('resume'):
+        return "Missing url", 400
+    raw_tracking = request.args.get('tracking_params', '').strip()
+    events = stream_crawl_site(
+        url,
+        max_pages=request.args.get('max_pages', 50, type=int),
+        max_depth=request.args.get('max_depth', type=int),
+        incremental=request.args.get('full_recrawl') != 'yes',
+        tracking_params=parse_tracking_params(raw_tracking) if raw_tracking else None,
+        respect_robots=request.args.get('ignore_robots') != 'yes',
+        use_sitemaps=request.args.get('skip_sitemaps') != 'yes',
+        resume=request.args.get('resume', '').strip() or None
+    )
+    return sse_response(events)
 
 @app.route('/seo_analyzer', methods=['GET', 'POST'])
 def seo_analyzer_route():
@@ -90,8 +208,11 @@ def seo_analyzer_route():
 @app.route("/performance_audit", methods=["GET", "POST"])
 def performance_audit():
     if request.method == "POST":
-        target_url = request.form.get("url")
-        result = run_lighthouse_audit(target_url)
+        return submit_job("performance_audit", url=request.form.get("url"))
+
+    job = finished_job("performance_audit")
+    if job:
+        result = job["result"]
 
         if "error" in result:
                 return render_template("performance_audit.html", error=result["error"])
@@ -117,12 +238,41 @@ def download_report(report_id):
 @app.route("/content_scorer", methods=["GET", "POST"])
 def content_scorer_route():
     result = None
-    if request.method == "POST":
+    batch = None
+    error = None
+    pooling = request.form.get("pooling", "mean")
+    pooling = pooling if pooling in ("mean", "max") else "mean"
+    if request.method == "POST" and request.form.get("mode") == "bulk":
+        drafts = read_documents(request.form.get("drafts", ""), prefix="Draft")
+        # Several .txt files are one draft each; a CSV holds one draft per row.
+        for upload in request.files.getlist("draft_files"):
+            if upload and upload.filename:
+                text = upload.read().decode("utf-8", errors="replace")
+                if upload.filename.lower().endswith(".csv"):
+                    drafts += read_documents(text, prefix="Draft")
+                elif text.strip():
+                    drafts.append((upload.filename, text.strip()))
+        crawl_id = request.form.get("crawl_id", "").strip()
+        if crawl_id:
+            drafts += crawl_documents(crawl_id)
+        references = read_documents(request.form.get("references", ""), prefix="Reference", one_per_line=True)
+        upload = request.files.get("reference_file")
+        if upload and upload.filename:
+            references += read_documents(upload.read().decode("utf-8", errors="replace"), prefix="Reference",
+                                         one_per_line=True)
+        batch = score_batch(drafts, references, pooling=pooling)
+        if "error" in batch:
+            error = batch["error"]
+            batch = None
+        elif request.form.get("export") == "csv":
+            return Response(export_scores_csv(batch), mimetype="text/csv",
+                            headers={"Content-Disposition": "attachment; filename=content_scores.csv"})
+    elif request.method == "POST":
         content = request.form.get("content", "")
         reference = request.form.get("reference", "")
         if content and reference:
-            result = content_scorer(content, reference)
-    return render_template("content_scorer.html", result=result)
+            result = content_scorer(content, reference, pooling=pooling)
+    return render_template("content_scorer.html", result=result, batch=batch, error=error)
 
 @app.route('/broken_link_checker', methods=['GET', 'POST'])
 def broken_link_checker_route():
@@ -130,7 +280,13 @@ def broken_link_checker_route():
     error = None
     if request.method == 'POST':
         url = request.form['url']
-        results = broken_link_checker(url)
+        use_cache = request.form.get('recheck_all') != 'yes'
+        if request.form.get('site_wide') == 'yes':
+            results = site_broken_link_checker(url, max_pages=request.form.get('max_pages', 50, type=int),
+                                               crawl_id=request.form.get('crawl_id', '').strip() or None,
+                                               use_cache=use_cache)
+        else:
+            results = broken_link_checker(url, use_cache=use_cache)
         if 'error' in results:
             error = results['error']
             results = None
@@ -140,13 +296,26 @@ def broken_link_checker_route():
 def redirect_mapper_route():
     results = None
     error = None
-    if request.method == 'POST':
+    bulk = None
+    if request.method == 'POST' and request.form.get('mode') == 'bulk':
+        text = request.form.get('urls', '')
+        upload = request.files.get('url_file')
+        if upload and upload.filename:
+            text += "\n" + upload.read().decode('utf-8', errors='replace')
+        bulk = bulk_redirect_mapper(read_url_list(text))
+        if 'error' in bulk:
+            error = bulk['error']
+            bulk = None
+        elif request.form.get('export') == 'csv':
+            return Response(export_csv(bulk['results']), mimetype='text/csv',
+                            headers={'Content-Disposition': 'attachment; filename=redirect_map.csv'})
+    elif request.method == 'POST':
         url = request.form['url']
         results = redirect_mapper(url)
         if 'error' in results:
             error = results['error']
             results = None
-    return render_template('redirect_mapper.html', results=results, error=error)
+    return render_template('redirect_mapper.html', results=results, bulk=bulk, error=error)
 
 @app.route('/image_optimizer', methods=['GET', 'POST'])
 def image_optimizer_route():
@@ -194,24 +363,19 @@ def topic_modeler():
 
     if request.method == "POST":
         raw_texts = request.form["texts"]
-        method = request.form["method"]
-        num_topics = int(request.form.get("num_topics", 3))
-        show_viz = request.form.get("show_viz") == "yes"
-
         texts = [line.strip() for line in raw_texts.strip().split("\n") if line.strip()]
-
-        if method == "lda":
-            topics, lda_model, corpus, dictionary = lda_topic_modeling(texts, num_topics=num_topics)
-            if show_viz:
-                visualize_topics("lda", lda_model=lda_model, corpus=corpus, dictionary=dictionary)
-
-        elif method == "bert":
-            if len(texts) < num_topics:
-                error = f"You entered {len(texts)} text(s), but requested {num_topics} clusters. Please enter more texts or reduce the number of clusters."
-            else:
-                topics, embeddings, labels = bert_topic_modeling(texts, num_clusters=num_topics)
-                if show_viz:
-                    visualize_topics("bert", embeddings=embeddings, labels=labels)
+        return submit_job("topic_modeler", texts=texts, method=request.form["method"],
+                          num_topics=int(request.form.get("num_topics", 3)),
+                          show_viz=request.form.get("show_viz") == "yes")
+
+    job = finished_job("topic_modeler")
+    if job:
+        raw_texts = "\n".join(job["params"]["texts"])
+        method = job["params"]["method"]
+        num_topics = job["params"]["num_topics"]
+        show_viz = job["params"]["show_viz"]
+        topics = job["result"]["topics"]
+        error = job["result"]["error"]
 
     return render_template(
         "topic_modeler.html",
@@ -245,8 +409,20 @@ def content_gap_finder():
     results = []
     your_content = ""
     competitor_raw = ""
-
-    if request.method == "POST":
+    corpus = None
+    corpus_error = None
+
+    if request.method == "POST" and request.form.get("mode") == "corpus":
+        site_source = request.form.get("site_source", "").strip()
+        competitor_sources = [line.strip() for line in request.form.get("competitor_sources", "").splitlines()
+                              if line.strip()]
+        corpus = corpus_gap_analysis(site_source, competitor_sources, refresh=bool(request.form.get("refresh")),
+                                     root=CORPUS_ROOT, top_n=25,
+                                     clusters=request.form.get("clusters", 6, type=int))
+        if "error" in corpus:
+            corpus_error = corpus["error"]
+            corpus = None
+    elif request.method == "POST":
         your_content = request.form.get("your_content", "").strip()
         competitor_raw = request.form.get("competitor_content", "").strip()
         competitor_texts = [line.strip() for line in competitor_raw.split("\n") if line.strip()]
@@ -264,7 +440,10 @@ def content_gap_finder():
     return render_template("content_gap_finder.html",
                            results=results,
                            your_content=your_content,
-                           competitor_raw=competitor_raw)
+                           competitor_raw=competitor_raw,
+                           corpus=corpus,
+                           corpus_error=corpus_error,
+                           domains=list_domains())
 
 @app.route("/headline_optimizer", methods=["GET", "POST"])
 def headline_optimizer():
@@ -280,11 +459,22 @@ def headline_optimizer():
 def brief_generator():
     result = None
     if request.method == "POST":
-        seed_text = request.form["seed_text"]
-        faq_count = int(request.form.get("faq_count", 5))
-        result = generate_brief(seed_text, faq_count)
+        return submit_job("brief_generator", seed_text=request.form["seed_text"],
+                          faq_count=int(request.form.get("faq_count", 5)), model=request.form.get("model"))
+
+    job = finished_job("brief_generator")
+    if job:
+        result = job["result"]
     return render_template("brief_generator.html", result=result)
 
+@app.route("/brief_generator/stream")
+def brief_generator_stream():
+    seed_text = request.args.get("seed_text", "").strip()
+    if not seed_text:
+        return "Missing seed_text", 400
+    events = stream_brief(seed_text, request.args.get("faq_count", 5, type=int), model=request.args.get("model"))
+    return sse_response(events)
+
 
 @app.route("/internal_link_optimizer", methods=["GET", "POST"])
 def internal_link_optimizer():
@@ -303,9 +493,13 @@ def internal_link_optimizer():
 
         if url_input:
             print(f"🔍 Crawling homepage: {url_input}")
-            slugs, error = extract_internal_links(url_input, max_links=max_links)
-            if not error and slugs:
-                suggestions = suggest_internal_links(slugs, url_input, top_n=3)
+            return submit_job("internal_link_optimizer", url=url_input, max_links=max_links)
+
+    job = finished_job("internal_link_optimizer")
+    if job:
+        url_input = job["params"]["url"]
+        max_links_input = str(job["params"]["max_links"])
+        suggestions = job["result"]["suggestions"]
 
     return render_template(
         "internal_link_optimizer.html",
@@ -392,11 +586,16 @@ def ranking_forecast():
             forecast_horizon = 30
 
         if keyword:
-            sample_data = load_sample_data(keyword=keyword)
-            forecast_output = ranking_forecast_model(sample_data, forecast_horizon)
-            chart_html = visualize_forecast_results(forecast_output)
-            summary_text = generate_forecast_summary(forecast_output)
-            show_form = True  # Show form again after processing
+            return submit_job("ranking_forecast", keyword=keyword, forecast_horizon=forecast_horizon)
+
+    job = finished_job("ranking_forecast")
+    if job:
+        keyword = job["params"]["keyword"]
+        forecast_horizon = job["params"]["forecast_horizon"]
+        forecast_output = job["result"]["forecast_output"]
+        chart_html = job["result"]["chart_html"]
+        summary_text = job["result"]["summary_text"]
+        show_form = True  # Show form again after processing
 
     return render_template("ranking_forecast.html",
                            keyword=keyword,
@@ -445,5 +644,10 @@ def keyword_monitor():
 
 
 application = app
+registry.mark_ready()
+# Job worker processes re-import the main script as __mp_main__; only the web process warms models
+if __name__ != "__mp_main__":
+    warm_up_from_env()  # MODEL_WARMUP=all (or a list of model names) preloads in the background
+
 if __name__=="__main__":
     app.run(debug=True)
\ No newline at end of file
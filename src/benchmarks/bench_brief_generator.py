@@ -0,0 +1,102 @@
+# File: benchmarks/bench_brief_generator.py
+#
+# Brief latency before and after caching the generator and batching the FAQs:
+# "before" builds pipeline("text-generation") per brief and generates the FAQ
+# answers one call at a time, as generate_brief used to; "after" is
+# generate_brief cold (model load), warm (model loaded, answers not cached)
+# and repeated (answers cached); "stream" is how soon stream_brief shows the
+# outline and the first answer token. Run from src/ on the box to measure:
+#   python -m benchmarks.bench_brief_generator
+#   python -m benchmarks.bench_brief_generator --faqs 5 --repeat 3 --distil_model distilgpt2
+
+import argparse
+import random
+import statistics
+import time
+
+from functions_folder.brief_generator import (MAX_NEW_TOKENS, answer_cache, faq_prompt, generate_answers, generate_brief,
+                                              outline, stream_brief)
+from functions_folder.model_registry import load_text_generator, registry
+
+SEED = "CRISPR technology in cancer therapy and its applications in precision medicine and clinical research"
+
+
+def brief_before(model_name, seed_text, keywords):
+    """The old flow: a fresh pipeline per brief, one generation call per FAQ."""
+    from transformers import pipeline
+    generator = pipeline("text-generation", model=model_name)
+    answers = []
+    for kw in keywords:
+        prompt = faq_prompt(seed_text, kw)
+        # The old code passed max_length=80 (prompt included); the same answer length as
+        # generate_brief is given here so both sides generate the same number of tokens.
+        answer = generator(prompt, max_new_tokens=MAX_NEW_TOKENS, do_sample=False)[0]["generated_text"]
+        answers.append(answer.replace(prompt, "").strip())
+    return answers
+
+
+def time_to_events(seed_text, faq_count, model):
+    """Seconds until stream_brief yields its outline, its first answer token and its last event."""
+    started = time.perf_counter()
+    seen = {}
+    for event in stream_brief(seed_text, faq_count, model=model):
+        seen.setdefault(event["event"], time.perf_counter() - started)
+    return seen["outline"], seen.get("token", float("nan")), time.perf_counter() - started
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Brief generator latency benchmark")
+    parser.add_argument('--model', default="gpt2", help='GPT-2 model name or local path')
+    parser.add_argument('--distil_model', default=None, help='DistilGPT-2 name or path to time as well')
+    parser.add_argument('--faqs', type=int, default=5, help='FAQs per brief')
+    parser.add_argument('--repeat', type=int, default=3, help='Briefs timed per variant')
+    args = parser.parse_args()
+
+    registry.register("gpt2", lambda: load_text_generator(args.model))
+    if args.distil_model:
+        registry.register("distilgpt2", lambda: load_text_generator(args.distil_model))
+    keywords, *_ = outline(SEED)
+    selected = random.Random(SEED).sample(keywords, min(args.faqs, len(keywords)))  # what generate_brief picks
+    print(f"{len(selected)} FAQs per brief, {args.repeat} briefs per variant")
+
+    rows = [("before: pipeline per brief, FAQs one by one",
+             [timed(brief_before, args.model, SEED, selected)[0] for _ in range(args.repeat)])]
+    cold, _ = timed(generate_brief, SEED, args.faqs, model="gpt2")
+    rows.append(("after: first brief (loads the model)", [cold]))
+    warm = []
+    for _ in range(args.repeat):
+        answer_cache.clear()
+        warm.append(timed(generate_brief, SEED, args.faqs, model="gpt2")[0])
+    rows.append(("after: model loaded, batched FAQs", warm))
+    rows.append(("after: repeated brief (cached)",
+                 [timed(generate_brief, SEED, args.faqs, model="gpt2")[0] for _ in range(args.repeat)]))
+    if args.distil_model:
+        timed(generate_brief, SEED, args.faqs, model="distilgpt2")
+        distil = []
+        for _ in range(args.repeat):
+            answer_cache.clear()
+            distil.append(timed(generate_brief, SEED, args.faqs, model="distilgpt2")[0])
+        rows.append(("after: distilgpt2, batched FAQs", distil))
+
+    baseline = statistics.median(rows[0][1])
+    for name, seconds in rows:
+        median = statistics.median(seconds)
+        print(f"{name:<48} {median:8.3f} s   {baseline / median:7.1f}x")
+
+    streamed = []
+    for _ in range(args.repeat):
+        answer_cache.clear()
+        streamed.append(time_to_events(SEED, args.faqs, "gpt2"))
+    outline_s, token_s, total_s = (statistics.median(column) for column in zip(*streamed))
+    print(f"stream: outline after {outline_s:.3f} s, first answer token after {token_s:.3f} s, done after {total_s:.3f} s")
+
+    # Batching must not change the answers: greedy decoding of a left-padded batch vs one prompt at a time.
+    batched = generate_answers([faq_prompt(SEED, kw) for kw in selected], model="gpt2")
+    single = [generate_answers([faq_prompt(SEED, kw)], model="gpt2")[0] for kw in selected]
+    print(f"batched answers identical to one-at-a-time: {sum(a == b for a, b in zip(batched, single))}/{len(selected)}")
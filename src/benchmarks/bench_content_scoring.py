@@ -0,0 +1,81 @@
+# File: benchmarks/bench_content_scoring.py
+#
+# Compares scoring drafts against references one content_scorer() call per
+# pair with one score_batch() call for the whole set. The embedding cache is
+# disabled so both sides do all their model work. Run from src/:
+#   python -m benchmarks.bench_content_scoring
+#   python -m benchmarks.bench_content_scoring --drafts 48 --references 8 --words 1200 --backend onnx
+# --no_readability leaves textstat out (it needs NLTK's cmudict data).
+
+import argparse
+import random
+import time
+
+from functions_folder import content_scorer as scorer_module
+from functions_folder import embedding_service as service_module
+from functions_folder.content_scorer import content_scorer, score_batch
+from functions_folder.embedding_service import encode_document, load_embedder
+from functions_folder.model_registry import MINILM, ModelRegistry
+
+WORDS = ("seo content keyword ranking search intent backlink crawl page audit schema snippet readability "
+         "competitor gap topic cluster internal link anchor canonical redirect sitemap performance mobile "
+         "speed metadata title description heading image alt query volume bakery recipe travel guide").split()
+
+
+def sample_document(rng, words):
+    sentences = []
+    while sum(len(sentence.split()) for sentence in sentences) < words:
+        sentences.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 24))).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def score_pairs(drafts, references, readability_scores):
+    """What scoring a set took before: one content_scorer() call per (draft, reference) pair."""
+    for draft in drafts:
+        for reference in references:
+            if readability_scores:
+                content_scorer(draft, reference)
+            else:
+                encode_document(draft, reference=encode_document(reference)["vector"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Content scoring benchmark (per pair vs batch)")
+    parser.add_argument('--model', default=MINILM, help='Model name or local path')
+    parser.add_argument('--backend', default="torch", help='Embedding backend: torch or onnx')
+    parser.add_argument('--drafts', type=int, default=24, help='Number of drafts')
+    parser.add_argument('--references', type=int, default=6, help='Number of references')
+    parser.add_argument('--words', type=int, default=800, help='Words per draft')
+    parser.add_argument('--workers', type=int, default=None, help='Readability processes (CONTENT_SCORER_WORKERS)')
+    parser.add_argument('--no_readability', action='store_true', help='Time similarity only')
+    args = parser.parse_args()
+
+    models = ModelRegistry()
+    models.register("minilm", lambda: load_embedder(args.model, args.backend))
+    service_module.embedding_service.models = models
+    service_module.embedding_service.cache = None
+    if args.workers is not None:
+        scorer_module.READABILITY_WORKERS = args.workers
+    models.get("minilm")
+
+    rng = random.Random(42)
+    drafts = [sample_document(rng, args.words) for _ in range(args.drafts)]
+    references = [" ".join(rng.sample(WORDS, 3)) for _ in range(args.references)]
+    readability_scores = not args.no_readability
+    pairs = len(drafts) * len(references)
+    print(f"{len(drafts)} drafts x {len(references)} references ({pairs} pairs), ~{args.words} words per draft, "
+          f"backend {args.backend}, readability {'on' if readability_scores else 'off'}")
+
+    started = time.perf_counter()
+    score_pairs(drafts, references, readability_scores)
+    per_pair = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = score_batch(drafts, references, readability_scores=readability_scores)
+    batched = time.perf_counter() - started
+    if "error" in batch:
+        raise SystemExit(batch["error"])
+
+    print(f"{'content_scorer per pair':<28} {per_pair:8.2f} s   {pairs / per_pair:8.1f} pairs/s")
+    print(f"{'score_batch':<28} {batched:8.2f} s   {pairs / batched:8.1f} pairs/s   "
+          f"{per_pair / batched:5.1f}x faster (embedding {batch['stats']['embed_seconds']} s)")
@@ -0,0 +1,101 @@
+# File: benchmarks/bench_embeddings.py
+#
+# Compares the fp32 PyTorch MiniLM backend with the int8 ONNX Runtime one:
+# single-text latency, batched throughput, RSS growth on load, model size on
+# disk and cosine agreement of the vectors. Run from src/:
+#   python -m benchmarks.bench_embeddings
+#   python -m benchmarks.bench_embeddings --texts 1000 --threads 2 --file keywords.txt
+# The first ONNX run exports and quantizes the model (needs torch once).
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+import numpy as np
+
+from functions_folder.embedding_service import (ONNX_DIR, EmbeddingService, OnnxEmbedder, TorchEmbedder,
+                                                export_onnx, onnx_threads)
+from functions_folder.model_registry import MINILM, ModelRegistry, rss_mb
+
+WORDS = ("seo content keyword ranking search intent backlink crawl page audit schema snippet "
+         "readability competitor gap topic cluster internal link anchor canonical redirect sitemap "
+         "performance mobile speed metadata title description heading image alt query volume").split()
+
+
+def sample_texts(count, seed=42):
+    """Keyword-length to paragraph-length texts, like the tools send."""
+    rng = random.Random(seed)
+    lengths = [rng.choice((2, 3, 4, 12, 40, 180)) for _ in range(count)]
+    return [" ".join(rng.choice(WORDS) for _ in range(length)) for length in lengths]
+
+
+def load(backend, model_name, threads):
+    before = rss_mb()
+    started = time.perf_counter()
+    embedder = TorchEmbedder(model_name) if backend == "torch" else OnnxEmbedder(model_name, threads=threads)
+    return embedder, time.perf_counter() - started, rss_mb() - before
+
+
+def measure(embedder, texts, repeat):
+    models = ModelRegistry()
+    models.register("bench", lambda: embedder)
+    service = EmbeddingService("bench", models=models, cache=None)
+    service.encode(texts[:8])  # warm-up: first runs allocate and optimize
+
+    single = []
+    for text in texts[:repeat]:
+        started = time.perf_counter()
+        service.encode([text])
+        single.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    vectors = service.encode(texts)
+    elapsed = time.perf_counter() - started
+    return {
+        "p50_ms": statistics.median(single),
+        "p95_ms": float(np.percentile(single, 95)),
+        "texts_per_s": len(texts) / elapsed,
+        "vectors": vectors,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding backend benchmark (PyTorch fp32 vs ONNX int8)")
+    parser.add_argument('--model', default=MINILM, help='Model name or local path')
+    parser.add_argument('--texts', type=int, default=512, help='Number of synthetic texts')
+    parser.add_argument('--file', default=None, help='Benchmark the lines of this file instead')
+    parser.add_argument('--repeat', type=int, default=50, help='Single-text latency samples')
+    parser.add_argument('--threads', type=int, default=None, help='onnxruntime intra-op threads')
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = sample_texts(args.texts)
+    threads = args.threads or onnx_threads()
+    int8_path = export_onnx(args.model)
+    fp32_path = int8_path.replace("-int8.onnx", ".onnx")
+    print(f"{len(texts)} texts, onnxruntime intra-op threads: {threads}, models in {os.path.dirname(int8_path) or ONNX_DIR}")
+
+    results = {}
+    for backend in ("torch", "onnx"):
+        embedder, load_seconds, rss_growth = load(backend, args.model, threads)
+        results[backend] = dict(measure(embedder, texts, args.repeat), load_s=load_seconds, rss_mb=rss_growth)
+        del embedder
+
+    sizes = {"torch": os.path.getsize(fp32_path) / 2 ** 20 if os.path.exists(fp32_path) else float("nan"),
+             "onnx": os.path.getsize(int8_path) / 2 ** 20}
+    print(f"{'backend':<14}{'p50 ms':>9}{'p95 ms':>9}{'texts/s':>10}{'load s':>8}{'+RSS MB':>9}{'model MB':>10}")
+    for backend, label in (("torch", "torch fp32"), ("onnx", "onnx int8")):
+        r = results[backend]
+        print(f"{label:<14}{r['p50_ms']:9.2f}{r['p95_ms']:9.2f}{r['texts_per_s']:10.1f}{r['load_s']:8.2f}"
+              f"{r['rss_mb']:9.1f}{sizes[backend]:10.1f}")
+
+    agreement = (results["torch"]["vectors"] * results["onnx"]["vectors"]).sum(axis=1)
+    print(f"speedup: {results['torch']['p50_ms'] / results['onnx']['p50_ms']:.2f}x latency, "
+          f"{results['onnx']['texts_per_s'] / results['torch']['texts_per_s']:.2f}x throughput")
+    print(f"cosine agreement: mean {agreement.mean():.4f}, min {agreement.min():.4f}, "
+          f"p01 {np.percentile(agreement, 1):.4f}")
@@ -0,0 +1,77 @@
+# File: benchmarks/bench_html_parsing.py
+#
+# Compares the old per-tool BeautifulSoup('html.parser') extraction with the
+# shared HTMLDocument layer. Run from src/:
+#   python -m benchmarks.bench_html_parsing
+#   python -m benchmarks.bench_html_parsing --url https://www.seomasterz.com/ --repeat 50
+
+import argparse
+import timeit
+
+import requests
+from bs4 import BeautifulSoup
+
+from functions_folder.html_document import BACKENDS, HTMLDocument
+
+
+def sample_page(sections=200):
+    body = []
+    for i in range(sections):
+        body.append(
+            f"<h2>Section {i}</h2><p>Paragraph {i} with <a href='/page/{i}'>an internal link</a> "
+            f"and <a href='https://example.org/{i}'>an external one</a>.</p>"
+            f"<img src='/img/{i}.png' alt='image {i}'>"
+        )
+    return (
+        "<html><head><title>Benchmark page</title>"
+        "<meta name='description' content='Synthetic page'><meta name='keywords' content='a, b'>"
+        "<link rel='canonical' href='https://example.com/bench'>"
+        "<script type='application/ld+json'>{\"@type\": \"Article\"}</script>"
+        f"</head><body><h1>Benchmark</h1>{''.join(body)}</body></html>"
+    )
+
+
+def extract_with_beautifulsoup(html, url):
+    # What crawler, broken_link_checker, seo_analyzer and internal_link_optimizer
+    # each did on their own, including building a separate tree per tool.
+    results = {}
+    soup = BeautifulSoup(html, 'html.parser')
+    results["links"] = [requests.compat.urljoin(url, a['href']) for a in soup.find_all('a', href=True)]
+    soup = BeautifulSoup(html, 'html.parser')
+    results["title"] = soup.title.string if soup.title else ''
+    results["description"] = soup.find('meta', attrs={'name': 'description'})
+    results["headings"] = {tag: [h.get_text(strip=True) for h in soup.find_all(tag)] for tag in ('h1', 'h2', 'h3')}
+    results["text"] = soup.get_text(separator=' ', strip=True)
+    soup = BeautifulSoup(html, 'html.parser')
+    results["raw_links"] = [a['href'] for a in soup.find_all('a', href=True)]
+    return results
+
+
+def extract_with_document(html, url, backend):
+    document = HTMLDocument(html, url=url, backend=backend)
+    return {
+        "links": document.links,
+        "title": document.title,
+        "description": document.meta.get("description"),
+        "headings": document.headings,
+        "text": document.text,
+        "raw_links": document.raw_links,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTML parsing micro-benchmark")
+    parser.add_argument('--url', default=None, help='Benchmark a live page instead of the synthetic one')
+    parser.add_argument('--sections', type=int, default=200, help='Size of the synthetic page')
+    parser.add_argument('--repeat', type=int, default=20, help='Iterations per implementation')
+    args = parser.parse_args()
+
+    url = args.url or "https://example.com/bench"
+    html = requests.get(args.url, timeout=10).text if args.url else sample_page(args.sections)
+    print(f"Page size: {len(html):,} chars, {args.repeat} iterations")
+
+    baseline = timeit.timeit(lambda: extract_with_beautifulsoup(html, url), number=args.repeat) / args.repeat
+    print(f"{'beautifulsoup (html.parser, 3 trees)':<40} {baseline * 1000:8.2f} ms/page")
+    for backend in BACKENDS:
+        elapsed = timeit.timeit(lambda: extract_with_document(html, url, backend), number=args.repeat) / args.repeat
+        print(f"{'HTMLDocument (' + backend + ')':<40} {elapsed * 1000:8.2f} ms/page   {baseline / elapsed:5.1f}x faster")
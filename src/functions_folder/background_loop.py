@@ -0,0 +1,71 @@
+# File: functions_folder/background_loop.py
+
+import asyncio
+import atexit
+import threading
+
+from functions_folder.APP_loggerSetup import app_loggerSetup
+
+logger = app_loggerSetup()
+
+
+class BackgroundLoop:
+    """
+    One asyncio event loop running forever on a daemon thread.
+
+    Synchronous code (Flask routes, CLI tools) hands coroutines to it with
+    run() instead of creating a new loop per call, so long-lived async
+    resources such as an aiohttp session and its connection pool survive
+    between requests.
+    """
+
+    def __init__(self, name="background-loop"):
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True)
+                self._thread.start()
+                logger.info(f"Started event loop thread '{self.name}'")
+            return self._loop
+
+    @property
+    def running(self):
+        return self._loop is not None and not self._loop.is_closed()
+
+    def in_loop(self):
+        return self._thread is threading.current_thread()
+
+    def run(self, coro, timeout=None):
+        """Runs `coro` on the loop and blocks until it finishes; returns its result."""
+        if self.in_loop():
+            raise RuntimeError("BackgroundLoop.run() called from its own thread; await the coroutine instead")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def submit(self, coro):
+        """Schedules `coro` on the loop without waiting; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
+
+
+background_loop = BackgroundLoop()
+atexit.register(background_loop.stop)
+
+
+def run_coroutine(coro, timeout=None):
+    return background_loop.run(coro, timeout)
@@ -1,28 +1,72 @@
 # brief_generator.py
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from transformers import pipeline
+import os
+import queue
 import random
+import threading
+from collections import OrderedDict
 
+from functions_folder.model_registry import get_model
 from functions_folder.APP_loggerSetup import app_loggerSetup
 from functions_folder.LOCAL_loggerSetup import local_loggerSetup
 
 logger = app_loggerSetup()
 
-def generate_brief(seed_text, faq_count=5):
-    """
-    Generates a structured outline and FAQs from a seed topic or paragraph.
+# Generator models a brief can be written with (model registry names).
+GENERATOR_MODELS = ("gpt2", "distilgpt2")
+DEFAULT_MODEL = os.getenv("BRIEF_MODEL", "gpt2")
+# Answer length, in new tokens, per FAQ. A fixed budget rather than prompt plus
+# answer, which left long seed texts no room for an answer at all.
+MAX_NEW_TOKENS = 60
+FAILED_ANSWER = "Content generation failed. Try refining the topic."
+CACHE_ENTRIES = int(os.getenv("BRIEF_CACHE_ENTRIES", 1024))
 
-    Args:
-        seed_text (str): Topic or seed paragraph.
-        faq_count (int): Number of FAQs to generate.
+
+class AnswerCache:
+    """Small thread-safe LRU of generated FAQ answers, keyed by (model, seed_text, keyword, max_new_tokens)."""
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            answer = self._entries.get(key)
+            if answer is not None:
+                self._entries.move_to_end(key)
+            return answer
+
+    def put(self, key, answer):
+        with self._lock:
+            self._entries[key] = answer
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+answer_cache = AnswerCache()
+# One generation at a time: concurrent briefs queue instead of oversubscribing the CPU.
+_generate_lock = threading.Lock()
+
+
+def outline(seed_text):
+    """
+    Keywords and headings of a brief from TF-IDF over the seed text.
 
     Returns:
-        dict: Contains H1, H2s, H3s, and FAQs.
+        tuple: (keywords, h1, h2s, h3s)
     """
+    # Deferred: sklearn is only needed once a brief is requested
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
     # Extract keywords using TF-IDF
     vectorizer = TfidfVectorizer(stop_words='english', max_features=30)
-    tfidf_matrix = vectorizer.fit_transform([seed_text])
+    vectorizer.fit_transform([seed_text])
     keywords = vectorizer.get_feature_names_out()
     keywords = [kw for kw in keywords if len(kw) > 3]  # Filter short tokens
 
@@ -30,25 +74,146 @@ def generate_brief(seed_text, faq_count=5):
     h1 = f"Overview of {keywords[0].capitalize()}" if keywords else "Overview"
     h2s = [f"What is {kw}?" for kw in keywords[1:4]]
     h3s = [f"Benefits of {kw}" for kw in keywords[4:7]]
+    return keywords, h1, h2s, h3s
+
+
+def faq_prompt(seed_text, keyword):
+    return f"Based on the topic '{seed_text}', what should I know about {keyword}?"
+
+
+class StopOnEvent:
+    """Stopping criterion for generate(): every row of the batch stops once stop_event is set."""
+
+    def __init__(self, stop_event):
+        self.stop_event = stop_event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+
+        return torch.full((input_ids.shape[0],), self.stop_event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+
+class AnswerStreamer:
+    """
+    Streamer for generate() that turns the decoding steps of a whole batch
+    into text deltas per answer (TextIteratorStreamer only takes batch size 1).
+
+    on_token(row, text) is called with the text each step adds to an answer;
+    text that ends in half a multi-byte character is held back until complete.
+    """
+
+    def __init__(self, tokenizer, rows, on_token):
+        self.tokenizer = tokenizer
+        self.on_token = on_token
+        self.tokens = [[] for _ in range(rows)]
+        self.sent = ["" for _ in range(rows)]
+        self.done = [False] * rows
+        self.prompt_seen = False
+
+    def put(self, value):
+        if not self.prompt_seen:  # generate() passes the prompt batch first
+            self.prompt_seen = True
+            return
+        for row, token in enumerate(value.tolist()):
+            if self.done[row]:
+                continue
+            if token == self.tokenizer.pad_token_id:  # EOS; finished rows are padded with it
+                self.done[row] = True
+                continue
+            self.tokens[row].append(token)
+            text = self.tokenizer.decode(self.tokens[row], skip_special_tokens=True)
+            if text.endswith("\ufffd"):
+                continue
+            delta = text[len(self.sent[row]):]
+            if delta:
+                self.sent[row] = text
+                self.on_token(row, delta)
+
+    def end(self):
+        pass
+
+
+def generate_answers(prompts, model=DEFAULT_MODEL, max_new_tokens=MAX_NEW_TOKENS, on_token=None, stop_event=None):
+    """
+    Greedy continuations of `prompts` in one padded batch.
+
+    Every answer gets up to max_new_tokens however long its prompt is.
+    Prompts too long for the model's context with that room to spare lose
+    their start (the seed text), never the question at their end.
+
+    Args:
+        prompts (list): Prompt texts.
+        model (str): Model registry name of the generator.
+        max_new_tokens (int): Answer length, in tokens.
+        on_token (callable): Called with (index, text) as each answer is written.
+        stop_event (threading.Event): Set to stop generating; the answers are then incomplete.
+
+    Returns:
+        list: The answer text of each prompt (prompt not included).
+    """
+    import torch
+    from transformers import StoppingCriteriaList
+
+    tokenizer, generator = get_model(model)
+    batch = tokenizer(prompts, return_tensors="pt", padding=True, truncation=True,
+                      max_length=generator.config.max_position_embeddings - max_new_tokens)
+    width = batch["input_ids"].shape[1]
+    streamer = AnswerStreamer(tokenizer, len(prompts), on_token) if on_token else None
+    stopping_criteria = StoppingCriteriaList([StopOnEvent(stop_event)]) if stop_event else None
+    with _generate_lock, torch.inference_mode():
+        output = generator.generate(**batch, max_new_tokens=max_new_tokens, do_sample=False,
+                                    pad_token_id=tokenizer.pad_token_id, streamer=streamer,
+                                    stopping_criteria=stopping_criteria)
+    return [tokenizer.decode(output[row, width:], skip_special_tokens=True).strip() for row in range(len(prompts))]
+
+
+def faq_keywords(seed_text, keywords, faq_count):
+    # Seeded by the topic: the same brief asks the same questions, so its answers come from the cache
+    return random.Random(seed_text).sample(keywords, min(faq_count, len(keywords)))
+
+
+def faq_question(keyword):
+    return f"What should I know about {keyword}?"
+
+
+def generate_brief(seed_text, faq_count=5, model=None):
+    """
+    Generates a structured outline and FAQs from a seed topic or paragraph.
+
+    The generator model is loaded once per process (model registry), the
+    FAQ answers not already cached are generated together in one batch,
+    and answers are cached by (model, seed_text, keyword, max_new_tokens), so
+    repeating a brief costs only its TF-IDF outline.
+
+    Args:
+        seed_text (str): Topic or seed paragraph.
+        faq_count (int): Number of FAQs to generate.
+        model (str): 'gpt2' or the faster 'distilgpt2' (default BRIEF_MODEL).
+
+    Returns:
+        dict: Contains H1, H2s, H3s, and FAQs.
+    """
+    model = model if model in GENERATOR_MODELS else DEFAULT_MODEL
+    keywords, h1, h2s, h3s = outline(seed_text)
 
     # FAQ generation using prompt conditioning
-    generator = pipeline("text-generation", model="gpt2")
-    faqs = []
-    selected_keywords = random.sample(keywords, min(faq_count, len(keywords)))
-    for kw in selected_keywords:
-        prompt = f"Based on the topic '{seed_text}', what should I know about {kw}?"
+    selected_keywords = faq_keywords(seed_text, keywords, faq_count)
+    answers = {kw: answer_cache.get((model, seed_text, kw, MAX_NEW_TOKENS)) for kw in selected_keywords}
+    missing = [kw for kw, answer in answers.items() if answer is None]
+    if missing:
         try:
-            answer = generator(prompt, max_length=80, do_sample=False)[0]['generated_text']
-            answer_clean = answer.replace(prompt, "").strip()
-            faqs.append({
-                "question": f"What should I know about {kw}?",
-                "answer": answer_clean
-            })
-        except Exception:
-            faqs.append({
-                "question": f"What should I know about {kw}?",
-                "answer": "Content generation failed. Try refining the topic."
-            })
+            generated = generate_answers([faq_prompt(seed_text, kw) for kw in missing], model=model)
+            for kw, answer in zip(missing, generated):
+                answers[kw] = answer
+                answer_cache.put((model, seed_text, kw, MAX_NEW_TOKENS), answer)
+        except Exception as e:
+            logger.error(f"FAQ generation with {model} failed: {e}")
+            answers.update({kw: FAILED_ANSWER for kw in missing})
+
+    faqs = [{
+        "question": faq_question(kw),
+        "answer": answers[kw]
+    } for kw in selected_keywords]
 
     return {
         "h1": h1,
@@ -57,14 +222,92 @@ def generate_brief(seed_text, faq_count=5):
         "faqs": faqs
     }
 
+
+def stream_brief(seed_text, faq_count=5, model=None, keepalive=15):
+    """
+    Streams a brief as it is written instead of returning when it is done.
+
+    The TF-IDF outline and the FAQ questions are yielded first, cached
+    answers right after, and the missing answers token by token while one
+    batch generates them on a background thread. Closing the generator
+    (e.g. the browser disconnects) stops the generation; only complete
+    answers are cached.
+
+    Args:
+        seed_text (str): Topic or seed paragraph.
+        faq_count (int): Number of FAQs to generate.
+        model (str): 'gpt2' or the faster 'distilgpt2' (default BRIEF_MODEL).
+        keepalive (float): Seconds of silence after which a 'keepalive' event is yielded.
+
+    Yields:
+        dict: An 'event' key ('outline', 'token', 'answer', 'keepalive', 'done' or 'error') plus its data;
+        'outline' carries h1, h2, h3 and questions, 'token' the index and text added to an answer,
+        'answer' the index and complete answer.
+    """
+    model = model if model in GENERATOR_MODELS else DEFAULT_MODEL
+    try:
+        keywords, h1, h2s, h3s = outline(seed_text)
+    except ValueError as e:  # nothing but stop words
+        yield {"event": "error", "error": f"No keywords found in the seed text: {e}"}
+        return
+    selected_keywords = faq_keywords(seed_text, keywords, faq_count)
+    yield {"event": "outline", "h1": h1, "h2": h2s, "h3": h3s,
+           "questions": [faq_question(kw) for kw in selected_keywords]}
+
+    missing = []
+    for index, kw in enumerate(selected_keywords):
+        answer = answer_cache.get((model, seed_text, kw, MAX_NEW_TOKENS))
+        if answer is None:
+            missing.append(index)
+        else:
+            yield {"event": "answer", "index": index, "answer": answer}
+
+    if missing:
+        events = queue.Queue()
+        stop_event = threading.Event()
+
+        def run():
+            try:
+                generated = generate_answers(
+                    [faq_prompt(seed_text, selected_keywords[index]) for index in missing], model=model,
+                    on_token=lambda row, text: events.put({"event": "token", "index": missing[row], "text": text}),
+                    stop_event=stop_event
+                )
+                for index, answer in zip(missing, generated):
+                    if not stop_event.is_set():
+                        answer_cache.put((model, seed_text, selected_keywords[index], MAX_NEW_TOKENS), answer)
+                    events.put({"event": "answer", "index": index, "answer": answer})
+            except Exception as e:
+                logger.error(f"Streaming FAQ generation with {model} failed: {e}")
+                for index in missing:
+                    events.put({"event": "answer", "index": index, "answer": FAILED_ANSWER})
+            finally:
+                events.put(None)
+
+        threading.Thread(target=run, daemon=True).start()
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=keepalive)
+                except queue.Empty:
+                    yield {"event": "keepalive"}
+                    continue
+                if event is None:
+                    break
+                yield event
+        finally:
+            stop_event.set()
+
+    yield {"event": "done"}
+
 # 🔧 Local test block
 if __name__ == "__main__":
     logger=local_loggerSetup(use_filename=__file__)
     seed = "CRISPR technology in cancer therapy and its applications in precision medicine"
     result = generate_brief(seed, faq_count=3)
-    logger.info("H1:", result["h1"])
-    logger.info("H2s:", result["h2"])
-    logger.info("H3s:", result["h3"])
-    logger.info("\nFAQs:")
+    logger.info(f"H1: {result['h1']}")
+    logger.info(f"H2s: {result['h2']}")
+    logger.info(f"H3s: {result['h3']}")
+    logger.info("FAQs:")
     for faq in result["faqs"]:
-        logger.info(f"Q: {faq['question']}\nA: {faq['answer']}\n")
\ No newline at end of file
+        logger.info(f"Q: {faq['question']}\nA: {faq['answer']}\n")
@@ -1,37 +1,29 @@
 # File: functions/broken_link_checker.py
 
-from bs4 import BeautifulSoup
+from collections import defaultdict
 
-import requests
-import aiohttp
-import asyncio
+from functions_folder.crawler import crawl_site
+from functions_folder.crawl_store import iter_pages
+from functions_folder.html_document import HTMLDocument, fetch_document
+from functions_folder.link_status_cache import check_links
+from functions_folder.url_canonicalizer import canonicalize_url, link_target
+from functions_folder.APP_loggerSetup import app_loggerSetup
 
-async def check_link(session, url):
-    try:
-        async with session.get(url, timeout=10) as response:
-            return url, response.status
-    except Exception as e:
-        return url, str(e)
+logger = app_loggerSetup()
 
-async def validate_links(links):
-    async with aiohttp.ClientSession() as session:
-        tasks = [check_link(session, link) for link in links]
-        return await asyncio.gather(*tasks)
+def link_status(result):
+    """A probe result as the (url, status) pair used in reports; status is the error text on failure."""
+    return result["url"], result["status"] if result["status"] is not None else result["error"]
 
-def broken_link_checker(page_url):
+def broken_link_checker(page_url, use_cache=True):
     try:
-        response = requests.get(page_url, timeout=10)
-        response.raise_for_status()
+        document = fetch_document(page_url)
     except Exception as e:
         return {"error": f"Failed to fetch page: {e}"}
 
-    soup = BeautifulSoup(response.text, 'html.parser')
-    raw_links = [a.get('href') for a in soup.find_all('a', href=True)]
-    full_links = [requests.compat.urljoin(page_url, link) for link in raw_links]
-
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    results = loop.run_until_complete(validate_links(full_links))
+    full_links = document.links
+    probes, cache_stats = check_links(full_links, use_cache=use_cache)
+    results = [link_status(result) for result in probes]
 
     broken = []
     valid = []
@@ -45,5 +37,93 @@ def broken_link_checker(page_url):
         "page_url": page_url,
         "total_links": len(full_links),
         "valid_links": valid,
-        "broken_links": broken
-    }
\ No newline at end of file
+        "broken_links": broken,
+        **cache_stats
+    }
+
+def is_ok(status):
+    return isinstance(status, int) and status < 400
+
+def collect_references(pages):
+    """
+    Maps every unique link/resource target on the crawled pages to the
+    places that reference it. Targets are the URLs as linked, with only
+    the fragment dropped and the scheme and host lowercased (link_target),
+    so what is requested and reported is what the page links to. Relative
+    links resolve against the page's <base>, else the URL it was served
+    from (pages are stored under their response URL).
+
+    Returns:
+        tuple: (dict target -> list of {'page', 'tag', 'text'}, dict of the
+        crawled pages' own canonical URL -> status, number of pages read)
+    """
+    references = defaultdict(list)
+    known = {}
+    page_count = 0
+    for page in pages:
+        page_count += 1
+        # 304 means the stored copy was still current, i.e. the page was reachable.
+        known[canonicalize_url(page["url"], tracking_params=())] = 200 if page["status"] == 304 else page["status"]
+        if not page["html"]:
+            continue
+        document = HTMLDocument(page["html"], url=page["url"])
+        for resource in document.resources:
+            target = link_target(resource["url"])
+            if target is None:  # mailto:, tel:, javascript:, data: ...
+                continue
+            references[target].append({"page": page["url"], "tag": resource["tag"], "text": resource["text"]})
+    return references, known, page_count
+
+def site_broken_link_checker(start_url, max_pages=50, crawl_id=None, use_cache=True):
+    """
+    Checks every link and resource (<a>, <img>, <script>, <link>) on a
+    whole site. The site is crawled first (or an existing crawl is read
+    back with `crawl_id`), the targets of all pages are deduplicated, and
+    each unique target is requested only once; pages fetched by the crawl
+    are not requested again, and neither are targets with a fresh entry
+    in the link-status cache.
+
+    Returns:
+        dict: Counts plus 'broken_links', one entry per broken target with
+        its 'status' and every 'references' entry (page, tag, anchor text),
+        most referenced first.
+    """
+    if crawl_id is None:
+        crawl = crawl_site(start_url, max_pages=max_pages)
+        if "error" in crawl:
+            return crawl
+        crawl_id, pages = crawl["crawl_id"], crawl["pages"]
+    else:
+        pages = iter_pages(crawl_id)
+
+    references, known, page_count = collect_references(pages)
+    if not page_count:
+        return {"error": f"No pages could be crawled from {start_url}"}
+
+    # Targets that are pages the crawl fetched (compared in canonical form) take the crawl's status.
+    statuses = {}
+    for url in references:
+        canonical = canonicalize_url(url, tracking_params=())
+        if canonical in known:
+            statuses[url] = known[canonical]
+    to_check = [url for url in references if url not in statuses]
+    logger.info(f"{sum(len(refs) for refs in references.values())} references to {len(references)} unique "
+                f"targets on {page_count} pages; checking {len(to_check)}")
+    probes, cache_stats = check_links(to_check, use_cache=use_cache)
+    statuses.update(link_status(result) for result in probes)
+
+    broken = [
+        {"url": url, "status": statuses[url], "references": refs}
+        for url, refs in references.items() if not is_ok(statuses[url])
+    ]
+    broken.sort(key=lambda item: len(item["references"]), reverse=True)
+    return {
+        "start_url": start_url,
+        "crawl_id": crawl_id,
+        "pages_checked": page_count,
+        "total_references": sum(len(refs) for refs in references.values()),
+        "unique_targets": len(references),
+        "requests_made": cache_stats["cache_misses"],
+        "broken_links": broken,
+        **cache_stats
+    }
@@ -1,19 +1,38 @@
 # content_gap_finder.py
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
 import numpy as np
 
+from functions_folder.embedding_service import encode
 from functions_folder.APP_loggerSetup import app_loggerSetup
 from functions_folder.LOCAL_loggerSetup import local_loggerSetup
 
 logger = app_loggerSetup()
 
+def top_indices(scores, n):
+    """
+    Indices of the `n` largest scores without sorting them all
+    (np.argpartition); scores tied with the n-th largest are kept too, so
+    a tie-break applied afterwards sees every candidate.
+    """
+    if n <= 0 or len(scores) == 0:
+        return np.array([], dtype=np.int64)
+    if n >= len(scores):
+        return np.arange(len(scores))
+    kth = len(scores) - n
+    threshold = scores[np.argpartition(scores, kth)[kth]]
+    return np.flatnonzero(scores >= threshold)
+
+
 def find_content_gaps(your_text, competitor_texts, top_n=10):
     """
     Detect missing topics using TF-IDF and BERT embeddings.
 
+    Terms competitors use more than you (average TF-IDF difference > 0)
+    are gaps, ranked by that difference; semantic similarity to your page
+    breaks ties, less related terms first. The TF-IDF matrix stays
+    sparse, and only the top gap terms are embedded, in one batch, and
+    scored with one matrix-vector product.
+
     Args:
         your_text (str): Your page content.
         competitor_texts (list of str): List of competitor page contents.
@@ -22,40 +41,42 @@ def find_content_gaps(your_text, competitor_texts, top_n=10):
     Returns:
         list of dict: Each dict contains 'term', 'tfidf_score', 'semantic_score'
     """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    if not competitor_texts:
+        return []
+
     # TF-IDF comparison
     vectorizer = TfidfVectorizer(stop_words='english', max_features=1000)
     combined_texts = competitor_texts + [your_text]
-    tfidf_matrix = vectorizer.fit_transform(combined_texts)
+    tfidf_matrix = vectorizer.fit_transform(combined_texts).tocsr()
     feature_names = vectorizer.get_feature_names_out()
 
-    # Get average competitor TF-IDF
-    comp_tfidf = np.mean(tfidf_matrix[:-1].toarray(), axis=0)
+    # Average competitor TF-IDF minus yours: column sums of the sparse matrix, never a dense documents x terms array
+    competitors = tfidf_matrix[:-1]
+    comp_tfidf = competitors.sum(axis=0).A1 / competitors.shape[0]
     your_tfidf = tfidf_matrix[-1].toarray()[0]
     tfidf_diff = comp_tfidf - your_tfidf
 
-    # BERT semantic comparison
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    your_embedding = model.encode([your_text], convert_to_tensor=True)
-    semantic_scores = {}
-
-    for idx, term in enumerate(feature_names):
-        term_embedding = model.encode([term], convert_to_tensor=True)
-        score = cosine_similarity(term_embedding.cpu().numpy(), your_embedding.cpu().numpy())[0][0]
-        semantic_scores[term] = score
-
-    # Combine scores
-    gaps = []
-    for idx, term in enumerate(feature_names):
-        if tfidf_diff[idx] > 0:
-            gaps.append({
-                'term': term,
-                'tfidf_score': round(tfidf_diff[idx], 4),
-                'semantic_score': round(semantic_scores[term], 4)
-            })
-
-    # Sort by combined relevance
-    sorted_gaps = sorted(gaps, key=lambda x: (x['tfidf_score'], 1 - x['semantic_score']), reverse=True)
-    return sorted_gaps[:top_n]
+    # Gaps are ranked by the rounded difference (as displayed); only the top ones need a semantic score
+    candidates = np.flatnonzero(tfidf_diff > 0)
+    gap_scores = np.round(tfidf_diff[candidates], 4)
+    keep = top_indices(gap_scores, top_n)
+    candidates, gap_scores = candidates[keep], gap_scores[keep]
+    if not len(candidates):
+        return []
+
+    # BERT semantic comparison: the candidate terms and your page in one batch; cosine = dot product
+    vectors = encode([feature_names[i] for i in candidates] + [your_text])
+    semantic_scores = np.round((vectors[:-1] @ vectors[-1]).astype(np.float64), 4)
+
+    # Sort by combined relevance: biggest gap first, then the terms least related to your page
+    order = np.lexsort((semantic_scores, -gap_scores))[:top_n]
+    return [{
+        'term': feature_names[candidates[k]],
+        'tfidf_score': float(gap_scores[k]),
+        'semantic_score': float(semantic_scores[k])
+    } for k in order]
 
 # 🔧 Local test block
 if __name__ == "__main__":
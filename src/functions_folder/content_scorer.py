@@ -1,13 +1,34 @@
 # File: content_scorer.py
 
-import textstat
-from transformers import AutoTokenizer, AutoModel
-import torch
+import csv
+import io
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import numpy as np
 
-# Load model once at module level
-tokenizer = AutoTokenizer.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
-model = AutoModel.from_pretrained("sentence-transformers/all-MiniLM-L6-v2")
+from functions_folder.embedding_service import encode, encode_document, encode_documents
+from functions_folder.APP_loggerSetup import app_loggerSetup
+
+logger = app_loggerSetup()
+
+# Sections scoring this far below the document as a whole are flagged as drifting off topic.
+DRIFT_MARGIN = 0.15
+# Readability of a batch runs in one shared pool of this many processes (textstat
+# is pure Python, so threads would share one core); below 2 it runs inline. Every
+# web process gets its own pool, so keep it small.
+READABILITY_WORKERS = int(os.getenv("CONTENT_SCORER_WORKERS", 2))
+# Smaller batches are scored inline: starting the pool would cost more than it saves.
+POOL_MIN_DOCUMENTS = 8
+# Pasted documents are separated by a line of three or more dashes.
+DOCUMENT_SEPARATOR = re.compile(r"^\s*-{3,}\s*$", re.MULTILINE)
+TEXT_COLUMNS = ("text", "content", "body", "draft")
+NAME_COLUMNS = ("name", "title", "url", "id")
 
 def interpret_scores(readability, similarity):
     if readability > 60 and similarity > 0.8:
@@ -19,33 +40,223 @@ def interpret_scores(readability, similarity):
     else:
         return "Content is moderately readable and somewhat relevant."
     
-def content_scorer(content: str, reference: str) -> dict:
+def readability(content):
+    """(Flesch reading ease, grade level) of one text; a module-level function so worker processes can run it."""
+    import textstat  # pulls in nltk and scipy (~2s); only imported once content is scored
+    return (round(textstat.flesch_reading_ease(content), 2),
+            round(textstat.text_standard(content, float_output=True), 2))
+
+
+_readability_pool = None
+_readability_pool_lock = threading.Lock()
+
+
+def readability_pool():
+    """
+    The readability process pool shared by every batch, started on first
+    use; None when READABILITY_WORKERS is below 2. Workers come from a
+    forkserver, not a fork of the threaded web process.
+    """
+    global _readability_pool
+    if READABILITY_WORKERS < 2:
+        return None
+    with _readability_pool_lock:
+        if _readability_pool is None:
+            _readability_pool = ProcessPoolExecutor(READABILITY_WORKERS,
+                                                    mp_context=multiprocessing.get_context("forkserver"))
+        return _readability_pool
+
+
+def discard_readability_pool(pool):
+    """Drops a pool that lost a worker so the next batch starts a fresh one."""
+    global _readability_pool
+    with _readability_pool_lock:
+        if _readability_pool is pool:
+            _readability_pool = None
+    pool.shutdown(wait=False)
+
+
+def score_sections(content, sections, similarity):
+    """Adds a short preview and a 'drift' flag to each section from encode_document()."""
+    for section in sections:
+        text = content[section["start"]:section["end"]]
+        section["preview"] = text if len(text) <= 120 else text[:117].rstrip() + "..."
+        section["drift"] = section["similarity"] < float(similarity) - DRIFT_MARGIN
+    return sections
+
+
+def content_scorer(content: str, reference: str, pooling: str = "mean", chunked: bool = True) -> dict:
+    """
+    Scores readability and topical relevance of `content` against `reference`.
+
+    With `chunked` (the default) the whole content counts: it is embedded
+    as overlapping sentence windows pooled with `pooling` ('mean' or
+    'max'), and each window is scored against the reference as a section.
+    Without it only the first ~256 word pieces are embedded, as before.
+    """
     # Readability metrics
-    readability_score = textstat.flesch_reading_ease(content)
-    grade_level = textstat.text_standard(content, float_output=True)
-
-    # Semantic similarity
-    def embed(text):
-        inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-        with torch.no_grad():
-            outputs = model(**inputs)
-        embeddings = outputs.last_hidden_state.mean(dim=1)
-        return embeddings.squeeze().numpy()
-
-    content_vec = embed(content)
-    reference_vec = embed(reference)
-    similarity = np.dot(content_vec, reference_vec) / (
-        np.linalg.norm(content_vec) * np.linalg.norm(reference_vec)
-    )
+    readability_score, grade_level = readability(content)
+
+    # Semantic similarity (vectors are normalized, so cosine = dot product)
+    sections = []
+    if chunked:
+        reference_vec = encode_document(reference)["vector"]
+        document = encode_document(content, pooling=pooling, reference=reference_vec)
+        similarity = np.dot(document["vector"], reference_vec)
+        sections = score_sections(content, document["sections"], similarity)
+    else:
+        content_vec, reference_vec = encode([content, reference])
+        similarity = np.dot(content_vec, reference_vec)
 
     return {
-        "readability_score": round(readability_score, 2),
-        "grade_level": round(grade_level, 2),
+        "readability_score": readability_score,
+        "grade_level": grade_level,
         "semantic_similarity": round(float(similarity), 3),
-        "summary": interpret_scores(readability_score, similarity)
+        "summary": interpret_scores(readability_score, similarity),
+        "sections": sections,
+        "drifting_sections": sum(section["drift"] for section in sections),
     }
     
 
+def read_documents(text, prefix="Document", one_per_line=False):
+    """
+    Named documents from pasted text or an uploaded file.
+
+    A CSV with a header naming a text column ('text', 'content', 'body' or
+    'draft') gives one document per row, named by its 'name', 'title',
+    'url' or 'id' column when there is one. Otherwise documents are
+    separated by '---' lines, or with `one_per_line` each line is one
+    (a list of target topics).
+
+    Returns:
+        list: (name, text) tuples, empty documents dropped.
+    """
+    first_line = text.lstrip().split("\n", 1)[0]
+    header = [cell.strip().lower() for cell in next(csv.reader([first_line]), [])]
+    text_column = next((column for column in TEXT_COLUMNS if column in header), None)
+    if text_column:
+        csv.field_size_limit(16 * 1024 * 1024)  # whole articles in one cell
+        name_column = next((column for column in NAME_COLUMNS if column in header), None)
+        rows = csv.DictReader(io.StringIO(text.lstrip()), fieldnames=header)
+        next(rows)
+        documents = [((row.get(name_column) or "").strip() if name_column else "", (row.get(text_column) or "").strip())
+                     for row in rows]
+    elif one_per_line and not DOCUMENT_SEPARATOR.search(text):
+        documents = [("", line.strip()) for line in text.splitlines()]
+    else:
+        documents = [("", part.strip()) for part in DOCUMENT_SEPARATOR.split(text)]
+    documents = [(name, body) for name, body in documents if body]
+    return [(name or (body if len(body) <= 60 else f"{prefix} {i}"), body)
+            for i, (name, body) in enumerate(documents, start=1)]
+
+
+def score_batch(drafts, references, pooling="mean", readability_scores=True):
+    """
+    Scores many drafts against many references in one call: every
+    document is embedded once (long ones as pooled sentence windows), the
+    full similarity matrix is one matrix product, and readability runs in
+    the shared readability_pool().
+
+    Args:
+        drafts (list): (name, text) tuples or plain strings to score.
+        references (list): (name, text) tuples or strings: target topics,
+            briefs or competitor pages.
+        pooling (str): 'mean' or 'max' pooling of long documents' windows.
+        readability_scores (bool): Also compute readability and grade level.
+
+    Returns:
+        dict: 'references' (names), 'results' (one row per draft, ranked
+        by best similarity: 'rank', 'name', 'words', 'similarities' (one
+        per reference), 'best_reference', 'best_similarity',
+        'mean_similarity', 'readability_score', 'grade_level', 'summary'),
+        'matrix' (drafts x references np.ndarray) and 'stats'.
+    """
+    drafts = [draft if isinstance(draft, tuple) else (f"Draft {i}", draft) for i, draft in enumerate(drafts, start=1)]
+    references = [reference if isinstance(reference, tuple) else (reference[:60], reference)
+                  for reference in references]
+    if not drafts:
+        return {"error": "No drafts given"}
+    if not references:
+        return {"error": "No references given"}
+
+    started = time.perf_counter()
+    draft_texts = [text for _, text in drafts]
+    # Let the readability processes run while this one embeds.
+    pool = readability_pool() if readability_scores and len(draft_texts) >= POOL_MIN_DOCUMENTS else None
+    try:
+        if pool:
+            try:
+                pending = pool.map(readability, draft_texts,
+                                   chunksize=max(1, len(draft_texts) // (READABILITY_WORKERS * 4)))
+            except (BrokenProcessPool, RuntimeError):  # a worker died earlier, or the pool was shut down
+                discard_readability_pool(pool)
+                pool = None
+        vectors = encode_documents(draft_texts + [text for _, text in references], pooling=pooling)
+        embedded = time.perf_counter()
+        matrix = vectors[:len(drafts)] @ vectors[len(drafts):].T
+        scores = None
+        if pool:
+            try:
+                scores = list(pending)
+            except BrokenProcessPool:
+                logger.warning("A readability worker died; scoring this batch inline")
+                discard_readability_pool(pool)
+        if scores is None:
+            scores = ([readability(text) for text in draft_texts] if readability_scores
+                      else [(None, None)] * len(drafts))
+    except Exception as e:
+        return {"error": f"Batch scoring failed: {e}"}
+
+    best = matrix.argmax(axis=1)
+    means = matrix.mean(axis=1)
+    results = []
+    for i, ((name, text), (reading_ease, grade)) in enumerate(zip(drafts, scores)):
+        best_similarity = float(matrix[i, best[i]])
+        results.append({
+            "name": name,
+            "words": len(text.split()),
+            "similarities": [round(float(value), 3) for value in matrix[i]],
+            "best_reference": references[best[i]][0],
+            "best_similarity": round(best_similarity, 3),
+            "mean_similarity": round(float(means[i]), 3),
+            "readability_score": reading_ease,
+            "grade_level": grade,
+            "summary": interpret_scores(reading_ease, best_similarity) if reading_ease is not None else "",
+        })
+    results.sort(key=lambda row: row["best_similarity"], reverse=True)
+    for rank, row in enumerate(results, start=1):
+        row["rank"] = rank
+    finished = time.perf_counter()
+    stats = {
+        "drafts": len(drafts),
+        "references": len(references),
+        "pairs": matrix.size,
+        "embed_seconds": round(embedded - started, 3),
+        "total_seconds": round(finished - started, 3),
+        "documents_per_second": round((len(drafts) + len(references)) / max(finished - started, 1e-9), 1),
+    }
+    logger.info(f"Scored {len(drafts)} drafts against {len(references)} references in {stats['total_seconds']}s")
+    return {"references": [name for name, _ in references], "results": results, "matrix": matrix, "stats": stats}
+
+
+def crawl_documents(crawl_id, path=None):
+    """(url, visible text) of the HTML pages of a stored crawl, e.g. a whole blog to score."""
+    from functions_folder.corpus_gap_finder import iter_crawl_texts
+    return list(iter_crawl_texts(crawl_id, path))
+
+
+def export_scores_csv(batch, file=None):
+    """Writes the ranked table, one similarity column per reference; returns the CSV text when no file is given."""
+    out = file or io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["rank", "name", "words", "best_reference", "best_similarity", "mean_similarity",
+                     "readability_score", "grade_level", *batch["references"]])
+    for row in batch["results"]:
+        writer.writerow([row["rank"], row["name"], row["words"], row["best_reference"], row["best_similarity"],
+                         row["mean_similarity"], row["readability_score"], row["grade_level"], *row["similarities"]])
+    return out.getvalue() if file is None else None
+
+
 if __name__=="__main__":
     input="Explore our whole aresnal of tools,providing a comprehensive range of features to enhance a website's visibility and performance on search engines.By leveraging our diverse range of AIO tools, businesses and website owners can develop a robust strategy to improve their online presence, attract organic traffic, and stay competitive in the digital landscape."
     
@@ -56,3 +267,5 @@ if __name__=="__main__":
     print("Grade Level:", result["grade_level"])
     print("Semantic Similarity:", result["semantic_similarity"])
     print("Summary:", result["summary"])
+    for section in result["sections"]:
+        print(f"  {section['similarity']:6.3f} {'DRIFT ' if section['drift'] else ''}{section['preview']}")
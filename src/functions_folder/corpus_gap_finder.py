@@ -0,0 +1,424 @@
+# File: functions_folder/corpus_gap_finder.py
+
+import argparse
+import os
+import time
+from contextlib import closing
+from urllib.parse import urlparse
+
+import numpy as np
+
+from functions_folder.crawl_store import CrawlStore, connect, iter_pages
+from functions_folder.content_gap_finder import top_indices
+from functions_folder.APP_loggerSetup import app_loggerSetup
+from functions_folder.LOCAL_loggerSetup import local_loggerSetup
+
+logger = app_loggerSetup()
+
+DEFAULT_DB_PATH = "crawl_data/corpus_terms.db"
+# Hashed feature space: term statistics are fixed-size arrays whatever the vocabulary.
+N_FEATURES = 2 ** 20
+# Documents tokenized between two accumulator updates.
+CHUNK_DOCUMENTS = int(os.getenv("CORPUS_CHUNK_DOCUMENTS", 500))
+# Server-side directories the web form may read text from (dir:<name> sources).
+CORPUS_ROOT = os.getenv("CORPUS_ROOT", "corpora")
+TEXT_EXTENSIONS = (".txt", ".md")
+HTML_EXTENSIONS = (".html", ".htm")
+# Gap terms grouped into topic clusters (by their MiniLM embeddings).
+CLUSTER_TERMS = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS corpus_domains (
+    domain TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    documents INTEGER NOT NULL,
+    tokens INTEGER NOT NULL,
+    n_features INTEGER NOT NULL,
+    features BLOB NOT NULL,
+    df BLOB NOT NULL,
+    tf BLOB NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS corpus_terms (
+    feature INTEGER PRIMARY KEY,
+    term TEXT NOT NULL
+);
+"""
+
+
+def db_path(path=None):
+    return path or os.getenv("CORPUS_GAP_DB", DEFAULT_DB_PATH)
+
+
+def open_db(path=None):
+    conn = connect(db_path(path))
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def vectorizer(n_features=N_FEATURES):
+    """Term counts per document in hashed buckets, tokenized like the single-page gap finder's TF-IDF."""
+    from sklearn.feature_extraction.text import HashingVectorizer
+    return HashingVectorizer(n_features=n_features, stop_words="english", alternate_sign=False, norm=None)
+
+
+def iter_crawl_texts(crawl_id, path=None):
+    """Lazily yields (url, visible text) of the HTML pages of a stored crawl."""
+    from functions_folder.html_document import HTMLDocument
+    for page in iter_pages(crawl_id, path):
+        if page["status"] == 200 and "html" in (page["content_type"] or "") and page["html"]:
+            yield page["url"], HTMLDocument(page["html"], url=page["url"]).text
+
+
+def iter_directory_texts(directory):
+    """Lazily yields (path, text) of the .txt, .md and .html files under `directory`."""
+    from functions_folder.html_document import HTMLDocument
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            extension = os.path.splitext(name)[1].lower()
+            if extension not in TEXT_EXTENSIONS + HTML_EXTENSIONS:
+                continue
+            file_path = os.path.join(root, name)
+            with open(file_path, encoding="utf-8", errors="replace") as f:
+                text = f.read()
+            yield file_path, HTMLDocument(text).text if extension in HTML_EXTENSIONS else text
+
+
+def resolve_source(spec, crawl_store_path=None, root=None):
+    """
+    Parses a corpus source: 'crawl:<crawl_id>' or 'dir:<directory>',
+    optionally prefixed with 'label=' to name the domain. Without a label a
+    crawl is named after the host of its start URL and a directory after
+    its base name. Directories are looked up under `root` (CORPUS_ROOT)
+    when one is given, and may not leave it.
+
+    Returns:
+        tuple: (domain, source, documents) where documents is a generator
+        factory of (id, text), or raises ValueError.
+    """
+    label, _, source = spec.strip().partition("=")
+    if not source or ":" in label:  # no label; the '=' belongs to the path
+        label, source = "", spec.strip()
+    kind, _, value = source.partition(":")
+    if kind == "crawl" and value:
+        store = CrawlStore(crawl_store_path)
+        try:
+            crawl = store.get_crawl(value)
+        finally:
+            store.close()
+        if crawl is None:
+            raise ValueError(f"Unknown crawl '{value}'")
+        domain = label or urlparse(crawl["start_url"]).netloc
+        return domain, source, lambda: iter_crawl_texts(value, crawl_store_path)
+    if kind == "dir" and value:
+        directory = value
+        if root is not None:
+            base = os.path.realpath(root)
+            directory = os.path.realpath(os.path.join(base, value))
+            if os.path.commonpath([base, directory]) != base:
+                raise ValueError(f"Directory '{value}' is outside {root}")
+        if not os.path.isdir(directory):
+            raise ValueError(f"No such directory '{value}'")
+        domain = label or os.path.basename(os.path.normpath(directory))
+        return domain, source, lambda: iter_directory_texts(directory)
+    raise ValueError(f"Unrecognized source '{spec}', expected crawl:<id> or dir:<path>")
+
+
+def ingest_corpus(domain, documents, source="", path=None, n_features=N_FEATURES, chunk_size=CHUNK_DOCUMENTS):
+    """
+    Streams a domain's documents into persistent term statistics.
+
+    Documents are read `chunk_size` at a time and their terms hashed into
+    `n_features` buckets, so memory is two fixed-size accumulators
+    (document frequency and summed relative term frequency) however many
+    documents there are. Each bucket is named after the first term seen in
+    it. IDF is not fixed here: it is computed from the document
+    frequencies of whichever domains are compared, so adding a competitor
+    never reprocesses the others. Re-ingesting a domain replaces its
+    statistics.
+
+    Args:
+        domain (str): Name the statistics are stored under.
+        documents (iterable): (id, text) tuples or plain texts.
+        source (str): Where the documents came from, for the report.
+        path (str): Statistics database (CORPUS_GAP_DB).
+        n_features (int): Hash buckets.
+        chunk_size (int): Documents tokenized per accumulator update.
+
+    Returns:
+        dict: 'domain', 'documents', 'tokens', 'terms' and 'seconds'.
+    """
+    from sklearn.feature_extraction import FeatureHasher
+
+    started = time.perf_counter()
+    counter = vectorizer(n_features)
+    analyze = counter.build_analyzer()
+    hasher = FeatureHasher(n_features=n_features, input_type="string", alternate_sign=False)
+    df = np.zeros(n_features, dtype=np.int64)
+    tf = np.zeros(n_features, dtype=np.float64)
+    with closing(open_db(path)) as conn:
+        named = np.zeros(n_features, dtype=bool)
+        named[[feature for (feature,) in conn.execute("SELECT feature FROM corpus_terms") if feature < n_features]] = True
+    new_terms = {}
+    totals = {"documents": 0, "tokens": 0}
+
+    def flush(chunk):
+        counts = counter.transform(chunk)  # sparse documents x buckets, duplicates summed
+        lengths = np.asarray(counts.sum(axis=1)).ravel()
+        per_row = np.diff(counts.indptr)
+        # The CSR row of a document lists each bucket once, so bucket counts are document frequencies.
+        df[:] += np.bincount(counts.indices, minlength=n_features)
+        tf[:] += np.bincount(counts.indices, weights=counts.data / np.repeat(np.maximum(lengths, 1), per_row),
+                             minlength=n_features)
+        totals["documents"] += int((lengths > 0).sum())
+        totals["tokens"] += int(lengths.sum())
+
+        # Name buckets seen for the first time: re-tokenize only the documents that hold them.
+        fresh = ~named[counts.indices]
+        if fresh.any():
+            rows = np.unique(np.repeat(np.arange(len(chunk)), per_row)[fresh])
+            terms = sorted({term for row in rows for term in analyze(chunk[row])})
+            for term, feature in zip(terms, hasher.transform([[term] for term in terms]).indices):
+                if not named[feature]:
+                    named[feature] = True
+                    new_terms[int(feature)] = term
+
+    chunk = []
+    for document in documents:
+        chunk.append(document[1] if isinstance(document, tuple) else document)
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+    documents_seen, tokens_seen = totals["documents"], totals["tokens"]
+
+    features = np.flatnonzero(df).astype(np.int32)
+    with closing(open_db(path)) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO corpus_domains (domain, source, documents, tokens, n_features, features, df, tf, "
+            "updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (domain, source, documents_seen, tokens_seen, n_features, features.tobytes(),
+             df[features].astype(np.int32).tobytes(), tf[features].astype(np.float32).tobytes(), time.time())
+        )
+        conn.executemany("INSERT OR IGNORE INTO corpus_terms (feature, term) VALUES (?, ?)", new_terms.items())
+        conn.commit()
+    result = {"domain": domain, "documents": documents_seen, "tokens": tokens_seen, "terms": len(features),
+              "seconds": round(time.perf_counter() - started, 2)}
+    logger.info(f"Ingested {domain}: {documents_seen} documents, {len(features)} terms in {result['seconds']}s")
+    return result
+
+
+def list_domains(path=None):
+    """Stored domains with their source, size and last update, newest first."""
+    with closing(open_db(path)) as conn:
+        return [dict(row) for row in conn.execute(
+            "SELECT domain, source, documents, tokens, updated_at FROM corpus_domains ORDER BY updated_at DESC")]
+
+
+def load_domain(domain, path=None):
+    """A stored domain's statistics as sparse arrays, or None."""
+    with closing(open_db(path)) as conn:
+        row = conn.execute("SELECT * FROM corpus_domains WHERE domain = ?", (domain,)).fetchone()
+    if row is None:
+        return None
+    return {
+        "domain": row["domain"],
+        "source": row["source"],
+        "documents": row["documents"],
+        "n_features": row["n_features"],
+        "features": np.frombuffer(row["features"], dtype=np.int32),
+        "df": np.frombuffer(row["df"], dtype=np.int32),
+        "tf": np.frombuffer(row["tf"], dtype=np.float32),
+    }
+
+
+def term_names(features, path=None):
+    with closing(open_db(path)) as conn:
+        names = {}
+        features = [int(feature) for feature in features]
+        for start in range(0, len(features), 500):
+            chunk = features[start:start + 500]
+            names.update(conn.execute(
+                f"SELECT feature, term FROM corpus_terms WHERE feature IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall())
+    return names
+
+
+def cluster_terms(terms, gaps, clusters):
+    """
+    Groups gap terms into topic clusters by their MiniLM embeddings
+    (k-means on the normalized vectors).
+
+    Returns:
+        list: one label per term.
+    """
+    from sklearn.cluster import KMeans
+    from functions_folder.embedding_service import encode
+
+    clusters = min(clusters, len(terms))
+    if clusters < 2:
+        return [0] * len(terms)
+    vectors = encode(terms)
+    # Bigger gaps weigh more in placing the centroids.
+    model = KMeans(n_clusters=clusters, n_init=10, random_state=0)
+    return model.fit_predict(vectors, sample_weight=np.asarray(gaps)).tolist()
+
+
+def find_corpus_gaps(site, competitors, path=None, top_n=25, clusters=6):
+    """
+    Terms the competitor domains cover that the site does not, from stored
+    statistics (see ingest_corpus).
+
+    Each domain's score for a term is its mean relative term frequency
+    times an IDF computed over all compared documents; the competitor
+    score is the average over competitor domains, so one big site does not
+    outweigh the others. Gaps are competitor minus site scores > 0.
+
+    Args:
+        site (str): Your domain.
+        competitors (list): Competitor domains.
+        path (str): Statistics database (CORPUS_GAP_DB).
+        top_n (int): Site-wide gaps to return.
+        clusters (int): Topic clusters the top CLUSTER_TERMS gaps are split into.
+
+    Returns:
+        dict: 'gaps' (site-wide: 'term', 'gap', 'competitor_score',
+        'site_score', 'coverage' (share of competitors using the term),
+        'site_documents'), 'clusters' (per topic: 'label', 'gap',
+        'site_coverage', 'terms'), 'domains' and 'stats'; or 'error'.
+    """
+    started = time.perf_counter()
+    domains = [load_domain(domain, path) for domain in [site, *competitors]]
+    missing = [name for name, domain in zip([site, *competitors], domains) if domain is None]
+    if missing:
+        return {"error": f"No term statistics for: {', '.join(missing)}"}
+    if not competitors:
+        return {"error": "No competitors given"}
+    if len({domain["n_features"] for domain in domains}) > 1:
+        return {"error": "Domains were ingested with different feature sizes"}
+    n_features = domains[0]["n_features"]
+
+    # Online IDF over the compared documents (sklearn's smoothed formula).
+    total_documents = sum(domain["documents"] for domain in domains)
+    df = np.zeros(n_features, dtype=np.int64)
+    for domain in domains:
+        df[domain["features"]] += domain["df"]
+    idf = np.log((1 + total_documents) / (1 + df)) + 1
+
+    def scores(domain):
+        values = np.zeros(n_features, dtype=np.float64)
+        values[domain["features"]] = domain["tf"] / max(domain["documents"], 1)
+        return values
+
+    site_stats, competitor_stats = domains[0], domains[1:]
+    site_scores = scores(site_stats) * idf
+    competitor_scores = np.zeros(n_features, dtype=np.float64)
+    coverage = np.zeros(n_features, dtype=np.int64)
+    for domain in competitor_stats:
+        competitor_scores += scores(domain)
+        coverage[domain["features"]] += 1
+    competitor_scores = competitor_scores * idf / len(competitor_stats)
+    site_df = np.zeros(n_features, dtype=np.int64)
+    site_df[site_stats["features"]] = site_stats["df"]
+
+    gap = competitor_scores - site_scores
+    candidates = np.flatnonzero(gap > 0)
+    ranked = candidates[top_indices(gap[candidates], max(top_n, CLUSTER_TERMS))]
+    ranked = ranked[np.argsort(-gap[ranked], kind="stable")][:max(top_n, CLUSTER_TERMS)]
+    names = term_names(ranked, path)
+
+    def row(feature):
+        return {
+            "term": names.get(int(feature), f"#{feature}"),
+            "gap": round(float(gap[feature]), 5),
+            "competitor_score": round(float(competitor_scores[feature]), 5),
+            "site_score": round(float(site_scores[feature]), 5),
+            "coverage": round(float(coverage[feature]) / len(competitor_stats), 2),
+            "site_documents": int(site_df[feature]),
+        }
+
+    rows = [row(feature) for feature in ranked]
+    topic_rows = []
+    if rows and clusters:
+        cluster_features = ranked[:CLUSTER_TERMS]
+        labels = cluster_terms([names.get(int(f), f"#{f}") for f in cluster_features], gap[cluster_features], clusters)
+        for label in sorted(set(labels)):
+            members = [i for i, value in enumerate(labels) if value == label]
+            features = cluster_features[members]
+            competitor_total = competitor_scores[features].sum()
+            topic_rows.append({
+                "label": ", ".join(rows[i]["term"] for i in members[:3]),
+                "gap": round(float(gap[features].sum()), 5),
+                "site_coverage": round(float(site_scores[features].sum() / competitor_total), 3)
+                if competitor_total else 0.0,
+                "terms": [rows[i] for i in members],
+            })
+        topic_rows.sort(key=lambda topic: topic["gap"], reverse=True)
+
+    stats = {
+        "documents": total_documents,
+        "candidate_terms": int(len(candidates)),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    logger.info(f"Corpus gaps of {site} vs {len(competitors)} competitors: {len(candidates)} gap terms")
+    return {
+        "gaps": rows[:top_n],
+        "clusters": topic_rows,
+        "domains": [{"domain": domain["domain"], "source": domain["source"], "documents": domain["documents"]}
+                    for domain in domains],
+        "stats": stats,
+    }
+
+
+def corpus_gap_analysis(site_source, competitor_sources, refresh=False, path=None, crawl_store_path=None,
+                        root=None, top_n=25, clusters=6):
+    """
+    Site-wide content gap analysis from crawls or directories of text.
+
+    Sources (see resolve_source) that already have stored statistics are
+    reused unless `refresh` is set; only new ones are streamed in.
+
+    Returns:
+        dict: find_corpus_gaps() output plus 'ingested' (the sources
+        processed this time), or 'error'.
+    """
+    try:
+        resolved = [resolve_source(spec, crawl_store_path, root) for spec in [site_source, *competitor_sources]]
+    except ValueError as e:
+        return {"error": str(e)}
+    if len(resolved) < 2:
+        return {"error": "No competitor sources given"}
+    known = {domain["domain"]: domain["source"] for domain in list_domains(path)}
+    ingested = []
+    for domain, source, documents in resolved:
+        if refresh or known.get(domain) != source:
+            ingested.append(ingest_corpus(domain, documents(), source=source, path=path))
+    result = find_corpus_gaps(resolved[0][0], [domain for domain, _, _ in resolved[1:]], path, top_n, clusters)
+    if "error" not in result:
+        result["ingested"] = ingested
+    return result
+
+
+if __name__ == "__main__":
+    logger=local_loggerSetup(use_filename=__file__)
+    parser = argparse.ArgumentParser(description="Site-wide content gap analysis")
+    parser.add_argument('--site', required=True, help='Your site: crawl:<crawl_id> or dir:<path>, optionally label=...')
+    parser.add_argument('--competitor', action='append', default=[], help='Competitor source (repeatable)')
+    parser.add_argument('--refresh', action='store_true', help='Re-read sources that already have statistics')
+    parser.add_argument('--top_n', type=int, default=25, help='Site-wide gaps to show')
+    parser.add_argument('--clusters', type=int, default=6, help='Topic clusters')
+    args = parser.parse_args()
+
+    result = corpus_gap_analysis(args.site, args.competitor, refresh=args.refresh, top_n=args.top_n,
+                                 clusters=args.clusters)
+    if "error" in result:
+        logger.error(result["error"])
+    else:
+        logger.info(f"Domains: {result['domains']}; stats: {result['stats']}")
+        for gap in result["gaps"]:
+            logger.info(f"{gap['term']:<24} gap {gap['gap']:.5f}  coverage {gap['coverage']:.0%}  "
+                        f"site pages {gap['site_documents']}")
+        for topic in result["clusters"]:
+            logger.info(f"[{topic['label']}] gap {topic['gap']:.5f}, site coverage {topic['site_coverage']:.0%}: "
+                        f"{', '.join(term['term'] for term in topic['terms'][:10])}")
@@ -0,0 +1,317 @@
+# File: functions_folder/crawl_coordinator.py
+
+import argparse
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from queue import Empty
+from urllib.parse import urlparse
+
+from functions_folder.crawl_engine import AsyncCrawler, HostLimiter, async_crawl_site, crawl_stats
+from functions_folder.crawl_store import CrawlStore
+from functions_folder.url_canonicalizer import canonicalize_url
+from functions_folder.APP_loggerSetup import app_loggerSetup
+from functions_folder.LOCAL_loggerSetup import local_loggerSetup
+
+logger = app_loggerSetup()
+
+# Stats that are summed over shards; the rest are recomputed by the coordinator.
+SUMMED_STATS = ("pages", "errors", "bytes_downloaded", "new", "changed", "unchanged",
+                "duplicates", "robots_blocked", "sitemap_urls")
+
+
+def shard_of(key, shards):
+    """Stable shard number for a URL or host; unlike hash() it is the same in every process."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % shards
+
+
+class ShardedHostLimiter(HostLimiter):
+    """
+    HostLimiter for one of `shards` processes crawling the same host: a
+    robots.txt Crawl-delay is stretched so that the shards together still
+    respect it.
+    """
+
+    def __init__(self, shards, max_per_host=4, delay=0.2):
+        super().__init__(max_per_host, delay)
+        self.shards = shards
+
+    def set_delay(self, host, delay):
+        super().set_delay(host, delay * self.shards)
+
+
+class ShardCrawler(AsyncCrawler):
+    """
+    One shard of a single-site crawl split across processes by URL hash.
+
+    Every shard records into the same crawl_id; a URL is only fetched by
+    the shard that owns it, and links owned by another shard are sent to
+    that shard's inbox. `outstanding` counts URLs queued anywhere but not
+    yet processed (plus one start-up token per shard), so all shards stop
+    together once it drops to zero. `pages` counts the pages recorded by
+    all shards, which share the max_pages budget.
+    """
+
+    def __init__(self, store, crawl_id, start_url, shard, shards, inboxes, outstanding, pages, **options):
+        super().__init__(store, crawl_id, start_url, **options)
+        self.shard = shard
+        self.shards = shards
+        self.inboxes = inboxes
+        self.outstanding = outstanding
+        self.pages = pages
+        self.limiter = ShardedHostLimiter(shards, self.limiter.max_per_host, self.limiter.delay)
+
+    def add_outstanding(self, delta):
+        with self.outstanding.get_lock():
+            self.outstanding.value += delta
+
+    def full(self):
+        return self.pages.value >= self.max_pages
+
+    def take_page(self):
+        with self.pages.get_lock():
+            if self.pages.value >= self.max_pages:
+                return False
+            self.pages.value += 1
+            return True
+
+    def owner(self, url):
+        # By canonical form, so every spelling of a page is deduplicated by the same shard
+        return shard_of(self.canonicalize(url) or url, self.shards)
+
+    def push(self, queue, url, depth):
+        self.add_outstanding(1)
+        owner = self.owner(url)
+        if owner == self.shard:
+            super().push(queue, url, depth)
+        else:
+            self.inboxes[owner].put((url, depth))
+
+    def task_done(self, queue, url):
+        super().task_done(queue, url)
+        self.add_outstanding(-1)
+
+    def load_state(self, queue):
+        fresh = self.owner(self.start_url) == self.shard
+        if fresh:
+            self.enqueue(queue, self.start_url, 0)
+        # Give back this shard's start-up token; the start URL now holds the count up.
+        self.add_outstanding(-1)
+        return fresh
+
+    async def seed_from_sitemaps(self, session, queue):
+        self.add_outstanding(1)
+        try:
+            await super().seed_from_sitemaps(session, queue)
+        finally:
+            self.add_outstanding(-1)
+
+    async def receive(self, queue):
+        """Moves URLs sent by other shards into the local queue."""
+        loop = asyncio.get_running_loop()
+        inbox = self.inboxes[self.shard]
+        while True:
+            try:
+                url, depth = await loop.run_in_executor(None, inbox.get, True, 0.2)
+            except Empty:
+                continue
+            if self.stopped() or not self.seen.add(self.canonicalize(url) or url):
+                self.add_outstanding(-1)
+                continue
+            super().push(queue, url, depth)
+
+    async def drain(self, queue):
+        receiver = asyncio.create_task(self.receive(queue))
+        try:
+            while self.outstanding.value > 0:
+                await asyncio.sleep(0.1)
+            await queue.join()
+        finally:
+            receiver.cancel()
+            await asyncio.gather(receiver, return_exceptions=True)
+
+
+# Set in each pool process by init_shard_worker().
+shard_inboxes = None
+shard_outstanding = None
+shard_pages = None
+
+
+def init_shard_worker(inboxes, outstanding, pages):
+    global shard_inboxes, shard_outstanding, shard_pages
+    shard_inboxes = inboxes
+    shard_outstanding = outstanding
+    shard_pages = pages
+
+
+def run_shard(crawl_id, start_url, shard, shards, store_path, options):
+    store = CrawlStore(store_path, autocommit=True)
+    try:
+        crawler = ShardCrawler(store, crawl_id, start_url, shard, shards, shard_inboxes, shard_outstanding,
+                               shard_pages, **options)
+        return asyncio.run(crawler.run())
+    finally:
+        store.close()
+
+
+def crawl_site_sharded(start_url, processes=None, max_pages=50, store_path=None, **options):
+    """
+    Crawls one large site with `processes` worker processes, each owning
+    the URLs whose hash falls in its shard and running its own async
+    fetcher and parser. The shards share one max_pages budget.
+
+    Every shard keeps its own per-host limits, so the site sees up to
+    `processes` times the request rate of a single-process crawl; only a
+    robots.txt Crawl-delay is divided between the shards.
+
+    Returns:
+        dict: 'crawl_id' and merged 'stats' of the crawl, like crawl_site.
+    """
+    processes = processes or os.cpu_count() or 1
+    store = CrawlStore(store_path)
+    params = dict(options, max_pages=max_pages, shards=processes)
+    crawl_id = store.create_crawl(start_url, params)
+    store.close()
+
+    options = dict(options, max_pages=max_pages)
+    # Crawls are started from web request threads, which must not be forked
+    context = multiprocessing.get_context("forkserver")
+    inboxes = [context.Queue() for _ in range(processes)]
+    outstanding = context.Value("i", processes)
+    pages = context.Value("i", 0)
+    started = time.perf_counter()
+    # Every shard must run at the same time, so the pool has exactly one process per shard.
+    with ProcessPoolExecutor(processes, mp_context=context, initializer=init_shard_worker,
+                             initargs=(inboxes, outstanding, pages)) as pool:
+        futures = [pool.submit(run_shard, crawl_id, start_url, shard, processes, store_path, options)
+                   for shard in range(processes)]
+        shard_stats = [future.result() for future in futures]
+
+    stats = merge_stats(shard_stats, time.perf_counter() - started)
+    stats["shards"] = processes
+    store = CrawlStore(store_path)
+    try:
+        stats["total_pages"] = store.page_count(crawl_id)
+        store.finish_crawl(crawl_id, stats)
+    finally:
+        store.close()
+    logger.info(f"Crawled {stats['pages']} pages of {start_url} with {processes} processes in "
+                f"{stats['elapsed']}s ({stats['pages_per_second']} pages/s)")
+    return {"crawl_id": crawl_id, "stats": stats}
+
+
+def crawl_host(start_url, store_path, options):
+    result = async_crawl_site(start_url, store_path=store_path, autocommit=True, **options)
+    if "error" in result:
+        return {"start_url": start_url, "error": result["error"]}
+    return {"start_url": start_url, "crawl_id": result["crawl_id"], "stats": result["stats"],
+            "diff": result["diff"]}
+
+
+def group_by_host(start_urls):
+    """One start URL per host; later URLs for an already-listed host are dropped."""
+    hosts = {}
+    for url in start_urls:
+        canonical = canonicalize_url(url)
+        if canonical is None:
+            logger.info(f"Skipping invalid start URL: {url}")
+            continue
+        host = urlparse(canonical).netloc
+        if host in hosts:
+            logger.info(f"Skipping {url}: {hosts[host]} is already crawled for {host}")
+            continue
+        hosts[host] = url
+    return hosts
+
+
+def crawl_hosts(start_urls, processes=None, store_path=None, **options):
+    """
+    Crawls many sites in parallel, one process-pool task per host. Each
+    task runs a normal async crawl and writes to the shared crawl store.
+
+    Returns:
+        dict: 'crawls', one entry per host with 'start_url' and either
+        'crawl_id', 'stats' and 'diff' or 'error'; and merged 'stats'.
+    """
+    hosts = group_by_host(start_urls)
+    if not hosts:
+        return {"error": "No valid start URLs"}
+    processes = min(processes or os.cpu_count() or 1, len(hosts))
+    CrawlStore(store_path).close()  # create the schema before the workers race for it
+
+    crawls = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("forkserver")) as pool:
+        futures = {pool.submit(crawl_host, url, store_path, options): url for url in hosts.values()}
+        for future in as_completed(futures):
+            try:
+                crawl = future.result()
+            except Exception as e:
+                crawl = {"start_url": futures[future], "error": str(e)}
+            if "error" in crawl:
+                logger.error(f"Crawl of {crawl['start_url']} failed: {crawl['error']}")
+            else:
+                logger.info(f"Crawled {crawl['start_url']}: {crawl['stats']['pages']} pages")
+            crawls.append(crawl)
+
+    stats = merge_stats([crawl["stats"] for crawl in crawls if "stats" in crawl], time.perf_counter() - started)
+    stats["hosts"] = len(hosts)
+    stats["processes"] = processes
+    logger.info(f"Crawled {stats['pages']} pages on {len(hosts)} hosts with {processes} processes in "
+                f"{stats['elapsed']}s ({stats['pages_per_second']} pages/s)")
+    return {"crawls": crawls, "stats": stats}
+
+
+def merge_stats(shard_stats, elapsed):
+    totals = {key: sum(stats.get(key) or 0 for stats in shard_stats) for key in SUMMED_STATS}
+    depths = [stats["max_depth_reached"] for stats in shard_stats if stats.get("max_depth_reached") is not None]
+    stats = crawl_stats(totals.pop("pages"), totals.pop("errors"), elapsed, max(depths) if depths else None)
+    stats.update(totals)
+    return stats
+
+
+def coordinated_crawl(start_urls, processes=None, **options):
+    """
+    Splits a crawl across a process pool: a single start URL is sharded
+    by URL hash (crawl_site_sharded), several are split by host
+    (crawl_hosts). `options` are the async crawl options of crawl_site.
+    """
+    if len(start_urls) == 1:
+        return crawl_site_sharded(start_urls[0], processes=processes, **options)
+    return crawl_hosts(start_urls, processes=processes, **options)
+
+
+if __name__ == "__main__":
+    logger=local_loggerSetup(use_filename=__file__)
+    parser = argparse.ArgumentParser(description="Multi-process crawl coordinator")
+    parser.add_argument('--url', action='append', default=[], help='Start URL (repeatable)')
+    parser.add_argument('--url_file', default=None, help='File with one start URL per line')
+    parser.add_argument('--processes', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--max_pages', type=int, default=50, help='Maximum pages per site')
+    parser.add_argument('--max_depth', type=int, default=None, help='Maximum link depth')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent fetchers per process')
+    parser.add_argument('--delay', type=float, default=0.2, help='Seconds between requests to one host')
+    parser.add_argument('--full', dest='incremental', action='store_false', help='Re-download every page')
+    args = parser.parse_args()
+
+    start_urls = list(args.url)
+    if args.url_file:
+        with open(args.url_file, encoding="utf-8") as f:
+            start_urls.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+    if not start_urls:
+        parser.error("give at least one --url or a --url_file")
+
+    result = coordinated_crawl(start_urls, processes=args.processes, max_pages=args.max_pages,
+                               max_depth=args.max_depth, concurrency=args.concurrency, delay=args.delay,
+                               incremental=args.incremental)
+    if "error" in result:
+        logger.error(result["error"])
+    else:
+        for crawl in result.get("crawls", []):
+            logger.info(f"{crawl['start_url']}: {crawl.get('crawl_id') or crawl.get('error')}")
+        stats = result["stats"]
+        logger.info(f"✅ {stats['pages']} pages in {stats['elapsed']}s — {stats['pages_per_second']} pages/s")
@@ -0,0 +1,429 @@
+# File: functions_folder/crawl_engine.py
+
+import asyncio
+import hashlib
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+import aiohttp
+
+from functions_folder.crawl_store import CrawlStore, iter_pages
+from functions_folder.html_document import HTMLDocument
+from functions_folder.robots_sitemap import USER_AGENT, discover_sitemaps, iter_sitemap_urls, robots_cache
+from functions_folder.url_canonicalizer import BloomFilter, canonicalize_url, DEFAULT_TRACKING_PARAMS, link_target
+from functions_folder.APP_loggerSetup import app_loggerSetup
+
+logger = app_loggerSetup()
+
+
+class HostLimiter:
+    """
+    Per-host politeness: caps concurrent requests to a host and spaces
+    request starts at least `delay` seconds apart. A host's robots.txt
+    Crawl-delay can raise its own spacing through set_delay().
+    """
+
+    def __init__(self, max_per_host=4, delay=0.2):
+        self.max_per_host = max_per_host
+        self.delay = delay
+        self._delays = {}
+        self._semaphores = {}
+        self._locks = {}
+        self._next_slot = {}
+
+    def set_delay(self, host, delay):
+        self._delays[host] = max(self.delay, delay)
+
+    async def acquire(self, host):
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        await semaphore.acquire()
+
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self._delays.get(host, self.delay)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def release(self, host):
+        self._semaphores[host].release()
+
+
+def extract_links(html, base_url):
+    """Returns the page's absolute anchor URLs and its <link rel=canonical> target (or None)."""
+    document = HTMLDocument(html, url=base_url)
+    return document.links, document.canonical
+
+
+class AsyncCrawler:
+    """
+    Breadth-first crawler: a FIFO frontier drained by a bounded pool of
+    aiohttp workers, with per-host limits applied through HostLimiter.
+    Frontier, visited set and page bodies live in a CrawlStore and are
+    checkpointed every `checkpoint_every` pages, so a crawl can resume.
+
+    With `incremental` set, pages seen by an earlier crawl are requested
+    conditionally (If-None-Match / If-Modified-Since). A 304 or a body
+    whose hash has not changed is recorded as 'unchanged' and its stored
+    links are reused, so it is neither stored again nor re-parsed.
+
+    Links are requested as written (link_target) but deduplicated in
+    canonical form, so two spellings of one page are fetched once; pages
+    are stored under the URL they were served from, which is also the
+    base their relative links resolve against. A page that redirects or
+    declares a <link rel=canonical> to an already-seen URL is counted as
+    a duplicate rather than a new page. The visited set is a Bloom filter
+    sized by `visited_capacity`, so its memory is fixed up front.
+
+    With `respect_robots` set, each host's robots.txt (cached per host by
+    RobotsCache) is checked before a URL is fetched, and its Crawl-delay
+    widens that host's request spacing. With `use_sitemaps` set, a fresh
+    crawl also seeds the frontier with up to `max_sitemap_urls` URLs
+    streamed from the site's sitemaps while the workers are running.
+
+    `on_page` is called with a small event dict (url, status, size,
+    fetch_ms, depth, change) for every processed URL as soon as it is
+    done; setting `stop_event` makes the workers drain the frontier.
+    """
+
+    def __init__(self, store, crawl_id, start_url, max_pages=50, max_depth=None, concurrency=8,
+                 per_host_concurrency=4, delay=0.2, timeout=10, incremental=True, tracking_params=None,
+                 ignore_path_case=False, visited_capacity=1_000_000, checkpoint_every=25,
+                 respect_robots=True, use_sitemaps=True, max_sitemap_urls=None,
+                 on_page=None, stop_event=None):
+        self.store = store
+        self.crawl_id = crawl_id
+        self.on_page = on_page
+        self.stop_event = stop_event
+        self.tracking_params = tuple(tracking_params) if tracking_params is not None else DEFAULT_TRACKING_PARAMS
+        self.ignore_path_case = ignore_path_case
+        self.start_url = link_target(start_url) or start_url
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.incremental = incremental
+        self.checkpoint_every = checkpoint_every
+        self.respect_robots = respect_robots
+        self.use_sitemaps = use_sitemaps
+        self.max_sitemap_urls = max_sitemap_urls if max_sitemap_urls is not None else max_pages
+        self.limiter = HostLimiter(per_host_concurrency, delay)
+        self.netloc = urlparse(self.canonicalize(start_url) or start_url).netloc
+
+        self.seen = BloomFilter(visited_capacity)
+        self.duplicates = 0
+        self.robots_blocked = 0
+        self.sitemap_urls = 0
+        self.page_total = 0
+        self.fetched = 0
+        self.processed = 0
+        self.bytes_downloaded = 0
+        self.changes = Counter()
+        self.errors = 0
+        self.depth_reached = 0
+
+    def is_internal(self, link):
+        return urlparse(link).netloc == self.netloc
+
+    def canonicalize(self, url):
+        return canonicalize_url(url, tracking_params=self.tracking_params, ignore_path_case=self.ignore_path_case)
+
+    def enqueue(self, queue, url, depth):
+        canonical = self.canonicalize(url)
+        if canonical is None or not self.is_internal(canonical):
+            return
+        if self.max_depth is not None and depth > self.max_depth:
+            return
+        if not self.seen.add(canonical):
+            return
+        self.push(queue, link_target(url), depth)
+
+    def push(self, queue, url, depth):
+        """Adds a new, admitted URL (as it is to be requested) to the frontier."""
+        self.store.add_frontier(self.crawl_id, url, depth)
+        queue.put_nowait((url, depth))
+
+    def claim(self, url, page_url, depth):
+        """
+        Marks `page_url`, which a fetch of `url` turned out to be (after a
+        redirect or by its rel=canonical), as seen. Returns False if it had
+        already been seen, i.e. the page is a duplicate.
+        """
+        canonical = self.canonicalize(page_url)
+        if canonical is None or canonical == self.canonicalize(url) or not self.is_internal(canonical):
+            return True
+        if not self.seen.add(canonical):
+            self.duplicates += 1
+            return False
+        self.store.add_frontier(self.crawl_id, page_url, depth)
+        self.store.mark_done(self.crawl_id, page_url)
+        return True
+
+    def resolve_canonical(self, url, page_url, canonical, depth):
+        """
+        Returns the URL a page fetched from `url` and served from `page_url`
+        should be recorded under, or None if it has already been seen (a duplicate).
+        """
+        if not self.claim(url, page_url, depth):
+            return None
+        canonical = link_target(canonical) if canonical else None
+        if canonical is None or not self.is_internal(self.canonicalize(canonical)) or \
+                self.canonicalize(canonical) == self.canonicalize(page_url):
+            return page_url
+        return canonical if self.claim(page_url, canonical, depth) else None
+
+    async def fetch(self, session, url, validators=None):
+        headers = {}
+        if validators:
+            if validators["etag"]:
+                headers["If-None-Match"] = validators["etag"]
+            if validators["last_modified"]:
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        host = urlparse(url).netloc
+        await self.limiter.acquire(host)
+        started = time.perf_counter()
+        try:
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                html, content_type = None, ''
+                if response.status == 200:
+                    content_type = response.headers.get('Content-Type', '')
+                    body = await response.read()
+                    self.bytes_downloaded += len(body)
+                    html = body.decode(response.charset or 'utf-8', errors='replace')
+                return (response.status, html, content_type, response.headers, time.perf_counter() - started,
+                        str(response.url))
+        finally:
+            self.limiter.release(host)
+
+    def full(self):
+        return self.page_total >= self.max_pages
+
+    def take_page(self):
+        """Claims one page of the max_pages budget for a page about to be recorded."""
+        return not self.full()
+
+    def record(self, url, depth, status, html, content_type, change):
+        self.store.save_page(self.crawl_id, url, status, depth, content_type, html, change)
+        self.page_total += 1
+        self.fetched += 1
+        self.changes[change] += 1
+        self.depth_reached = max(self.depth_reached, depth)
+
+    async def process(self, session, queue, url, depth):
+        """Fetches one frontier URL; returns the page event to report, or None if nothing was recorded."""
+        loop = asyncio.get_running_loop()
+        if self.respect_robots:
+            rules = await robots_cache.rules_for(session, url)
+            if not rules.can_fetch(url):
+                self.robots_blocked += 1
+                return {"url": url, "status": None, "depth": depth, "size": 0, "fetch_ms": None,
+                        "change": None, "error": "Disallowed by robots.txt"}
+            crawl_delay = rules.crawl_delay()
+            if crawl_delay:
+                self.limiter.set_delay(urlparse(url).netloc, crawl_delay)
+        validators = self.store.get_validators(url) if self.incremental else None
+        status, html, content_type, headers, elapsed, response_url = await self.fetch(session, url, validators)
+        event = {"url": url, "status": status, "depth": depth, "size": len(html) if html is not None else 0,
+                 "fetch_ms": round(elapsed * 1000)}
+
+        if status == 304 and validators:
+            # Not modified: reuse the stored links instead of downloading and parsing.
+            page_url = self.resolve_canonical(url, response_url, validators["canonical"], depth)
+            if page_url is None or not self.take_page():
+                return None
+            self.record(page_url, depth, status, None, None, "unchanged")
+            for link in validators["links"]:
+                self.enqueue(queue, link, depth + 1)
+            return dict(event, url=page_url, change="unchanged")
+        if html is None:
+            return dict(event, change=None)
+        if self.full():
+            return None
+
+        content_hash = hashlib.sha1(html.encode('utf-8')).hexdigest()
+        if validators and validators["content_hash"] == content_hash:
+            change, links, canonical = "unchanged", validators["links"], validators["canonical"]
+            page_url = self.resolve_canonical(url, response_url, canonical, depth)
+            if page_url is None or not self.take_page():
+                return None
+            self.record(page_url, depth, status, None, content_type, change)
+        else:
+            change = "changed" if validators else "new"
+            links, canonical = [], None
+            if 'html' in content_type:
+                links, canonical = await loop.run_in_executor(None, extract_links, html, response_url)
+            if self.full():
+                return None
+            page_url = self.resolve_canonical(url, response_url, canonical, depth)
+            if page_url is None or not self.take_page():
+                return None
+            self.record(page_url, depth, status, html, content_type, change)
+        self.store.save_validators(url, headers.get('ETag'), headers.get('Last-Modified'),
+                                   content_hash, links, canonical)
+        for link in links:
+            self.enqueue(queue, link, depth + 1)
+        return dict(event, url=page_url, change=change)
+
+    def stopped(self):
+        return self.full() or (self.stop_event is not None and self.stop_event.is_set())
+
+    async def worker(self, session, queue):
+        while True:
+            url, depth = await queue.get()
+            processed = False
+            try:
+                if self.stopped():
+                    continue
+                processed = True
+                event = await self.process(session, queue, url, depth)
+                if event and self.on_page:
+                    self.on_page(event)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Error crawling {url}: {e}")
+                if self.on_page:
+                    self.on_page({"url": url, "status": None, "depth": depth, "size": 0,
+                                  "fetch_ms": None, "change": None, "error": str(e)})
+            finally:
+                if processed:
+                    self.store.mark_done(self.crawl_id, url)
+                    self.processed += 1
+                    if self.processed % self.checkpoint_every == 0:
+                        self.store.checkpoint()
+                self.task_done(queue, url)
+
+    def task_done(self, queue, url):
+        queue.task_done()
+
+    async def drain(self, queue):
+        """Waits until there is nothing left to crawl."""
+        await queue.join()
+
+    async def seed_from_sitemaps(self, session, queue):
+        """Queues the URLs listed in the site's sitemaps at depth 1."""
+        try:
+            rules = await robots_cache.rules_for(session, self.start_url)
+            for sitemap_url in await discover_sitemaps(session, self.start_url, rules):
+                async for url in iter_sitemap_urls(session, sitemap_url, self.max_sitemap_urls - self.sitemap_urls):
+                    self.sitemap_urls += 1
+                    self.enqueue(queue, url, 1)
+                    if self.sitemap_urls >= self.max_sitemap_urls or self.stopped():
+                        return
+        except Exception as e:
+            logger.error(f"Could not seed {self.start_url} from sitemaps: {e}")
+        finally:
+            self.store.checkpoint()
+            logger.info(f"Seeded {self.sitemap_urls} URLs from sitemaps of {self.netloc}")
+
+    def load_state(self, queue):
+        """Loads the stored frontier; returns True for a fresh crawl."""
+        seen, pending = self.store.load_frontier(self.crawl_id)
+        self.page_total = self.store.page_count(self.crawl_id)
+        if not seen:
+            self.enqueue(queue, self.start_url, 0)
+            self.store.checkpoint()
+            return True
+        for url in seen:
+            self.seen.add(self.canonicalize(url) or url)
+        for url, depth in pending:
+            queue.put_nowait((url, depth))
+        logger.info(f"Resuming crawl {self.crawl_id}: {self.page_total} pages stored, {len(pending)} queued")
+        return False
+
+    async def run(self):
+        queue = asyncio.Queue()
+        fresh = self.load_state(queue)
+        started = time.perf_counter()
+
+        async with aiohttp.ClientSession(headers={"User-Agent": USER_AGENT}) as session:
+            workers = [asyncio.create_task(self.worker(session, queue)) for _ in range(self.concurrency)]
+            if fresh and self.use_sitemaps and self.max_sitemap_urls > 0:
+                # The sitemap is streamed while the start page is already being crawled.
+                await self.seed_from_sitemaps(session, queue)
+            await self.drain(queue)
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        self.store.checkpoint()
+        stats = crawl_stats(self.fetched, self.errors, time.perf_counter() - started, self.depth_reached)
+        stats["total_pages"] = self.page_total
+        stats["bytes_downloaded"] = self.bytes_downloaded
+        stats["new"] = self.changes["new"]
+        stats["changed"] = self.changes["changed"]
+        stats["unchanged"] = self.changes["unchanged"]
+        stats["duplicates"] = self.duplicates
+        stats["robots_blocked"] = self.robots_blocked
+        stats["sitemap_urls"] = self.sitemap_urls
+        stats["visited_set_bytes"] = self.seen.size_bytes
+        return stats
+
+
+def crawl_stats(pages, errors, elapsed, depth_reached=None):
+    return {
+        "pages": pages,
+        "errors": errors,
+        "elapsed": round(elapsed, 2),
+        "pages_per_second": round(pages / elapsed, 2) if elapsed > 0 else 0.0,
+        "max_depth_reached": depth_reached
+    }
+
+
+def async_crawl_site(start_url, max_pages=50, max_depth=None, concurrency=8, per_host_concurrency=4,
+                     delay=0.2, timeout=10, incremental=True, tracking_params=None, ignore_path_case=False,
+                     visited_capacity=1_000_000, respect_robots=True, use_sitemaps=True, max_sitemap_urls=None,
+                     resume=None, store_path=None, autocommit=False, on_start=None, on_page=None, stop_event=None):
+    """
+    Runs an AsyncCrawler against a CrawlStore. Pass `resume` with a
+    crawl_id to continue an interrupted or stopped crawl with its
+    original settings (only async crawls can be resumed). `on_start` receives the crawl_id before the first
+    fetch; `on_page` and `stop_event` are handed to the AsyncCrawler.
+    Set `autocommit` when other processes write to the same store.
+
+    Returns:
+        dict: 'crawl_id', 'stats', 'diff' against the previous crawl of the
+        same host, and 'pages', a lazy iterator over the stored pages.
+    """
+    store = CrawlStore(store_path, autocommit=autocommit)
+    try:
+        if resume:
+            crawl = store.get_crawl(resume)
+            if crawl is None:
+                return {"error": f"Unknown crawl id: {resume}"}
+            if "engine" in crawl["params"]:  # legacy crawls keep no frontier to continue from
+                return {"error": f"Crawl {resume} was made by the {crawl['params']['engine']} engine "
+                                 f"and cannot be resumed"}
+            if "shards" in crawl["params"]:  # each shard's frontier belongs to its own worker process
+                return {"error": f"Crawl {resume} was split into {crawl['params']['shards']} shards "
+                                 f"and cannot be resumed"}
+            crawl_id = resume
+            start_url = crawl["start_url"]
+            params = crawl["params"]
+        else:
+            params = {
+                "max_pages": max_pages, "max_depth": max_depth, "concurrency": concurrency,
+                "per_host_concurrency": per_host_concurrency, "delay": delay, "timeout": timeout,
+                "incremental": incremental, "ignore_path_case": ignore_path_case,
+                "tracking_params": list(tracking_params) if tracking_params is not None else None,
+                "visited_capacity": visited_capacity, "respect_robots": respect_robots,
+                "use_sitemaps": use_sitemaps, "max_sitemap_urls": max_sitemap_urls
+            }
+            crawl_id = store.create_crawl(start_url, params)
+
+        if on_start:
+            on_start(crawl_id)
+        crawler = AsyncCrawler(store, crawl_id, start_url, on_page=on_page, stop_event=stop_event, **params)
+        stats = asyncio.run(crawler.run())
+        stopped = stop_event is not None and stop_event.is_set()
+        store.finish_crawl(crawl_id, stats, status="stopped" if stopped else "finished")
+        diff = store.crawl_diff(crawl_id)
+    finally:
+        store.close()
+
+    logger.info(f"Crawled {stats['pages']} pages in {stats['elapsed']}s ({stats['pages_per_second']} pages/s), "
+                f"{len(diff['added'])} added, {len(diff['changed'])} changed, {len(diff['removed'])} removed, "
+                f"{diff['unchanged']} unchanged")
+    return {"crawl_id": crawl_id, "stats": stats, "diff": diff, "pages": iter_pages(crawl_id, store.path)}
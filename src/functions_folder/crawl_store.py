@@ -0,0 +1,295 @@
+# File: functions_folder/crawl_store.py
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+import zlib
+from urllib.parse import urlparse
+
+from functions_folder.APP_loggerSetup import app_loggerSetup
+
+logger = app_loggerSetup()
+
+DEFAULT_STORE_PATH = "crawl_data/crawl_store.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawls (
+    crawl_id TEXT PRIMARY KEY,
+    start_url TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stats TEXT,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS frontier (
+    crawl_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    PRIMARY KEY (crawl_id, url)
+);
+CREATE INDEX IF NOT EXISTS frontier_state ON frontier (crawl_id, state, depth);
+CREATE TABLE IF NOT EXISTS pages (
+    crawl_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER,
+    depth INTEGER,
+    content_type TEXT,
+    size INTEGER,
+    body BLOB,
+    fetched_at REAL NOT NULL,
+    change TEXT,
+    PRIMARY KEY (crawl_id, url)
+);
+CREATE INDEX IF NOT EXISTS pages_url ON pages (url, fetched_at);
+CREATE TABLE IF NOT EXISTS validators (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    links BLOB,
+    canonical TEXT,
+    checked_at REAL NOT NULL
+);
+"""
+
+# Columns added after the first release of the store, created on old databases.
+MIGRATIONS = {
+    "pages": [("change", "TEXT")],
+    "validators": [("canonical", "TEXT")],
+}
+
+
+def store_path(path=None):
+    return path or os.getenv("CRAWL_STORE_PATH", DEFAULT_STORE_PATH)
+
+
+def connect(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def migrate(conn):
+    for table, columns in MIGRATIONS.items():
+        existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, decl in columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
+class CrawlStore:
+    """
+    SQLite-backed crawl state: one row per crawl, a frontier table whose
+    'pending' rows are the queue and 'done' rows the visited set, and
+    zlib-compressed page bodies. Writes are grouped and committed by
+    checkpoint(), so a crash loses at most the work since the last one.
+
+    The validators table outlives individual crawls: it keeps the ETag,
+    Last-Modified, content hash and outgoing links of every URL so a
+    recrawl can revalidate pages instead of downloading them again.
+
+    With `autocommit` every write is committed on its own instead, so
+    that several crawler processes can share one store without holding
+    its write lock between checkpoints.
+    """
+
+    def __init__(self, path=None, autocommit=False):
+        self.path = store_path(path)
+        self.conn = connect(self.path)
+        if autocommit:
+            self.conn.isolation_level = None
+        self.conn.executescript(SCHEMA)
+        migrate(self.conn)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def create_crawl(self, start_url, params):
+        crawl_id = uuid.uuid4().hex
+        self.conn.execute(
+            "INSERT INTO crawls (crawl_id, start_url, params, status, created_at) VALUES (?, ?, ?, 'running', ?)",
+            (crawl_id, start_url, json.dumps(params), time.time())
+        )
+        self.conn.commit()
+        return crawl_id
+
+    def get_crawl(self, crawl_id):
+        row = self.conn.execute("SELECT * FROM crawls WHERE crawl_id = ?", (crawl_id,)).fetchone()
+        if row is None:
+            return None
+        crawl = dict(row)
+        crawl["params"] = json.loads(crawl["params"])
+        crawl["stats"] = json.loads(crawl["stats"]) if crawl["stats"] else None
+        return crawl
+
+    def add_frontier(self, crawl_id, url, depth):
+        self.conn.execute(
+            "INSERT OR IGNORE INTO frontier (crawl_id, url, depth) VALUES (?, ?, ?)",
+            (crawl_id, url, depth)
+        )
+
+    def mark_done(self, crawl_id, url):
+        self.conn.execute(
+            "UPDATE frontier SET state = 'done' WHERE crawl_id = ? AND url = ?",
+            (crawl_id, url)
+        )
+
+    def load_frontier(self, crawl_id):
+        """Returns (seen URLs, pending (url, depth) rows in breadth-first order)."""
+        seen = [row["url"] for row in self.conn.execute(
+            "SELECT url FROM frontier WHERE crawl_id = ?", (crawl_id,))]
+        pending = [(row["url"], row["depth"]) for row in self.conn.execute(
+            "SELECT url, depth FROM frontier WHERE crawl_id = ? AND state = 'pending' ORDER BY depth",
+            (crawl_id,))]
+        return seen, pending
+
+    def save_page(self, crawl_id, url, status, depth, content_type, html, change=None):
+        body = zlib.compress(html.encode("utf-8")) if html is not None else None
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages (crawl_id, url, status, depth, content_type, size, body, fetched_at, change) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (crawl_id, url, status, depth, content_type, len(html) if html is not None else 0, body, time.time(), change)
+        )
+
+    def get_validators(self, url):
+        row = self.conn.execute("SELECT * FROM validators WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        validators = dict(row)
+        validators["links"] = json.loads(zlib.decompress(row["links"])) if row["links"] else []
+        return validators
+
+    def save_validators(self, url, etag, last_modified, content_hash, links, canonical=None):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO validators (url, etag, last_modified, content_hash, links, canonical, checked_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, etag, last_modified, content_hash, zlib.compress(json.dumps(links).encode("utf-8")),
+             canonical, time.time())
+        )
+
+    def page_change(self, previous_crawl_id, url, html):
+        """
+        'new', 'changed' or 'unchanged': how `html` compares with the page
+        `url` stored by the previous crawl (for crawls made without validators).
+        """
+        if previous_crawl_id is None:
+            return "new"
+        row = self.conn.execute("SELECT body, change FROM pages WHERE crawl_id = ? AND url = ?",
+                                (previous_crawl_id, url)).fetchone()
+        if row is None:
+            return "new"
+        body = row["body"]
+        if body is None and row["change"] == "unchanged":
+            latest = self.conn.execute(
+                "SELECT body FROM pages WHERE url = ? AND body IS NOT NULL ORDER BY fetched_at DESC LIMIT 1",
+                (url,)).fetchone()
+            body = latest["body"] if latest else None
+        if body is not None and zlib.decompress(body).decode("utf-8") == html:
+            return "unchanged"
+        return "changed"
+
+    def previous_crawl(self, crawl_id):
+        """Latest finished crawl of the same host started before `crawl_id`."""
+        current = self.get_crawl(crawl_id)
+        netloc = urlparse(current["start_url"]).netloc
+        rows = self.conn.execute(
+            "SELECT crawl_id, start_url FROM crawls WHERE status = 'finished' AND created_at < ? "
+            "ORDER BY created_at DESC", (current["created_at"],))
+        for row in rows:
+            if urlparse(row["start_url"]).netloc == netloc:
+                return row["crawl_id"]
+        return None
+
+    def crawl_diff(self, crawl_id):
+        """
+        Compares a crawl with the previous crawl of the same host.
+
+        Returns:
+            dict: 'added', 'changed' and 'removed' URL lists, 'unchanged'
+            count and the 'previous_crawl_id' used as the baseline.
+        """
+        added, changed = [], []
+        unchanged = 0
+        for row in self.conn.execute("SELECT url, change FROM pages WHERE crawl_id = ?", (crawl_id,)):
+            if row["change"] == "unchanged":
+                unchanged += 1
+            elif row["change"] == "changed":
+                changed.append(row["url"])
+            else:
+                added.append(row["url"])
+
+        previous = self.previous_crawl(crawl_id)
+        removed = []
+        if previous:
+            removed = [row["url"] for row in self.conn.execute(
+                "SELECT url FROM pages WHERE crawl_id = ? AND url NOT IN "
+                "(SELECT url FROM pages WHERE crawl_id = ?)", (previous, crawl_id))]
+
+        return {
+            "previous_crawl_id": previous,
+            "added": added,
+            "changed": changed,
+            "removed": removed,
+            "unchanged": unchanged
+        }
+
+    def page_count(self, crawl_id):
+        return self.conn.execute("SELECT COUNT(*) FROM pages WHERE crawl_id = ?", (crawl_id,)).fetchone()[0]
+
+    def checkpoint(self):
+        self.conn.commit()
+
+    def finish_crawl(self, crawl_id, stats, status="finished"):
+        self.conn.execute(
+            "UPDATE crawls SET status = ?, stats = ?, finished_at = ? WHERE crawl_id = ?",
+            (status, json.dumps(stats), time.time(), crawl_id)
+        )
+        self.conn.commit()
+
+    def iter_pages(self, crawl_id, changed_only=False):
+        return iter_pages(crawl_id, self.path, changed_only)
+
+
+def iter_pages(crawl_id, path=None, changed_only=False):
+    """
+    Lazily yields stored pages of a crawl, decompressing one body at a
+    time. Uses its own connection so it can be consumed after the crawl
+    (or from another thread) without holding every page in memory.
+
+    Unchanged pages of an incremental recrawl have no body of their own;
+    with changed_only=True they are skipped, otherwise their latest
+    stored body is loaded from an earlier crawl.
+    """
+    conn = connect(store_path(path))
+    try:
+        query = ("SELECT url, status, depth, content_type, size, body, fetched_at, change FROM pages "
+                 "WHERE crawl_id = ?")
+        if changed_only:
+            query += " AND (change IS NULL OR change != 'unchanged')"
+        rows = conn.execute(query + " ORDER BY fetched_at", (crawl_id,))
+        for row in rows:
+            page = dict(row)
+            body = page.pop("body")
+            if body is None and page["change"] == "unchanged":
+                previous = conn.execute(
+                    "SELECT body FROM pages WHERE url = ? AND body IS NOT NULL ORDER BY fetched_at DESC LIMIT 1",
+                    (page["url"],)).fetchone()
+                body = previous["body"] if previous else None
+                page["html"] = zlib.decompress(body).decode("utf-8") if body is not None else ""
+                page["size"] = len(page["html"])
+            else:
+                page["html"] = zlib.decompress(body).decode("utf-8") if body is not None else ""
+            yield page
+    finally:
+        conn.close()
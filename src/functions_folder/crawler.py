@@ -1,10 +1,32 @@
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 import requests
+import argparse
+import queue
+import threading
+import time
 
-def crawl_site(start_url, max_pages=50, delay=1.0):
+from functions_folder.crawl_engine import async_crawl_site, crawl_stats
+from functions_folder.crawl_store import CrawlStore, iter_pages
+from functions_folder.html_document import HTMLDocument
+from functions_folder.url_canonicalizer import parse_tracking_params
+from functions_folder.APP_loggerSetup import app_loggerSetup
+from functions_folder.LOCAL_loggerSetup import local_loggerSetup
+
+logger = app_loggerSetup()
+
+ENGINES = ("async", "legacy")
+
+def legacy_crawl_site(start_url, max_pages=50, delay=1.0):
+    """
+    Recursive, sequential crawl of the pages on start_url's host; waits
+    `delay` seconds between two requests.
+
+    Returns:
+        dict: url -> HTML of every page fetched with status 200.
+    """
     visited = set()
     index = {}
+    last_request = [None]
 
     def is_internal(link):
         return urlparse(link).netloc == urlparse(start_url).netloc
@@ -13,17 +35,186 @@ def crawl_site(start_url, max_pages=50, delay=1.0):
         if len(visited) >= max_pages or url in visited:
             return
         try:
+            if last_request[0] is not None:
+                time.sleep(max(0.0, last_request[0] + delay - time.monotonic()))
+            last_request[0] = time.monotonic()
             response = requests.get(url, timeout=10)
             if response.status_code == 200:
                 visited.add(url)
                 index[url] = response.text
-                soup = BeautifulSoup(response.text, 'html.parser')
-                for a_tag in soup.find_all('a', href=True):
-                    next_url = urljoin(url, a_tag['href'])
+                for next_url in HTMLDocument(response.text, url=url).links:
                     if is_internal(next_url):
                         crawl(next_url)
         except Exception as e:
-            print(f"Error crawling {url}: {e}")
+            logger.error(f"Error crawling {url}: {e}")
 
     crawl(start_url)
-    return index
\ No newline at end of file
+    return index
+
+def crawl_site(start_url, max_pages=50, delay=0.2, engine="async", max_depth=None,
+               concurrency=8, per_host_concurrency=4, incremental=True, tracking_params=None,
+               ignore_path_case=False, respect_robots=True, use_sitemaps=True, resume=None, changed_only=False,
+               on_page=None):
+    """
+    Crawls a site with the selected engine and stores the pages in the crawl store.
+
+    Args:
+        start_url (str): Page to start from; only links on the same host are followed.
+        max_pages (int): Maximum number of pages to index.
+        delay (float): Minimum seconds between requests to the same host.
+        engine (str): "async" (breadth-first, concurrent) or "legacy" (recursive, sequential).
+        max_depth (int): Maximum link depth from the start URL (async engine).
+        concurrency (int): Number of concurrent fetchers (async engine).
+        per_host_concurrency (int): Maximum in-flight requests per host (async engine).
+        incremental (bool): Revalidate pages seen by earlier crawls with ETag /
+            Last-Modified and skip unchanged ones (async engine).
+        tracking_params (iterable): Query parameters stripped during URL canonicalization;
+            defaults to utm_*, gclid, fbclid and similar (async engine).
+        ignore_path_case (bool): Treat URL paths as case-insensitive (async engine).
+        respect_robots (bool): Skip URLs disallowed by robots.txt and honour its
+            Crawl-delay (async engine).
+        use_sitemaps (bool): Seed the frontier with the URLs listed in the site's
+            sitemaps (async engine).
+        resume (str): crawl_id of an interrupted async crawl to continue.
+        changed_only (bool): Only yield new and changed pages from 'pages'.
+        on_page (callable): Called with the event dict (url, status, size, ...) of
+            each processed page (async engine).
+
+    Returns:
+        dict: 'crawl_id', 'stats' (counts, timing and pages/second), 'diff'
+        (added/changed/removed against the previous crawl of the host) and
+        'pages', a lazy iterator of page dicts (url, status, depth, size, change, html).
+    """
+    if engine == "legacy":
+        started = time.perf_counter()
+        index = legacy_crawl_site(start_url, max_pages=max_pages, delay=delay)
+        stats = crawl_stats(len(index), 0, time.perf_counter() - started)
+        logger.info(f"Crawled {stats['pages']} pages in {stats['elapsed']}s ({stats['pages_per_second']} pages/s)")
+
+        store = CrawlStore()
+        crawl_id = store.create_crawl(start_url, {"engine": "legacy", "max_pages": max_pages})
+        previous = store.previous_crawl(crawl_id)
+        for url, html in index.items():
+            change = store.page_change(previous, url, html)
+            # Like the async engine, an unchanged page keeps its body only in the crawl that last stored it
+            store.save_page(crawl_id, url, 200, None, None, None if change == "unchanged" else html, change)
+        store.finish_crawl(crawl_id, stats)
+        diff = store.crawl_diff(crawl_id)
+        store.close()
+        return {"crawl_id": crawl_id, "stats": stats, "diff": diff, "pages": iter_pages(crawl_id, store.path)}
+
+    result = async_crawl_site(start_url, max_pages=max_pages, max_depth=max_depth, concurrency=concurrency,
+                              per_host_concurrency=per_host_concurrency, delay=delay, incremental=incremental,
+                              tracking_params=tracking_params, ignore_path_case=ignore_path_case,
+                              respect_robots=respect_robots, use_sitemaps=use_sitemaps, resume=resume,
+                              on_page=on_page)
+    if changed_only and "error" not in result:
+        result["pages"] = iter_pages(result["crawl_id"], changed_only=True)
+    return result
+
+def stream_crawl_site(start_url, keepalive=15, **options):
+    """
+    Streams a crawl as it happens instead of returning when it is done.
+
+    The async engine runs on a background thread and every processed URL
+    is yielded as soon as it is fetched, so the first result arrives
+    after about one page fetch and nothing but the store holds the crawl.
+    Closing the generator (e.g. the browser disconnects) stops the crawl;
+    it can be continued later with resume=crawl_id.
+
+    Args:
+        start_url (str): Page to start from.
+        keepalive (float): Seconds of silence after which a 'keepalive' event is yielded.
+        **options: Any async-engine option accepted by crawl_site.
+
+    Yields:
+        dict: An 'event' key ('start', 'page', 'keepalive', 'done' or 'error') plus its data;
+        'page' events carry url, status, size, fetch_ms, depth and change.
+    """
+    events = queue.Queue()
+    stop_event = threading.Event()
+
+    def run():
+        try:
+            result = async_crawl_site(
+                start_url, stop_event=stop_event,
+                on_start=lambda crawl_id: events.put({"event": "start", "crawl_id": crawl_id}),
+                on_page=lambda page: events.put(dict(page, event="page")),
+                **options
+            )
+            if "error" in result:
+                events.put({"event": "error", "error": result["error"]})
+            else:
+                events.put({"event": "done", "crawl_id": result["crawl_id"], "stats": result["stats"],
+                            "diff": result["diff"]})
+        except Exception as e:
+            logger.error(f"Streaming crawl of {start_url} failed: {e}")
+            events.put({"event": "error", "error": str(e)})
+        finally:
+            events.put(None)
+
+    threading.Thread(target=run, name="crawl-stream", daemon=True).start()
+    try:
+        while True:
+            try:
+                event = events.get(timeout=keepalive)
+            except queue.Empty:
+                yield {"event": "keepalive"}
+                continue
+            if event is None:
+                break
+            yield event
+    finally:
+        stop_event.set()
+
+if __name__ == "__main__":
+    logger=local_loggerSetup(use_filename=__file__)
+    parser = argparse.ArgumentParser(description="Website Crawler")
+    parser.add_argument('--url', default="https://www.seomasterz.com/", help='Start URL')
+    parser.add_argument('--max_pages', type=int, default=50, help='Maximum pages to crawl')
+    parser.add_argument('--engine', choices=ENGINES, default="async", help='Crawl engine')
+    parser.add_argument('--max_depth', type=int, default=None, help='Maximum link depth (async engine)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent fetchers (async engine)')
+    parser.add_argument('--per_host', type=int, default=4, help='Concurrent requests per host (async engine)')
+    parser.add_argument('--delay', type=float, default=0.2, help='Seconds between requests to one host')
+    parser.add_argument('--resume', default=None, help='crawl_id of an interrupted crawl to continue')
+    parser.add_argument('--full', dest='incremental', action='store_false', help='Re-download every page')
+    parser.add_argument('--changed_only', action='store_true', help='Only list new and changed pages')
+    parser.add_argument('--tracking_params', default=None, help='Comma-separated query params to strip (e.g. "utm_*,gclid")')
+    parser.add_argument('--ignore_path_case', action='store_true', help='Treat URL paths as case-insensitive')
+    parser.add_argument('--ignore_robots', dest='respect_robots', action='store_false', help='Do not check robots.txt')
+    parser.add_argument('--no_sitemaps', dest='use_sitemaps', action='store_false', help='Do not seed from sitemap.xml')
+    parser.add_argument('--stream', action='store_true', help='Print pages as they are fetched (async engine)')
+    args = parser.parse_args()
+    tracking_params = parse_tracking_params(args.tracking_params) if args.tracking_params else None
+
+    if args.stream:
+        for event in stream_crawl_site(args.url, max_pages=args.max_pages, delay=args.delay, max_depth=args.max_depth,
+                                       concurrency=args.concurrency, per_host_concurrency=args.per_host,
+                                       incremental=args.incremental, tracking_params=tracking_params,
+                                       ignore_path_case=args.ignore_path_case, respect_robots=args.respect_robots,
+                                       use_sitemaps=args.use_sitemaps, resume=args.resume):
+            if event["event"] == "page":
+                logger.info(f"[{event['status']}] {event['url']} — {event['size']} chars in {event['fetch_ms']} ms")
+            elif event["event"] == "done":
+                stats = event["stats"]
+                logger.info(f"✅ Crawl {event['crawl_id']}: {stats['pages']} pages in {stats['elapsed']}s — {stats['pages_per_second']} pages/s")
+            elif event["event"] == "error":
+                logger.error(event["error"])
+        raise SystemExit(0)
+
+    result = crawl_site(args.url, max_pages=args.max_pages, delay=args.delay, engine=args.engine,
+                        max_depth=args.max_depth, concurrency=args.concurrency, per_host_concurrency=args.per_host,
+                        incremental=args.incremental, tracking_params=tracking_params,
+                        ignore_path_case=args.ignore_path_case, respect_robots=args.respect_robots,
+                        use_sitemaps=args.use_sitemaps, resume=args.resume, changed_only=args.changed_only)
+    if "error" in result:
+        logger.error(result["error"])
+    else:
+        for page in result["pages"]:
+            logger.info(f"{page['url']} ({page['size']} chars, {page['change']})")
+        diff = result["diff"]
+        for key in ("added", "changed", "removed"):
+            logger.info(f"{key.capitalize()}: {len(diff[key])}")
+        stats = result["stats"]
+        logger.info(f"✅ Crawl {result['crawl_id']}: {stats['pages']} pages in {stats['elapsed']}s — {stats['pages_per_second']} pages/s")
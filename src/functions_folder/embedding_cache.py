@@ -0,0 +1,216 @@
+# File: functions_folder/embedding_cache.py
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import closing
+
+import numpy as np
+
+from functions_folder.crawl_store import connect
+from functions_folder.APP_loggerSetup import app_loggerSetup
+
+logger = app_loggerSetup()
+
+DEFAULT_CACHE_DIR = "crawl_data/embeddings"
+MEMORY_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", 10000))
+# Vector files grow in steps of this many rows, not one write at a time.
+GROW_ROWS = 4096
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    store TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS embeddings_store_row ON embeddings (store, row);
+"""
+
+
+def normalize_text(text):
+    """Texts that differ only in Unicode composition or whitespace embed identically."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(model_id, text):
+    return hashlib.blake2b(f"{model_id}\0{normalize_text(text)}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of embedding vectors, keyed by a hash of
+    (model id, normalized text).
+
+    Two tiers: a bounded in-memory LRU of `max_memory_entries` vectors,
+    and a disk store under `directory` that survives restarts and is
+    shared by every worker process. On disk, each model's vectors are rows
+    of one float32 file read through np.memmap, so a lookup touches only
+    the pages of the rows it needs; a SQLite index maps keys to rows and
+    serializes row allocation between processes. Disk errors are logged
+    and treated as misses: the cache never fails an encode.
+    """
+
+    def __init__(self, directory=None, max_memory_entries=MEMORY_ENTRIES, disk=True):
+        self.directory = directory or os.getenv("EMBEDDING_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.disk = disk and self.directory.lower() != "off"
+        self.index_path = os.path.join(self.directory, "index.db")
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._maps = {}
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+        self._schema_ready = False
+
+    def connection(self):
+        """Connection to the disk index; the directory and schema are created on first use."""
+        conn = connect(self.index_path)
+        if not self._schema_ready:
+            conn.executescript(SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def store_path(self, model_id, dim):
+        return os.path.join(self.directory, f"{re.sub(r'[^A-Za-z0-9]+', '_', model_id)}_{dim}.f32")
+
+    def remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model_id, dim, texts):
+        """Returns {text: float32 vector} for the `texts` found in either tier."""
+        keys = {text: cache_key(model_id, text) for text in texts}
+        found = {}
+        with self._lock:
+            for text, key in keys.items():
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[text] = vector
+        self.counters["memory_hits"] += len(found)
+
+        missing = [text for text in keys if text not in found]
+        if self.disk and missing:
+            try:
+                on_disk = self.read_disk(self.store_path(model_id, dim), dim, [keys[text] for text in missing])
+            except (sqlite3.Error, OSError, ValueError) as e:
+                logger.warning(f"Embedding cache read failed: {e}")
+                on_disk = {}
+            with self._lock:
+                for text in missing:
+                    vector = on_disk.get(keys[text])
+                    if vector is not None:
+                        self.remember(keys[text], vector)
+                        found[text] = vector
+            self.counters["disk_hits"] += len(on_disk)
+        self.counters["misses"] += len(keys) - len(found)
+        return found
+
+    def put_many(self, model_id, dim, vectors_by_text):
+        entries = {cache_key(model_id, text): np.asarray(vector, dtype=np.float32)
+                   for text, vector in vectors_by_text.items()}
+        with self._lock:
+            for key, vector in entries.items():
+                self.remember(key, vector)
+        if self.disk and entries:
+            try:
+                self.counters["writes"] += self.write_disk(self.store_path(model_id, dim), dim, entries)
+            except (sqlite3.Error, OSError, ValueError) as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+
+    def mapped(self, path, dim, min_rows):
+        """Read-only memmap of a vector file, re-mapped when another process has grown it."""
+        with self._lock:
+            current = self._maps.get(path)
+            if current is None or len(current) < min_rows:
+                rows = os.path.getsize(path) // (dim * 4)
+                current = np.memmap(path, dtype=np.float32, mode="r", shape=(rows, dim)) if rows else None
+                self._maps[path] = current
+            return current
+
+    def read_disk(self, path, dim, keys):
+        store = os.path.basename(path)
+        rows = {}
+        with closing(self.connection()) as conn:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows.update(conn.execute(
+                    f"SELECT key, row FROM embeddings WHERE store = ? AND key IN ({', '.join('?' * len(chunk))})",
+                    [store, *chunk]
+                ).fetchall())
+        if not rows:
+            return {}
+        vectors = self.mapped(path, dim, max(rows.values()) + 1)
+        if vectors is None or len(vectors) <= max(rows.values()):
+            return {}
+        keys, row_numbers = zip(*rows.items())
+        block = np.array(vectors[list(row_numbers)])  # copy: detach the rows from the mapping
+        return dict(zip(keys, block))
+
+    def write_disk(self, path, dim, entries):
+        """Appends new vectors; returns how many were written."""
+        store = os.path.basename(path)
+        with closing(self.connection()) as conn:
+            # IMMEDIATE takes the write lock now, so row numbers cannot be handed out twice.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                keys = list(entries)
+                known = set()
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    known.update(key for (key,) in conn.execute(
+                        f"SELECT key FROM embeddings WHERE key IN ({', '.join('?' * len(chunk))})", chunk))
+                new = [key for key in keys if key not in known]
+                if not new:
+                    conn.rollback()
+                    return 0
+                first = conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM embeddings WHERE store = ?",
+                                     (store,)).fetchone()[0]
+                needed = (first + len(new)) * dim * 4
+                size = os.path.getsize(path) if os.path.exists(path) else 0
+                if size < needed:
+                    with open(path, "ab") as f:
+                        f.truncate(needed + GROW_ROWS * dim * 4)
+                block = np.memmap(path, dtype=np.float32, mode="r+", offset=first * dim * 4, shape=(len(new), dim))
+                block[:] = np.stack([entries[key] for key in new])
+                block.flush()
+                del block
+                now = time.time()
+                conn.executemany("INSERT INTO embeddings (key, store, row, created_at) VALUES (?, ?, ?, ?)",
+                                 [(key, store, first + i, now) for i, key in enumerate(new)])
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        return len(new)
+
+    def stats(self):
+        """
+        Returns:
+            dict: hit/miss counters, 'hit_rate', memory tier entries and
+            bytes, and disk tier entries and bytes (None when disabled).
+        """
+        lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+        with self._lock:
+            memory_bytes = sum(vector.nbytes for vector in self._memory.values())
+            memory_entries = len(self._memory)
+        disk_entries = disk_bytes = None
+        if self.disk:
+            try:
+                with closing(self.connection()) as conn:
+                    disk_entries = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                disk_bytes = sum(os.path.getsize(os.path.join(self.directory, name))
+                                 for name in os.listdir(self.directory) if name.endswith(".f32"))
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Embedding cache stats failed: {e}")
+        return dict(self.counters,
+                    hit_rate=round((lookups - self.counters["misses"]) / lookups, 3) if lookups else 0.0,
+                    memory_entries=memory_entries, memory_bytes=memory_bytes,
+                    disk_entries=disk_entries, disk_bytes=disk_bytes)
@@ -0,0 +1,467 @@
+# File: functions_folder/embedding_service.py
+
+import argparse
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from functions_folder.embedding_cache import EmbeddingCache
+from functions_folder.model_registry import MINILM, registry
+from functions_folder.APP_loggerSetup import app_loggerSetup
+from functions_folder.LOCAL_loggerSetup import local_loggerSetup
+
+logger = app_loggerSetup()
+
+# all-MiniLM-L6-v2 was trained on sequences of up to 256 word pieces
+# (sentence-transformers' max_seq_length); longer input is truncated.
+MAX_SEQ_LENGTH = 256
+MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_MAX_BATCH", 64))
+# Padded tokens per forward pass; bounds activation memory whatever the text lengths.
+MAX_BATCH_TOKENS = int(os.getenv("EMBEDDING_MAX_BATCH_TOKENS", 8192))
+# Long documents are embedded as windows of whole sentences; consecutive
+# windows share this many sentences so no passage loses its context.
+OVERLAP_SENTENCES = 1
+# Windows embedded per encode() call by encode_document(): a book-length
+# input is streamed through in groups instead of held as one chunk list.
+DOCUMENT_GROUP = 512
+POOLING = ("mean", "max")
+# Sentence = up to terminal punctuation followed by whitespace, or a line (headings, list items).
+SENTENCE = re.compile(r"\S.*?(?:[.!?]+(?=\s)|$)", re.MULTILINE)
+# Where export_onnx() keeps the exported and quantized models.
+ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "models/onnx")
+
+
+def pad_batch(token_ids, pad_id=0):
+    """Pads token id lists to the longest one; returns (input_ids, attention_mask) int64 arrays."""
+    width = max(len(ids) for ids in token_ids)
+    input_ids = np.full((len(token_ids), width), pad_id, dtype=np.int64)
+    attention_mask = np.zeros((len(token_ids), width), dtype=np.int64)
+    for row, ids in enumerate(token_ids):
+        input_ids[row, :len(ids)] = ids
+        attention_mask[row, :len(ids)] = 1
+    return input_ids, attention_mask
+
+
+def mean_pool(token_embeddings, attention_mask):
+    """Average of the token vectors, ignoring padding (what sentence-transformers does for MiniLM)."""
+    mask = attention_mask[..., None].astype(np.float32)
+    return (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+def normalize(vectors):
+    """L2-normalizes rows in place, so that cosine similarity is a dot product."""
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    return vectors
+
+
+def onnx_threads():
+    """
+    Intra-op threads for onnxruntime: EMBEDDING_ONNX_THREADS, else the CPUs
+    this process may actually run on (shared hosts often pin workers to a
+    few cores, and more threads than cores only adds contention).
+    """
+    configured = os.getenv("EMBEDDING_ONNX_THREADS")
+    if configured:
+        return int(configured)
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def export_onnx(model_name=MINILM, directory=None):
+    """
+    Exports `model_name` to ONNX and quantizes its weights to int8 with
+    onnxruntime's dynamic quantization. Needs torch once; the result is
+    kept in `directory` and reused, so serving only needs onnxruntime.
+
+    Returns:
+        str: Path of the int8 model.
+    """
+    directory = directory or ONNX_DIR
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", model_name).strip("_")
+    fp32_path = os.path.join(directory, f"{slug}.onnx")
+    int8_path = os.path.join(directory, f"{slug}-int8.onnx")
+    if os.path.exists(int8_path):
+        return int8_path
+
+    import torch
+    from transformers import AutoModel
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(directory, exist_ok=True)
+    logger.info(f"Exporting {model_name} to ONNX in {directory}")
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    class HiddenStates(torch.nn.Module):
+        # Calls forward() by keyword and returns a plain tensor, whatever the transformers version.
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+    dummy = torch.ones((2, 8), dtype=torch.long)
+    axes = {0: "batch", 1: "sequence"}
+    # Both files are written under per-process temporary names first: workers exporting
+    # at the same time never read each other's half-written fp32 model, and others only
+    # ever see complete files.
+    partial_fp32_path = f"{fp32_path}.{os.getpid()}.tmp"
+    partial_int8_path = f"{int8_path}.{os.getpid()}.tmp"
+    try:
+        torch.onnx.export(HiddenStates().eval(), (dummy, dummy), partial_fp32_path,
+                          input_names=["input_ids", "attention_mask"], output_names=["last_hidden_state"],
+                          opset_version=14, dynamo=False,
+                          dynamic_axes={"input_ids": axes, "attention_mask": axes, "last_hidden_state": axes})
+        quantize_dynamic(partial_fp32_path, partial_int8_path, weight_type=QuantType.QInt8)
+        os.replace(partial_fp32_path, fp32_path)
+        os.replace(partial_int8_path, int8_path)
+    finally:
+        for path in (partial_fp32_path, partial_int8_path):
+            if os.path.exists(path):
+                os.remove(path)
+    logger.info(f"✅ int8 model written to {int8_path} ({os.path.getsize(int8_path) / 2 ** 20:.1f} MB, "
+                f"fp32 {os.path.getsize(fp32_path) / 2 ** 20:.1f} MB)")
+    return int8_path
+
+
+class TransformerEmbedder:
+    """Tokenization shared by the backends; subclasses implement embed()."""
+
+    name = None
+
+    def __init__(self, model_name):
+        from transformers import AutoTokenizer
+        self.model_name = model_name
+        self.model_id = model_name if self.name == "torch" else f"{model_name}:{self.name}"
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    def tokenize(self, texts, max_length):
+        return self.tokenizer(list(texts), truncation=True, max_length=max_length)["input_ids"]
+
+    def count_tokens(self, texts):
+        """Word pieces per text, without [CLS]/[SEP] and without truncation."""
+        return [len(ids) for ids in self.tokenizer(list(texts), add_special_tokens=False, verbose=False)["input_ids"]]
+
+
+class TorchEmbedder(TransformerEmbedder):
+    """MiniLM through transformers' AutoModel in fp32 PyTorch (the reference backend)."""
+
+    name = "torch"
+
+    def __init__(self, model_name=MINILM):
+        import torch
+        from transformers import AutoModel
+        super().__init__(model_name)
+        self._torch = torch
+        self.model = AutoModel.from_pretrained(model_name).eval()
+        self.dim = self.model.config.hidden_size
+
+    def embed(self, token_ids):
+        """Mean-pooled (not yet normalized) float32 vectors for one batch of token id lists."""
+        input_ids, attention_mask = pad_batch(token_ids, self.tokenizer.pad_token_id or 0)
+        with self._torch.inference_mode():
+            output = self.model(input_ids=self._torch.from_numpy(input_ids),
+                                attention_mask=self._torch.from_numpy(attention_mask))
+        return mean_pool(output.last_hidden_state.numpy(), attention_mask).astype(np.float32)
+
+
+class OnnxEmbedder(TransformerEmbedder):
+    """
+    MiniLM with int8 weights on onnxruntime's CPU provider. Vectors differ
+    slightly from the fp32 ones (see benchmarks/bench_embeddings.py for the
+    cosine agreement), so they are cached under their own model id.
+    """
+
+    name = "onnx-int8"
+
+    def __init__(self, model_name=MINILM, model_path=None, threads=None):
+        import onnxruntime as ort
+        super().__init__(model_name)
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads or onnx_threads()
+        # One graph runs at a time (EmbeddingService serializes calls), so no inter-op pool.
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path or export_onnx(model_name), options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.dim = self.session.get_outputs()[0].shape[-1]
+
+    def embed(self, token_ids):
+        input_ids, attention_mask = pad_batch(token_ids, self.tokenizer.pad_token_id or 0)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask, "token_type_ids": np.zeros_like(input_ids)}
+        hidden = self.session.run(None, {name: value for name, value in feeds.items() if name in self.input_names})[0]
+        return mean_pool(hidden, attention_mask).astype(np.float32)
+
+
+BACKENDS = {"torch": TorchEmbedder, "onnx": OnnxEmbedder}
+
+
+def load_embedder(model_name=MINILM, backend=None):
+    """The embedder selected by `backend` or EMBEDDING_BACKEND ('torch', the default, or 'onnx')."""
+    backend = (backend or os.getenv("EMBEDDING_BACKEND", "torch")).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[backend](model_name)
+
+
+class EmbeddingService:
+    """
+    The one MiniLM embedding model of the process, shared by content_scorer,
+    intent_classifier, content_gap_finder, topic_modeler and KeyBERT.
+
+    The model is fetched from the model registry (loaded once, on first
+    use). encode() tokenizes its texts once, sorts them by length and cuts
+    them into batches of at most `max_batch_size` texts and
+    `max_batch_tokens` padded tokens, so a keyword list goes through in a
+    few large batches while long documents do not blow up memory. Forward
+    passes are serialized: concurrent requests queue for the model instead
+    of oversubscribing the CPU.
+
+    Vectors already in the EmbeddingCache (`cache`; None disables it) are
+    not recomputed, so re-scoring the same references, keywords or
+    competitor pages costs a lookup.
+    """
+
+    def __init__(self, model_key="minilm", max_seq_length=MAX_SEQ_LENGTH, max_batch_size=MAX_BATCH_SIZE,
+                 max_batch_tokens=MAX_BATCH_TOKENS, models=None, cache=None):
+        self.model_key = model_key
+        self.max_seq_length = max_seq_length
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.models = models or registry
+        self.cache = cache
+        self._lock = threading.Lock()
+        self.stats = {"texts": 0, "batches": 0, "seconds": 0.0}
+
+    @property
+    def backend(self):
+        return self.models.get(self.model_key)
+
+    @property
+    def dim(self):
+        return self.backend.dim
+
+    def plan_batches(self, lengths):
+        """Index lists of similar-length texts within the size and padded-token budgets."""
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+        batches, batch, width = [], [], 0
+        for i in order:
+            new_width = max(width, lengths[i])
+            if batch and (len(batch) >= self.max_batch_size or new_width * (len(batch) + 1) > self.max_batch_tokens):
+                batches.append(batch)
+                batch, new_width = [], lengths[i]
+            batch.append(i)
+            width = new_width
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def encode(self, texts):
+        """
+        Embeds `texts` (a string or a list of strings).
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dim), one
+            L2-normalized row per text in input order (a single string gives
+            one row).
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        texts = list(texts)
+        backend = self.backend
+        if not texts:
+            return np.zeros((0, backend.dim), dtype=np.float32)
+
+        # Identical texts (repeated keywords, the same reference twice) are embedded once.
+        unique = list(dict.fromkeys(texts))
+        cached = self.cache.get_many(backend.model_id, backend.dim, unique) if self.cache else {}
+        todo = [text for text in unique if text not in cached]
+        if todo:
+            computed = self.embed(backend, todo)
+            if self.cache:
+                self.cache.put_many(backend.model_id, backend.dim, dict(zip(todo, computed)))
+            cached.update(zip(todo, computed))
+        return np.stack([cached[text] for text in texts])
+
+    def embed(self, backend, texts):
+        token_ids = backend.tokenize(texts, self.max_seq_length)
+        vectors = np.empty((len(texts), backend.dim), dtype=np.float32)
+        started = time.perf_counter()
+        batches = self.plan_batches([len(ids) for ids in token_ids])
+        with self._lock:
+            for batch in batches:
+                vectors[batch] = backend.embed([token_ids[i] for i in batch])
+        self.stats["texts"] += len(texts)
+        self.stats["batches"] += len(batches)
+        self.stats["seconds"] += time.perf_counter() - started
+        return normalize(vectors)
+
+    def windows(self, text, overlap_sentences=OVERLAP_SENTENCES):
+        """
+        Yields (start, end) character spans of `text`: runs of consecutive
+        sentences of at most max_seq_length word pieces (minus [CLS]/[SEP]),
+        each repeating the last `overlap_sentences` sentences of the one
+        before. A sentence longer than a window on its own is cut at
+        whitespace. Sentences are tokenized in groups as the spans are
+        consumed, never the whole text at once.
+        """
+        budget = self.max_seq_length - 2
+        backend = self.backend
+        window = []  # [(start, end, tokens)]
+        spans = (match.span() for match in SENTENCE.finditer(text))
+        while True:
+            group = [span for _, span in zip(range(DOCUMENT_GROUP), spans)]
+            if not group:
+                break
+            for (start, end), tokens in zip(group, backend.count_tokens([text[a:b] for a, b in group])):
+                if tokens > budget:
+                    if window:
+                        yield window[0][0], window[-1][1]
+                        window = []
+                    yield from self.split_sentence(text, start, end, -(-tokens // budget))
+                    continue
+                if window and sum(t for _, _, t in window) + tokens > budget:
+                    yield window[0][0], window[-1][1]
+                    window = window[len(window) - overlap_sentences:] if overlap_sentences else []
+                    while window and sum(t for _, _, t in window) + tokens > budget:
+                        window.pop(0)
+                window.append((start, end, tokens))
+        if window:
+            yield window[0][0], window[-1][1]
+
+    @staticmethod
+    def split_sentence(text, start, end, pieces):
+        """`pieces` spans of about equal word counts covering text[start:end]."""
+        words = [match.span() for match in re.finditer(r"\S+", text[start:end])]
+        # One more piece than the token count asks for: word pieces are unevenly spread.
+        size = -(-len(words) // (pieces + 1))
+        for i in range(0, len(words), size):
+            chunk = words[i:i + size]
+            yield start + chunk[0][0], start + chunk[-1][1]
+
+    def encode_document(self, text, pooling="mean", overlap_sentences=OVERLAP_SENTENCES, reference=None):
+        """
+        Embeds a text of any length: its sentence windows (see windows())
+        go through encode() in groups of DOCUMENT_GROUP, and the window
+        vectors are pooled into one with a running mean or element-wise
+        max, so memory stays flat however long the text is.
+
+        Args:
+            text (str): The document.
+            pooling (str): 'mean' (overall topic) or 'max' (strongest signals).
+            overlap_sentences (int): Sentences repeated between windows.
+            reference (np.ndarray, optional): A normalized vector to score
+                each window against.
+
+        Returns:
+            dict: 'vector' (normalized float32), 'chunks' (windows embedded)
+            and 'sections': [{'start', 'end', 'similarity'}] character
+            spans, with a similarity only when `reference` is given.
+        """
+        if pooling not in POOLING:
+            raise ValueError(f"Unknown pooling '{pooling}', expected one of {POOLING}")
+        pooled, sections = None, []
+        spans = self.windows(text, overlap_sentences)
+        while True:
+            group = [span for _, span in zip(range(DOCUMENT_GROUP), spans)]
+            if not group:
+                break
+            vectors = self.encode([text[start:end] for start, end in group])
+            if pooling == "mean":
+                total = vectors.sum(axis=0)
+                pooled = total if pooled is None else pooled + total
+            else:
+                peak = vectors.max(axis=0)
+                pooled = peak if pooled is None else np.maximum(pooled, peak)
+            scores = vectors @ reference if reference is not None else [None] * len(group)
+            sections.extend({"start": start, "end": end,
+                             "similarity": None if score is None else round(float(score), 3)}
+                            for (start, end), score in zip(group, scores))
+        if pooled is None:  # no words at all
+            return {"vector": self.encode([text])[0], "chunks": 0, "sections": []}
+        return {"vector": normalize(pooled[None, :].astype(np.float32))[0], "chunks": len(sections),
+                "sections": sections}
+
+    def encode_documents(self, texts, pooling="mean", overlap_sentences=OVERLAP_SENTENCES):
+        """
+        encode_document() for many texts at once: the windows of all of them
+        share forward passes (a batch of short drafts costs a few batches,
+        not one pass per draft) and are pooled back per text.
+
+        Returns:
+            np.ndarray: float32 array of shape (len(texts), dim), one
+            normalized pooled row per text in input order.
+        """
+        if pooling not in POOLING:
+            raise ValueError(f"Unknown pooling '{pooling}', expected one of {POOLING}")
+        texts = list(texts)
+        pooled = np.full((len(texts), self.dim), 0.0 if pooling == "mean" else -np.inf, dtype=np.float32)
+        windows, owners = [], []
+
+        def flush():
+            vectors = self.encode(windows)
+            if pooling == "mean":
+                np.add.at(pooled, owners, vectors)
+            else:
+                np.maximum.at(pooled, owners, vectors)
+            windows.clear()
+            owners.clear()
+
+        counts = np.zeros(len(texts), dtype=np.int64)
+        for i, text in enumerate(texts):
+            for start, end in self.windows(text, overlap_sentences):
+                windows.append(text[start:end])
+                owners.append(i)
+                counts[i] += 1
+                if len(windows) >= DOCUMENT_GROUP:
+                    flush()
+        if windows:
+            flush()
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):  # no words at all: embed the text as is, like encode() would
+            pooled[empty] = self.encode([texts[i] for i in empty])
+        return normalize(pooled)
+
+    def report(self):
+        """Encoder counters plus the cache's hit/miss and byte metrics."""
+        return {"encoder": dict(self.stats, seconds=round(self.stats["seconds"], 3)),
+                "cache": self.cache.stats() if self.cache else None}
+
+
+embedding_service = EmbeddingService(cache=EmbeddingCache())
+
+
+def encode(texts):
+    """Normalized float32 MiniLM embeddings of `texts`, one row per text (see EmbeddingService.encode)."""
+    return embedding_service.encode(texts)
+
+
+def encode_document(text, pooling="mean", overlap_sentences=OVERLAP_SENTENCES, reference=None):
+    """Pooled embedding of a text of any length (see EmbeddingService.encode_document)."""
+    return embedding_service.encode_document(text, pooling, overlap_sentences, reference)
+
+
+def encode_documents(texts, pooling="mean", overlap_sentences=OVERLAP_SENTENCES):
+    """Pooled embeddings of many texts of any length (see EmbeddingService.encode_documents)."""
+    return embedding_service.encode_documents(texts, pooling, overlap_sentences)
+
+
+if __name__ == "__main__":
+    logger=local_loggerSetup(use_filename=__file__)
+    parser = argparse.ArgumentParser(description="Shared MiniLM embedding service")
+    parser.add_argument('texts', nargs='*', default=["content gap analysis", "keyword research tools"])
+    parser.add_argument('--export_onnx', action='store_true', help='Build the int8 ONNX model and exit')
+    args = parser.parse_args()
+    if args.export_onnx:
+        logger.info(export_onnx())
+        raise SystemExit
+    vectors = encode(args.texts)
+    logger.info(f"{vectors.shape} {vectors.dtype}; similarity matrix:\n{np.round(vectors @ vectors.T, 3)}")
+    logger.info(embedding_service.report())
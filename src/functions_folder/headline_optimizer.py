@@ -1,9 +1,8 @@
 # headline_optimizer.py
 
-from textblob import TextBlob
-from transformers import pipeline
 import random
 
+from functions_folder.model_registry import get_model
 from functions_folder.APP_loggerSetup import app_loggerSetup
 from functions_folder.LOCAL_loggerSetup import local_loggerSetup
 
@@ -19,13 +18,15 @@ def score_headline(headline):
     Returns:
         dict: Contains sentiment polarity, subjectivity, fluency score, and suggestions.
     """
+    from textblob import TextBlob  # deferred: imports nltk
+
     # Sentiment analysis
     blob = TextBlob(headline)
     polarity = round(blob.sentiment.polarity, 3)
     subjectivity = round(blob.sentiment.subjectivity, 3)
 
     # Fluency scoring using transformer
-    fill_mask = pipeline("fill-mask", model="bert-base-uncased")
+    fill_mask = get_model("fill_mask")
     tokens = headline.split()
     fluency_score = 0
     count = 0
@@ -0,0 +1,553 @@
+# File: functions_folder/htaccess_simulator.py
+
+import argparse
+import re
+import statistics
+import time
+from collections import Counter
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import networkx as nx
+
+from functions_folder.redirect_mapper import chain_issue, export_csv, read_url_list
+from functions_folder.APP_loggerSetup import app_loggerSetup
+from functions_folder.LOCAL_loggerSetup import local_loggerSetup
+
+logger = app_loggerSetup()
+
+MAX_INTERNAL_PASSES = 10  # Apache's LimitInternalRecursion default
+
+FLAG_ALIASES = {
+    "REDIRECT": "R", "LAST": "L", "NOCASE": "NC", "QSAPPEND": "QSA", "QSDISCARD": "QSD",
+    "FORBIDDEN": "F", "GONE": "G", "SKIP": "S", "NOESCAPE": "NE", "CHAIN": "C", "ORNEXT": "OR",
+    "PASSTHROUGH": "PT", "TYPE": "T", "ENV": "E", "COOKIE": "CO",
+}
+ALIAS_STATUSES = {"permanent": 301, "temp": 302, "seeother": 303, "gone": 410}
+
+BACKREF = re.compile(r"([$%])(\d)")
+VARIABLE = re.compile(r"%\{([^}]+)\}")
+
+
+class HtaccessSyntaxError(ValueError):
+    pass
+
+
+def split_arguments(line):
+    """Splits a directive line like Apache does: whitespace-separated, quotes group, '#' starts a comment."""
+    args, current, quote, in_token = [], [], None, False
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if quote:
+            if char == "\\" and i + 1 < len(line) and line[i + 1] == quote:
+                current.append(quote)
+                i += 1
+            elif char == quote:
+                quote = None
+            else:
+                current.append(char)
+        elif char in "\"'" and not in_token:
+            quote, in_token = char, True
+        elif char.isspace():
+            if in_token:
+                args.append("".join(current))
+                current, in_token = [], False
+        elif char == "#" and not in_token:
+            break
+        else:
+            current.append(char)
+            in_token = True
+        i += 1
+    if in_token:
+        args.append("".join(current))
+    return args
+
+
+def parse_flags(raw):
+    """'[R=301,L,NC]' -> {'R': '301', 'L': None, 'NC': None}."""
+    if not raw:
+        return {}
+    if not (raw.startswith("[") and raw.endswith("]")):
+        raise HtaccessSyntaxError(f"bad flag delimiters: {raw}")
+    flags = {}
+    for flag in raw[1:-1].split(","):
+        name, _, value = flag.strip().partition("=")
+        name = name.strip().upper()
+        if name:
+            flags[FLAG_ALIASES.get(name, name)] = value.strip() or None
+    return flags
+
+
+def redirect_status(value):
+    if value is None:
+        return 302
+    if value.lower() in ALIAS_STATUSES:
+        return ALIAS_STATUSES[value.lower()]
+    return int(value)
+
+
+def expand(template, rule_match, cond_match, variables):
+    """Substitutes $N (rule backreferences), %N (last matched condition) and %{VAR}."""
+    if "$" not in template and "%" not in template:
+        return template
+
+    def backref(match):
+        source = rule_match if match.group(1) == "$" else cond_match
+        if source is None:
+            return ""
+        index = int(match.group(2))
+        return (source.group(index) or "") if index <= (source.re.groups or 0) else ""
+
+    text = VARIABLE.sub(lambda match: variables.get(match.group(1).upper(), ""), template)
+    return BACKREF.sub(backref, text)
+
+
+class RewriteCond:
+    def __init__(self, test_string, pattern, flags, line):
+        self.test_string = test_string
+        self.flags = flags
+        self.line = line
+        self.negate = pattern.startswith("!")
+        pattern = pattern[1:] if self.negate else pattern
+        self.file_test = pattern if pattern in ("-f", "-d", "-s", "-l", "-F", "-U") else None
+        self.equals = pattern[1:] if pattern.startswith("=") else None
+        self.regex = None
+        if self.file_test is None and self.equals is None:
+            self.regex = re.compile(pattern, re.IGNORECASE if "NC" in flags else 0)
+
+    def evaluate(self, rule_match, cond_match, variables, files, directories):
+        """Returns (matched, regex match object for %N backreferences)."""
+        value = expand(self.test_string, rule_match, cond_match, variables)
+        match = None
+        if self.file_test == "-d":
+            matched = value.rstrip("/") + "/" in directories or value in directories
+        elif self.file_test:
+            matched = value in files
+        elif self.equals is not None:
+            matched = value.lower() == self.equals.lower() if "NC" in self.flags else value == self.equals
+        else:
+            match = self.regex.search(value)
+            matched = match is not None
+        if self.negate:
+            return not matched, None
+        return matched, match
+
+
+class RewriteRule:
+    def __init__(self, pattern, substitution, flags, conditions, line):
+        self.negate = pattern.startswith("!")
+        self.regex = re.compile(pattern[1:] if self.negate else pattern, re.IGNORECASE if "NC" in flags else 0)
+        self.substitution = substitution
+        self.flags = flags
+        self.conditions = conditions
+        self.line = line
+
+
+class AliasRedirect:
+    """Redirect / RedirectMatch / RedirectPermanent / RedirectTemp (mod_alias)."""
+
+    def __init__(self, status, source, target, regex, line):
+        self.status = status
+        self.source = source
+        self.target = target
+        self.regex = re.compile(source) if regex else None
+        self.line = line
+
+    def apply(self, path, query):
+        """Returns (status, location or None) if the directive matches `path`, else None."""
+        if self.regex is not None:
+            match = self.regex.search(path)
+            if match is None:
+                return None
+            target = expand(self.target, match, None, {}) if self.target else None
+            return self.status, target
+        prefix = self.source.rstrip("/")
+        if not (path == self.source or path == prefix or path.startswith(prefix + "/")):
+            return None
+        if not self.target:
+            return self.status, None
+        target = self.target.rstrip("/") + path[len(prefix):] if prefix else self.target.rstrip("/") + path
+        if query:
+            target += ("&" if "?" in target else "?") + query
+        return self.status, target
+
+
+class HtaccessRules:
+    """
+    An .htaccess file parsed once, with every regex precompiled.
+
+    Understands RewriteEngine, RewriteBase, RewriteCond (regex, '=', and
+    -f/-d tests against the given `files`/`directories`, [NC] and [OR]),
+    RewriteRule (with $N/%N/%{VAR} substitution and the R, L, END, NC,
+    QSA, QSD, F, G and S flags, re-running the rules after an internal
+    rewrite as Apache does) and mod_alias Redirect, RedirectPermanent,
+    RedirectTemp and RedirectMatch. <IfModule> blocks are assumed to be
+    active; unsupported directives are listed in `warnings`.
+    """
+
+    def __init__(self, text, directory="/", files=(), directories=(), check_files=False):
+        self.directory = "/" + directory.strip("/") + "/" if directory.strip("/") else "/"
+        self.files = set(files)
+        self.directories = set(directories)
+        self.check_files = check_files
+        self.engine_on = False
+        self.base = self.directory
+        self.rules = []
+        self.aliases = []
+        self.warnings = []
+        self.parse(text)
+
+    def parse(self, text):
+        conditions = []
+        for number, raw in enumerate(text.splitlines(), 1):
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("<"):
+                if not re.match(r"</?IfModule\b", line, re.IGNORECASE):
+                    self.warnings.append(f"line {number}: section {line} ignored")
+                continue
+            args = split_arguments(line)
+            name, args = args[0].lower(), args[1:]
+            try:
+                if name == "rewriteengine":
+                    self.engine_on = bool(args) and args[0].lower() == "on"
+                elif name == "rewritebase":
+                    self.base = args[0].rstrip("/") + "/"
+                elif name == "rewritecond":
+                    conditions.append(RewriteCond(args[0], args[1], parse_flags(args[2] if len(args) > 2 else ""), number))
+                elif name == "rewriterule":
+                    self.rules.append(RewriteRule(args[0], args[1], parse_flags(args[2] if len(args) > 2 else ""),
+                                                  conditions, number))
+                    conditions = []
+                elif name in ("redirect", "redirectpermanent", "redirecttemp"):
+                    status = {"redirectpermanent": 301, "redirecttemp": 302}.get(name)
+                    if status is None and args and not args[0].startswith("/"):
+                        status, args = redirect_status(args[0]), args[1:]
+                    self.aliases.append(AliasRedirect(status or 302, args[0], args[1] if len(args) > 1 else None,
+                                                      False, number))
+                elif name == "redirectmatch":
+                    status = 302
+                    if len(args) > 2 or (args and args[0].lower() in ALIAS_STATUSES) or (args and args[0].isdigit()):
+                        status, args = redirect_status(args[0]), args[1:]
+                    self.aliases.append(AliasRedirect(status, args[0], args[1] if len(args) > 1 else None,
+                                                      True, number))
+                else:
+                    self.warnings.append(f"line {number}: {args and name or line} not simulated")
+            except (IndexError, re.error, ValueError) as e:
+                raise HtaccessSyntaxError(f"line {number}: {line}: {e}") from e
+
+    def variables(self, scheme, host, path, query):
+        return {
+            "REQUEST_URI": path, "QUERY_STRING": query, "HTTP_HOST": host, "SERVER_NAME": host.split(":")[0],
+            "HTTPS": "on" if scheme == "https" else "off", "REQUEST_SCHEME": scheme,
+            "SERVER_PORT": host.split(":")[1] if ":" in host else ("443" if scheme == "https" else "80"),
+            "REQUEST_FILENAME": path, "SCRIPT_FILENAME": path,
+            "THE_REQUEST": f"GET {path}{'?' + query if query else ''} HTTP/1.1",
+        }
+
+    def check_conditions(self, rule, rule_match, variables):
+        """Conditions are ANDed, except that [OR] joins a condition with the next one."""
+        cond_match, group_matched = None, False
+        for cond in rule.conditions:
+            if group_matched:
+                # An earlier condition of this [OR] group matched; the rest need not be tested.
+                group_matched = "OR" in cond.flags
+                continue
+            matched, match = cond.evaluate(rule_match, cond_match, variables, self.files, self.directories)
+            if matched and match is not None:
+                cond_match = match
+            if "OR" in cond.flags:
+                group_matched = matched
+            elif not matched:
+                return False, None
+        if rule.conditions and "OR" in rule.conditions[-1].flags and not group_matched:
+            return False, None
+        return True, cond_match
+
+    def rewrite_pass(self, scheme, host, path, query):
+        """
+        Runs the RewriteRules once over `path`. Returns (action, path,
+        query, status, location) with action 'redirect', 'status',
+        'rewrite', 'end' or None (nothing matched or no change).
+        """
+        if not path.startswith(self.directory) and path + "/" != self.directory:
+            return None, path, query, None, None
+        relative = path[len(self.directory):]
+        variables = self.variables(scheme, host, path, query)
+        skip = 0
+        changed = False
+        for rule in self.rules:
+            if skip:
+                skip -= 1
+                continue
+            match = rule.regex.search(relative)
+            if (match is None) != rule.negate:
+                continue
+            ok, cond_match = self.check_conditions(rule, match if not rule.negate else None, variables)
+            if not ok:
+                continue
+
+            flags = rule.flags
+            if "F" in flags:
+                return "status", path, query, 403, None
+            if "G" in flags:
+                return "status", path, query, 410, None
+
+            if rule.substitution != "-":
+                target = expand(rule.substitution, match if not rule.negate else None, cond_match, variables)
+                new_path, _, new_query = target.partition("?")
+                if "?" in target:
+                    if "QSA" in flags and query:
+                        new_query = f"{new_query}&{query}" if new_query else query
+                elif "QSD" not in flags:
+                    new_query = query
+                if "QSD" in flags and "?" not in target:
+                    new_query = ""
+
+                parts = urlsplit(new_path)
+                if parts.scheme in ("http", "https"):
+                    if "R" in flags or parts.netloc.lower() != host.lower():
+                        location = urlunsplit((parts.scheme, parts.netloc, parts.path or "/", new_query, ""))
+                        return "redirect", path, query, redirect_status(flags.get("R")), location
+                    new_path = parts.path or "/"
+                elif not new_path.startswith("/"):
+                    new_path = self.base + new_path
+
+                if "R" in flags:
+                    status = redirect_status(flags["R"])
+                    if not 300 <= status < 400:
+                        return "status", path, query, status, None
+                    location = urlunsplit((scheme, host, new_path, new_query, ""))
+                    return "redirect", path, query, status, location
+                changed = changed or new_path != path or new_query != query
+                path, query = new_path, new_query
+                relative = path[len(self.directory):] if path.startswith(self.directory) else path.lstrip("/")
+                variables = self.variables(scheme, host, path, query)
+            elif "R" in flags:
+                location = urlunsplit((scheme, host, path, query, ""))
+                return "redirect", path, query, redirect_status(flags["R"]), location
+
+            if "END" in flags:
+                return "end", path, query, None, None
+            if "L" in flags:
+                break
+            if "S" in flags:
+                skip = int(flags["S"] or 1)
+        return ("rewrite" if changed else None), path, query, None, None
+
+    def exists(self, path):
+        """Whether `path` is a known file or directory, or PATH_INFO below a known file (app.py/route)."""
+        if path in self.files or path in self.directories or path.rstrip("/") + "/" in self.directories:
+            return True
+        return any(path.startswith(file + "/") for file in self.files)
+
+    def answer(self, url, status, location=None, served_path=None, error=None):
+        external = location is not None and urlsplit(location).netloc.lower() != urlsplit(url).netloc.lower()
+        if status == 200 and self.check_files and not self.exists(served_path):
+            status = 404
+        return {"status": status, "location": location, "external": external, "served_path": served_path,
+                "error": error}
+
+    def evaluate(self, url):
+        """
+        Simulates one request for `url`.
+
+        Returns:
+            dict: 'status' (3xx with 'location', 200 for a page that is
+            served, or 403/404/410/500 when the rules say so), 'external'
+            if the redirect leaves the host, 'served_path' (the path after
+            internal rewrites) and 'error'.
+        """
+        parts = urlsplit(url)
+        scheme, host = parts.scheme or "http", parts.netloc
+        path, query = parts.path or "/", parts.query
+
+        if self.engine_on and self.rules:
+            for _ in range(MAX_INTERNAL_PASSES):
+                action, path, query, status, location = self.rewrite_pass(scheme, host, path, query)
+                if action == "redirect":
+                    return self.answer(url, status, location)
+                if action == "status":
+                    return self.answer(url, status, served_path=path)
+                if action != "rewrite":
+                    break
+            else:
+                return self.answer(url, 500, served_path=path,
+                                   error=f"More than {MAX_INTERNAL_PASSES} internal rewrites")
+
+        original = parts.path or "/"
+        for alias in self.aliases:
+            matched = alias.apply(original, parts.query)
+            if matched is not None:
+                status, target = matched
+                if target is not None and 300 <= status < 400:
+                    return self.answer(url, status, urljoin(url, target))
+                return self.answer(url, status, served_path=original)
+        return self.answer(url, 200, served_path=path)
+
+
+def follow_chain(rules, start_url, max_redirects, hosts, memo):
+    chain, visited = [], set()
+    current_url = start_url
+    answer, loop_detected, external, error = {}, False, False, None
+
+    for _ in range(max_redirects + 1):
+        if current_url in visited:
+            loop_detected = True
+            answer = {}
+            break
+        visited.add(current_url)
+        answer = memo.get(current_url)
+        if answer is None:
+            answer = memo[current_url] = rules.evaluate(current_url)
+        chain.append((current_url, answer["status"]))
+        location = answer["location"]
+        if location is None:
+            error = answer.get("error")
+            break
+        current_url = location
+        if answer["external"] if hosts is None else urlsplit(location).netloc.lower() not in hosts:
+            external = True
+            answer = {}
+            break
+    else:
+        error = f"More than {max_redirects} redirects"
+
+    result = {
+        "source_url": start_url,
+        "redirect_chain": chain,
+        "loop_detected": loop_detected,
+        "final_url": current_url,
+        "final_status": answer.get("status"),
+        "hops": sum(1 for _, status in chain if 300 <= status < 400),
+        "served_path": answer.get("served_path"),
+        "external": external,
+        "error": error
+    }
+    result["issue"] = chain_issue(result)
+    return result
+
+
+def simulate_redirects(rules, start_url, max_redirects=10, hosts=None, memo=None):
+    """
+    Follows `start_url` through the rules like redirect_mapper follows it
+    over the network. A redirect to another host ends the chain, as the
+    rules cannot say what that host answers (final_status None,
+    'external' set); `hosts` lists extra host names the same .htaccess
+    serves, e.g. both the www and the bare domain.
+
+    Returns:
+        dict: 'redirect_chain', 'loop_detected', 'final_url', 'graph' as in
+        redirect_mapper, plus 'source_url', 'final_status', 'hops',
+        'served_path', 'external', 'error' and 'issue'.
+    """
+    hosts = {host.lower() for host in hosts} if hosts else None
+    result = follow_chain(rules, start_url, max_redirects, hosts, {} if memo is None else memo)
+    graph = nx.DiGraph()
+    chain = result["redirect_chain"]
+    for (url, status), (next_url, _) in zip(chain, chain[1:] + [(result["final_url"], None)]):
+        if 300 <= status < 400:
+            graph.add_edge(url, next_url, status=status)
+    if result["loop_detected"]:
+        graph.add_edge(result["final_url"], result["final_url"])
+    result["graph"] = graph
+    return result
+
+
+def simulate_bulk(htaccess_text, urls, directory="/", files=(), directories=(), check_files=False,
+                  hosts=None, max_redirects=10):
+    """
+    Evaluates a whole URL list against an .htaccess file offline, e.g. to
+    verify a migration's redirect rules before they are deployed.
+
+    Every distinct URL is evaluated once, so chains shared by many source
+    URLs cost one rule pass per hop. The output mirrors
+    bulk_redirect_mapper ('results', one merged 'graph', 'stats',
+    'loops', 'redirects_to_404', 'multi_hop'), so both can be compared
+    and exported with the same CSV writer; 'warnings' lists directives
+    that were not simulated.
+
+    Args:
+        htaccess_text (str): The .htaccess content.
+        urls (list): URLs to evaluate.
+        directory (str): URL path of the directory holding the .htaccess.
+        files (iterable): URL paths that exist as files (for -f, -s and -l tests).
+        directories (iterable): URL paths that exist as directories (for -d tests).
+        check_files (bool): Report pages served from paths outside `files`/`directories` as 404.
+        hosts (iterable): Host names served by this .htaccess; redirects elsewhere end a chain.
+        max_redirects (int): Longest chain followed before giving up.
+    """
+    try:
+        rules = HtaccessRules(htaccess_text, directory, files, directories, check_files)
+    except HtaccessSyntaxError as e:
+        return {"error": f"Invalid .htaccess: {e}"}
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {"error": "No URLs given"}
+
+    started = time.perf_counter()
+    memo = {}
+    hosts = {host.lower() for host in hosts} if hosts else None
+    results = [follow_chain(rules, url, max_redirects, hosts, memo) for url in urls]
+    elapsed = time.perf_counter() - started
+
+    graph = nx.DiGraph()
+    for url, answer in memo.items():
+        graph.add_node(url, status=answer["status"])
+        if answer["location"] is not None:
+            graph.add_edge(url, answer["location"], status=answer["status"])
+
+    hops = [result["hops"] for result in results]
+    stats = {
+        "urls": len(urls),
+        "requests_simulated": len(memo),
+        "hop_distribution": dict(sorted(Counter(hops).items())),
+        "mean_hops": round(statistics.mean(hops), 2),
+        "max_hops": max(hops),
+        "errors": sum(1 for result in results if result["error"]),
+        "elapsed_ms": round(elapsed * 1000)
+    }
+    issues = {issue: [result for result in results if result["issue"] == issue]
+              for issue in ("loop", "redirect_to_404", "multi_hop")}
+    logger.info(f"Simulated {len(urls)} URLs in {stats['elapsed_ms']} ms: {len(issues['loop'])} loops, "
+                f"{len(issues['redirect_to_404'])} redirects to 404, {len(issues['multi_hop'])} multi-hop chains")
+    return {
+        "results": results,
+        "graph": graph,
+        "stats": stats,
+        "loops": issues["loop"],
+        "redirects_to_404": issues["redirect_to_404"],
+        "multi_hop": issues["multi_hop"],
+        "warnings": rules.warnings
+    }
+
+
+if __name__ == "__main__":
+    logger=local_loggerSetup(use_filename=__file__)
+    parser = argparse.ArgumentParser(description="Offline .htaccess redirect simulator")
+    parser.add_argument('--htaccess', default="../htaccess.txt", help='.htaccess file to evaluate')
+    parser.add_argument('--url', action='append', default=[], help='URL to test (repeatable)')
+    parser.add_argument('--url_file', default=None, help='Text or CSV file of URLs')
+    parser.add_argument('--output', default=None, help='CSV report path')
+    args = parser.parse_args()
+
+    with open(args.htaccess, encoding="utf-8") as f:
+        htaccess_text = f.read()
+    urls = list(args.url)
+    if args.url_file:
+        with open(args.url_file, encoding="utf-8") as f:
+            urls.extend(read_url_list(f.read()))
+    result = simulate_bulk(htaccess_text, urls or ["https://rank4sure.com/aio/seo_analyzer"])
+    if "error" in result:
+        logger.error(result["error"])
+    else:
+        for warning in result["warnings"]:
+            logger.warning(warning)
+        for item in result["results"]:
+            logger.info(f"{item['source_url']} -> {item['final_url']} [{item['final_status']}] "
+                        f"{item['hops']} hops {item['issue']}")
+        logger.info(result["stats"])
+        if args.output:
+            with open(args.output, "w", newline="", encoding="utf-8") as f:
+                export_csv(result["results"], f)
@@ -0,0 +1,280 @@
+# File: functions_folder/html_document.py
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import cached_property
+from urllib.parse import urljoin
+
+import requests
+import lxml.etree
+import lxml.html
+
+try:  # optional faster backend
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
+
+from functions_folder.APP_loggerSetup import app_loggerSetup
+
+logger = app_loggerSetup()
+
+NON_VISIBLE_TAGS = ("script", "style", "noscript", "template")
+# Tags whose URL attribute points at something the page links to or loads.
+RESOURCE_ATTRS = {"a": "href", "img": "src", "script": "src", "link": "href"}
+# <link> relations that name an origin or a hint, not a fetchable resource.
+NON_RESOURCE_RELS = {"preconnect", "dns-prefetch"}
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+
+def clean_text(text):
+    return " ".join(text.split())
+
+
+class Node:
+    """Backend-neutral view of an element: tag name, attribute dict and text."""
+
+    __slots__ = ("tag", "attrs", "_text")
+
+    def __init__(self, tag, attrs, text):
+        self.tag = tag
+        self.attrs = attrs
+        self._text = text
+
+    def get(self, name, default=None):
+        return self.attrs.get(name, default)
+
+    def raw_text(self):
+        return self._text()
+
+    @property
+    def text(self):
+        return clean_text(self._text())
+
+
+class LxmlTree:
+    def __init__(self, html):
+        parser = lxml.html.HTMLParser(encoding="utf-8")
+        data = html.encode("utf-8", errors="replace") if isinstance(html, str) else html
+        try:
+            self.root = lxml.html.document_fromstring(data, parser=parser)
+        except lxml.etree.ParserError:  # empty or comment-only document
+            self.root = lxml.html.document_fromstring(b"<html></html>", parser=parser)
+
+    def iter_tags(self, *tags):
+        for el in self.root.iter(*tags):
+            yield Node(el.tag, dict(el.attrib), el.text_content)
+
+    def visible_text(self):
+        condition = " or ".join(f"ancestor::{tag}" for tag in NON_VISIBLE_TAGS)
+        return clean_text(" ".join(self.root.xpath(f"//text()[not({condition})]")))
+
+
+class SelectolaxTree:
+    def __init__(self, html):
+        self.html = html if isinstance(html, str) else html.decode("utf-8", errors="replace")
+        self.tree = SelectolaxParser(self.html)
+
+    def iter_tags(self, *tags):
+        for node in self.tree.css(", ".join(tags)):
+            yield Node(node.tag, {k: v or "" for k, v in node.attributes.items()},
+                       lambda node=node: node.text(deep=True))
+
+    def visible_text(self):
+        # strip_tags mutates the tree, so work on a separate parse.
+        tree = SelectolaxParser(self.html)
+        tree.strip_tags(list(NON_VISIBLE_TAGS))
+        return clean_text(tree.root.text(separator=" ")) if tree.root else ""
+
+
+BACKENDS = {"lxml": LxmlTree}
+if SelectolaxParser is not None:
+    BACKENDS["selectolax"] = SelectolaxTree
+
+
+def default_backend():
+    backend = os.getenv("HTML_PARSER_BACKEND", "lxml")
+    return backend if backend in BACKENDS else "lxml"
+
+
+class HTMLDocument:
+    """
+    A page parsed once and shared by every tool that needs it.
+
+    The tree is built on first access with lxml (or selectolax when
+    installed and selected via HTML_PARSER_BACKEND), and each extraction
+    (links, meta, headings, images, text, JSON-LD) is computed lazily and
+    memoized, so asking for the same thing twice costs nothing.
+    """
+
+    def __init__(self, html, url=None, status=None, backend=None):
+        self.html = html or ""
+        self.url = url
+        self.status = status
+        self.backend = backend or default_backend()
+
+    @cached_property
+    def tree(self):
+        return BACKENDS[self.backend](self.html)
+
+    @cached_property
+    def base_url(self):
+        for node in self.tree.iter_tags("base"):
+            if node.get("href"):
+                return urljoin(self.url or "", node.get("href"))
+        return self.url or ""
+
+    def absolute(self, href):
+        return urljoin(self.base_url, href.strip())
+
+    @cached_property
+    def title(self):
+        for node in self.tree.iter_tags("title"):
+            return node.text
+        return ""
+
+    @cached_property
+    def meta(self):
+        """Maps meta name/property (lowercased) to content, first occurrence wins."""
+        meta = {}
+        for node in self.tree.iter_tags("meta"):
+            name = (node.get("name") or node.get("property") or "").strip().lower()
+            if name and name not in meta:
+                meta[name] = (node.get("content") or "").strip()
+        return meta
+
+    @cached_property
+    def canonical(self):
+        for node in self.tree.iter_tags("link"):
+            if "canonical" in (node.get("rel") or "").lower().split() and node.get("href"):
+                return self.absolute(node.get("href"))
+        return None
+
+    @cached_property
+    def anchors(self):
+        """Every <a href> as a dict with the raw 'href', absolute 'url', anchor 'text' and 'rel'."""
+        return [
+            {"href": node.get("href"), "url": self.absolute(node.get("href")),
+             "text": node.text, "rel": (node.get("rel") or "").lower()}
+            for node in self.tree.iter_tags("a") if node.get("href") is not None
+        ]
+
+    @cached_property
+    def raw_links(self):
+        return [anchor["href"] for anchor in self.anchors]
+
+    @cached_property
+    def links(self):
+        return [anchor["url"] for anchor in self.anchors]
+
+    @cached_property
+    def headings(self):
+        headings = {tag: [] for tag in HEADING_TAGS}
+        for node in self.tree.iter_tags(*HEADING_TAGS):
+            headings[node.tag].append(node.text)
+        return headings
+
+    @cached_property
+    def images(self):
+        return [
+            {"src": self.absolute(node.get("src")), "alt": node.get("alt")}
+            for node in self.tree.iter_tags("img") if node.get("src")
+        ]
+
+    @cached_property
+    def resources(self):
+        """
+        Every URL the page links to or loads: anchors, images, scripts and
+        <link> resources, as dicts with the absolute 'url', the 'tag' and a
+        short 'text' (anchor text, image alt text or link rel).
+        """
+        resources = []
+        for node in self.tree.iter_tags(*RESOURCE_ATTRS):
+            value = node.get(RESOURCE_ATTRS[node.tag])
+            if not value or not value.strip():
+                continue
+            if node.tag == "a":
+                text = node.text
+            elif node.tag == "img":
+                text = node.get("alt") or ""
+            elif node.tag == "link":
+                text = (node.get("rel") or "").lower()
+                if set(text.split()) & NON_RESOURCE_RELS:
+                    continue
+            else:
+                text = ""
+            resources.append({"url": self.absolute(value), "tag": node.tag, "text": text})
+        return resources
+
+    @cached_property
+    def text(self):
+        return self.tree.visible_text()
+
+    @cached_property
+    def json_ld(self):
+        blocks = []
+        for node in self.tree.iter_tags("script"):
+            if (node.get("type") or "").strip().lower() != "application/ld+json":
+                continue
+            try:
+                blocks.append(json.loads(node.raw_text()))
+            except ValueError:
+                logger.info(f"Skipping malformed JSON-LD block on {self.url}")
+        return blocks
+
+
+class DocumentCache:
+    """Small thread-safe LRU of recently fetched documents with a TTL."""
+
+    def __init__(self, max_entries=32, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            fetched_at, document = entry
+            if time.monotonic() - fetched_at > self.ttl:
+                del self._entries[url]
+                return None
+            self._entries.move_to_end(url)
+            return document
+
+    def put(self, url, document):
+        with self._lock:
+            self._entries[url] = (time.monotonic(), document)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+document_cache = DocumentCache()
+
+
+def fetch_document(url, timeout=10, use_cache=True):
+    """
+    Fetches and wraps a page, reusing a recently fetched copy if one of
+    the other tools already asked for the same URL.
+
+    Raises:
+        requests.RequestException: On network errors and HTTP error statuses.
+    """
+    if use_cache:
+        document = document_cache.get(url)
+        if document is not None:
+            return document
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    document = HTMLDocument(response.text, url=response.url, status=response.status_code)
+    if use_cache:
+        document_cache.put(url, document)
+    return document
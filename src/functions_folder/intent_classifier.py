@@ -1,32 +1,19 @@
 # File: functions_folder/intent_classifier.py
 
-import joblib
-import numpy as np
-from sklearn.linear_model import LogisticRegression
-from sentence_transformers import SentenceTransformer
 from collections import Counter
 from tabulate import tabulate
 
+from functions_folder.embedding_service import encode
+from functions_folder.model_registry import get_model
 from functions_folder.APP_loggerSetup import app_loggerSetup
 from functions_folder.LOCAL_loggerSetup import local_loggerSetup
 
 logger = app_loggerSetup()
 
-bert_model = SentenceTransformer('all-MiniLM-L6-v2')
-
-# Load or train classifier
-try:
-    clf = joblib.load('intent_model.pkl')
-except FileNotFoundError:
-    sample_texts = ["buy MOF membrane", "how does crystallization work?", "login issue"]
-    sample_labels = ["purchase", "informational", "support"]
-    X_train = bert_model.encode(sample_texts)
-    clf = LogisticRegression()
-    clf.fit(X_train, sample_labels)
-    joblib.dump(clf, 'intent_model.pkl')
-
 def classify_intents(text_list):
-    embeddings = bert_model.encode(text_list)
+    # Classifier is loaded from intent_model.pkl (or trained) on first use
+    clf = get_model("intent_classifier")
+    embeddings = encode(text_list)
     predictions = clf.predict(embeddings)
     return {text: intent for text, intent in zip(text_list, predictions)}
 
@@ -1,10 +1,10 @@
 # internal_link_optimizer.py
 
-from bs4 import BeautifulSoup
 import requests
 import networkx as nx
 import argparse
 
+from functions_folder.html_document import fetch_document
 from functions_folder.APP_loggerSetup import app_loggerSetup
 from functions_folder.LOCAL_loggerSetup import local_loggerSetup
 
@@ -16,17 +16,13 @@ def normalize_page_id(url):
 
 def extract_internal_links(root_url, max_links=20):
     try:
-        response = requests.get(root_url, timeout=10)
-        response.raise_for_status()
+        document = fetch_document(root_url)
     except Exception as e:
         return [], f"Error fetching root URL: {e}"
 
-    soup = BeautifulSoup(response.text, 'html.parser')
-    anchors = soup.find_all('a', href=True)
     internal_links = set()
 
-    for a in anchors:
-        href = a['href']
+    for href in document.raw_links:
         if href.startswith('/'):
             full_url = root_url.rstrip('/') + href
         elif href.startswith(root_url):
@@ -43,13 +39,10 @@ def extract_internal_links(root_url, max_links=20):
 
 def fetch_page_title(url, slug):
     try:
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        title_tag = soup.find('title')
+        document = fetch_document(url, timeout=5)
         if slug == "home":
             return "Homepage"
-        return title_tag.text.strip() if title_tag else "Untitled"
+        return document.title or "Untitled"
     except Exception:
         return "Homepage" if slug == "home" else "Title not available"
 
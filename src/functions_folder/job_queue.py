@@ -0,0 +1,335 @@
+# File: functions_folder/job_queue.py
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from functions_folder.crawl_store import connect
+from functions_folder.APP_loggerSetup import app_loggerSetup
+from functions_folder.LOCAL_loggerSetup import local_loggerSetup
+
+logger = app_loggerSetup()
+
+DEFAULT_DB_PATH = "crawl_data/jobs.db"
+# Per-tool worker limits, e.g. JOB_CONCURRENCY="ranking_forecast=2,website_crawler=4";
+# tools not listed keep the limit they were registered with.
+JOB_CONCURRENCY = os.getenv("JOB_CONCURRENCY", "")
+# Finished jobs (and their results) older than this are deleted.
+KEEP_DAYS = float(os.getenv("JOB_KEEP_DAYS", 7))
+# Progress is written at most this often (seconds); the final update always is.
+PROGRESS_INTERVAL = 0.5
+POOLS = ("thread", "process")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    tool TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    owner_pid INTEGER,
+    worker_pid INTEGER,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+"""
+
+
+def db_path(path=None):
+    return path or os.getenv("JOBS_DB", DEFAULT_DB_PATH)
+
+
+def open_db(path=None):
+    conn = connect(db_path(path))
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def parse_concurrency(spec):
+    """'tool=2,other=1' -> {'tool': 2, 'other': 1}; malformed entries are ignored."""
+    limits = {}
+    for item in spec.split(","):
+        tool, _, value = item.partition("=")
+        if tool.strip() and value.strip().isdigit() and int(value) > 0:
+            limits[tool.strip()] = int(value)
+    return limits
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def load_target(target):
+    """'package.module:function' -> the function (importable in a worker process too)."""
+    module_name, _, function_name = target.partition(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+class JobStore:
+    """
+    SQLite-backed job state shared by the web process and its workers: one
+    row per job with its tool, JSON params, status ('queued', 'running',
+    'done' or 'failed'), progress, JSON result or error, and timestamps.
+    Each call uses its own short-lived connection, so worker threads and
+    processes can write progress while the web workers read it.
+    """
+
+    def __init__(self, path=None):
+        self.path = db_path(path)
+        self._created = False
+
+    def _connect(self):
+        # The schema is created on first use, so importing the queue touches no files
+        if not self._created:
+            conn = open_db(self.path)
+            self._created = True
+            return conn
+        return connect(self.path)
+
+    def _execute(self, sql, params=()):
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(sql, params).rowcount
+        finally:
+            conn.close()
+
+    def create(self, tool, params):
+        job_id = uuid.uuid4().hex
+        self._execute("INSERT INTO jobs (job_id, tool, status, params, owner_pid, created_at) "
+                      "VALUES (?, ?, 'queued', ?, ?, ?)",
+                      (job_id, tool, json.dumps(params), os.getpid(), time.time()))
+        return job_id
+
+    def start(self, job_id):
+        self._execute("UPDATE jobs SET status = 'running', worker_pid = ?, started_at = ? WHERE job_id = ?",
+                      (os.getpid(), time.time(), job_id))
+
+    def progress(self, job_id, fraction, message=None):
+        self._execute("UPDATE jobs SET progress = ?, message = COALESCE(?, message) WHERE job_id = ?",
+                      (min(max(float(fraction), 0.0), 1.0), message, job_id))
+
+    def finish(self, job_id, result=None, error=None):
+        """Stores the result (or error) of a job that has not finished yet; returns whether it did."""
+        return self._execute(
+            "UPDATE jobs SET status = ?, progress = CASE WHEN ? IS NULL THEN 1 ELSE progress END, "
+            "result = ?, error = ?, finished_at = ? WHERE job_id = ? AND status NOT IN ('done', 'failed')",
+            ("failed" if error else "done", error, None if error else json.dumps(result, default=str),
+             error, time.time(), job_id)
+        ) > 0
+
+    def get(self, job_id):
+        """
+        Returns:
+            dict: The job with params and result decoded, or None if it does not exist.
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def counts(self):
+        """{tool: {status: jobs}} of the jobs currently stored."""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT tool, status, COUNT(*) AS jobs FROM jobs GROUP BY tool, status").fetchall()
+        finally:
+            conn.close()
+        counts = {}
+        for row in rows:
+            counts.setdefault(row["tool"], {})[row["status"]] = row["jobs"]
+        return counts
+
+    def recover(self):
+        """Fails the unfinished jobs whose owning web process is gone (e.g. the server restarted)."""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT job_id, owner_pid FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        finally:
+            conn.close()
+        lost = [row["job_id"] for row in rows if not pid_alive(row["owner_pid"])]
+        for job_id in lost:
+            self.finish(job_id, error="Interrupted: the server restarted before the job finished. Please resubmit it.")
+        return len(lost)
+
+    def purge(self, keep_days=KEEP_DAYS):
+        return self._execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                             (time.time() - keep_days * 86400,))
+
+
+def run_job(path, job_id, target, params):
+    """
+    Runs one job in a pool worker (thread or process) and stores its outcome.
+
+    The target is called as target(progress, **params), where progress(fraction,
+    message=None) reports how far it got; it must return something JSON-serializable.
+    """
+    store = JobStore(path)
+    store.start(job_id)
+    last_write = [0.0]
+
+    def progress(fraction, message=None):
+        now = time.monotonic()
+        if now - last_write[0] >= PROGRESS_INTERVAL or fraction >= 1:
+            last_write[0] = now
+            store.progress(job_id, fraction, message)
+
+    try:
+        result = load_target(target)(progress, **params)
+    except Exception as e:
+        logger.error(f"Job {job_id} ({target}) failed: {e}")
+        store.finish(job_id, error=str(e) or type(e).__name__)
+        return
+    store.finish(job_id, result=result)
+
+
+class JobQueue:
+    """
+    Runs long tool calls off the request thread.
+
+    Each tool is registered with a target function, a pool kind and a
+    concurrency limit: I/O-bound tools (crawls, Lighthouse, model calls that
+    release the GIL) run on a thread pool, CPU-bound ones on a process pool,
+    and each tool gets its own pool of at most `concurrency` workers, so a
+    burst of forecasts queues behind its limit instead of starving the web
+    workers or the other tools. Pools start on first use.
+
+    State, progress and results live in a JobStore, so any web worker can
+    serve a job's status page and results survive the request. Limits are
+    per web process; set JOB_CONCURRENCY with the number of Passenger
+    processes in mind.
+    """
+
+    def __init__(self, path=None, limits=None):
+        self.store = JobStore(path)
+        self._tools = {}
+        self._pools = {}
+        self._limits = parse_concurrency(JOB_CONCURRENCY) if limits is None else limits
+        self._lock = threading.Lock()
+        self._recovered = False
+
+    def register(self, tool, target, pool="thread", concurrency=1):
+        """
+        Registers a tool; nothing is started yet.
+
+        Args:
+            tool (str): Tool name jobs are submitted under.
+            target (str): 'package.module:function' called as function(progress, **params).
+            pool (str): 'thread' or 'process'.
+            concurrency (int): Jobs of this tool run at once (JOB_CONCURRENCY overrides).
+        """
+        if pool not in POOLS:
+            raise ValueError(f"Unknown pool '{pool}'; expected one of {', '.join(POOLS)}")
+        with self._lock:
+            self._tools[tool] = {"target": target, "pool": pool,
+                                 "concurrency": self._limits.get(tool, concurrency)}
+
+    def tools(self):
+        return list(self._tools)
+
+    def _pool(self, tool):
+        with self._lock:
+            if tool not in self._pools:
+                spec = self._tools[tool]
+                if spec["pool"] == "process":
+                    # Forking the threaded web process could copy a lock some other thread
+                    # holds; forkserver workers start from a clean single-threaded server
+                    self._pools[tool] = ProcessPoolExecutor(max_workers=spec["concurrency"],
+                                                            mp_context=multiprocessing.get_context("forkserver"))
+                else:
+                    self._pools[tool] = ThreadPoolExecutor(max_workers=spec["concurrency"],
+                                                           thread_name_prefix=f"job-{tool}")
+            return self._pools[tool]
+
+    def submit(self, tool, params):
+        """
+        Queues a job and returns at once.
+
+        Args:
+            tool (str): A registered tool.
+            params (dict): JSON-serializable keyword arguments of the tool's target.
+
+        Returns:
+            str: The job ID to poll with get().
+        """
+        if tool not in self._tools:
+            raise ValueError(f"Unknown tool '{tool}'")
+        if not self._recovered:
+            self._recovered = True
+            self.store.recover()
+            self.store.purge()
+        job_id = self.store.create(tool, params)
+        future = self._pool(tool).submit(run_job, self.store.path, job_id, self._tools[tool]["target"], params)
+        future.add_done_callback(lambda done: self._check(job_id, done))
+        return job_id
+
+    def _check(self, job_id, future):
+        # run_job stores its own outcome; this catches what it cannot (a killed worker process)
+        error = None if future.cancelled() else future.exception()
+        if future.cancelled() or error is not None:
+            if self.store.finish(job_id, error=f"Worker failed: {error or 'cancelled'}"):
+                logger.error(f"Job {job_id} lost its worker: {error or 'cancelled'}")
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def report(self):
+        """
+        Returns:
+            dict: Per tool: pool kind, concurrency, whether the pool has
+            started and the stored jobs by status.
+        """
+        counts = self.store.counts()
+        return {
+            tool: {"pool": spec["pool"], "concurrency": spec["concurrency"], "started": tool in self._pools,
+                   "jobs": counts.get(tool, {})}
+            for tool, spec in self._tools.items()
+        }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.shutdown(wait=wait)
+
+
+job_queue = JobQueue()
+
+
+# 🔧 Local test block
+if __name__ == "__main__":
+    logger = local_loggerSetup(use_filename=__file__)
+    parser = argparse.ArgumentParser(description="Inspect stored background jobs")
+    parser.add_argument('--job', default=None, help='Show this job')
+    parser.add_argument('--db', default=None, help='Jobs database (default JOBS_DB or crawl_data/jobs.db)')
+    args = parser.parse_args()
+
+    store = JobStore(args.db)
+    if args.job:
+        logger.info(json.dumps(store.get(args.job), indent=2, default=str))
+    else:
+        logger.info(f"Jobs by tool and status: {store.counts()}")
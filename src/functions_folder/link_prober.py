@@ -0,0 +1,265 @@
+# File: functions_folder/link_prober.py
+
+import argparse
+import asyncio
+import atexit
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import aiohttp
+
+from functions_folder.background_loop import background_loop, run_coroutine
+from functions_folder.robots_sitemap import USER_AGENT
+from functions_folder.APP_loggerSetup import app_loggerSetup
+from functions_folder.LOCAL_loggerSetup import local_loggerSetup
+
+logger = app_loggerSetup()
+
+# Statuses with which servers commonly reject HEAD even though GET works.
+HEAD_REJECTED = {400, 403, 405, 501}
+# Statuses worth asking again after a pause; 429/503 may say how long in Retry-After.
+RETRY_STATUSES = {429, 502, 503, 504}
+# Network errors that are usually momentary, unlike DNS or certificate failures.
+TRANSIENT_ERRORS = (asyncio.TimeoutError, aiohttp.ServerDisconnectedError, aiohttp.ClientOSError)
+PERMANENT_ERRORS = tuple(getattr(aiohttp, name) for name in ("ClientConnectorDNSError", "ClientSSLError")
+                         if hasattr(aiohttp, name))
+
+# error_class of links that were not probed because their host's circuit is open.
+HOST_UNREACHABLE = "HostUnreachable"
+
+
+def set_error(result, exc):
+    result["error"] = str(exc) or type(exc).__name__
+    result["error_class"] = type(exc).__name__
+
+
+def is_transient(exc):
+    return isinstance(exc, TRANSIENT_ERRORS) and not isinstance(exc, PERMANENT_ERRORS)
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker. After `threshold` consecutive probes of a
+    host fail without any HTTP response, the host is considered down and
+    its circuit opens: further links to it are not probed for `cooldown`
+    seconds. After that one probe is let through; an answer closes the
+    circuit again, another failure re-opens it.
+    """
+
+    def __init__(self, threshold=3, cooldown=60):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = {}
+        self._opened_at = {}
+
+    def allow(self, host):
+        opened_at = self._opened_at.get(host)
+        if opened_at is None:
+            return True
+        if time.monotonic() - opened_at >= self.cooldown:
+            # Half-open: let this probe through and hold the others back until it reports.
+            self._opened_at[host] = time.monotonic()
+            return True
+        return False
+
+    def record(self, host, ok):
+        if ok:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            return
+        self._failures[host] = self._failures.get(host, 0) + 1
+        if self._failures[host] >= self.threshold:
+            if host not in self._opened_at:
+                logger.info(f"Circuit opened for {host} after {self._failures[host]} failed probes")
+            self._opened_at[host] = time.monotonic()
+
+    def is_open(self, host):
+        return host in self._opened_at
+
+
+class LinkProber:
+    """
+    Checks whether URLs resolve without downloading their bodies.
+
+    Each URL gets a HEAD request; servers that reject HEAD (or drop the
+    connection) are asked again with a GET for the first byte only. At
+    most `concurrency` probes run at once, and at most `per_host` against
+    a single host. The aiohttp session is created on first use and kept,
+    with its connection pool capped at `pool_size` (`pool_per_host` per
+    host) and DNS answers cached for `dns_ttl` seconds, so it should live
+    on one long-running loop, such as the shared background loop.
+
+    Timeouts, dropped connections and 429/502/503/504 answers are retried
+    up to `retries` times with jittered exponential backoff, or after the
+    server's Retry-After when it is at most `max_retry_after` seconds. A
+    per-host CircuitBreaker stops probing hosts that are clearly down;
+    their remaining links are reported as HOST_UNREACHABLE.
+    """
+
+    def __init__(self, concurrency=50, per_host=6, timeout=10, connect_timeout=5, pool_size=100,
+                 pool_per_host=10, dns_ttl=300, retries=2, backoff=0.5, max_backoff=8,
+                 max_retry_after=30, breaker=None):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.pool_size = pool_size
+        self.pool_per_host = pool_per_host
+        self.dns_ttl = dns_ttl
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.breaker = breaker or CircuitBreaker()
+        self._session = None
+        self._semaphore = None
+        self._host_semaphores = {}
+
+    async def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.pool_per_host,
+                                             ttl_dns_cache=self.dns_ttl, use_dns_cache=True)
+            timeout = aiohttp.ClientTimeout(total=self.timeout, sock_connect=self.connect_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, headers={"User-Agent": USER_AGENT},
+                                                  timeout=timeout)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._host_semaphores = {}
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def request(self, session, method, url):
+        headers = {"Range": "bytes=0-0"} if method == "GET" else None
+        async with session.request(method, url, headers=headers, allow_redirects=True) as response:
+            status = response.status
+            if method == "GET" and status in (206, 416):
+                # Ranged GET answered: the resource exists (416 = it is empty).
+                status = 200
+            return status, str(response.url), response.headers.get("Retry-After")
+
+    async def attempt(self, session, url, result):
+        """
+        One HEAD (plus GET fallback) round. Fills in `result` and returns
+        the Retry-After header and the exception of the final request.
+        """
+        result.update(status=None, method="HEAD", final_url=None, error=None, error_class=None)
+        retry_after, error = None, None
+        fall_back = False
+        try:
+            result["status"], result["final_url"], retry_after = await self.request(session, "HEAD", url)
+            fall_back = result["status"] in HEAD_REJECTED
+        except aiohttp.ServerDisconnectedError as e:  # some servers just hang up on HEAD
+            set_error(result, e)
+            fall_back, error = True, e
+        except Exception as e:
+            set_error(result, e)
+            error = e
+
+        if fall_back:
+            result["method"] = "GET"
+            try:
+                result["status"], result["final_url"], retry_after = await self.request(session, "GET", url)
+                result["error"] = result["error_class"] = None
+                error = None
+            except Exception as e:
+                result["status"] = None
+                set_error(result, e)
+                error = e
+        return retry_after, error
+
+    def retry_delay(self, result, retry_after, error, attempt):
+        """Seconds to wait before the next attempt, or None if the result should stand."""
+        if attempt >= self.retries:
+            return None
+        if result["status"] is None:
+            if error is None or not is_transient(error):
+                return None
+        elif result["status"] not in RETRY_STATUSES:
+            return None
+
+        if result["status"] in (429, 503):
+            wait = parse_retry_after(retry_after)
+            if wait is not None:
+                # A long Retry-After is an answer in itself; don't hold the run up for it.
+                return wait if wait <= self.max_retry_after else None
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def probe(self, url):
+        """
+        Returns:
+            dict: 'url', 'status' (int, or None on network errors), 'method'
+            used for the final answer, 'final_url' after redirects, 'error'
+            and 'error_class' (exception name, or HOST_UNREACHABLE) on
+            failure, 'attempts' and 'elapsed_ms'.
+        """
+        session = await self.session()
+        host = urlparse(url).netloc
+        host_semaphore = self._host_semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        result = {"url": url, "status": None, "method": "HEAD", "final_url": None, "error": None,
+                  "error_class": None, "attempts": 0}
+        started = time.perf_counter()
+        async with host_semaphore:
+            for attempt in range(self.retries + 1):
+                if not self.breaker.allow(host):
+                    result.update(status=None, error="Host unreachable", error_class=HOST_UNREACHABLE)
+                    break
+                # The global slot is only held while a request is in flight, not during backoff.
+                async with self._semaphore:
+                    retry_after, error = await self.attempt(session, url, result)
+                result["attempts"] = attempt + 1
+                wait = self.retry_delay(result, retry_after, error, attempt)
+                if wait is None:
+                    break
+                await asyncio.sleep(wait)
+            if result["error_class"] != HOST_UNREACHABLE:
+                self.breaker.record(host, ok=result["status"] is not None)
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000)
+        return result
+
+    async def probe_many(self, urls):
+        return await asyncio.gather(*(self.probe(url) for url in urls))
+
+
+link_prober = LinkProber()
+
+
+@atexit.register
+def close_link_prober():
+    if link_prober._session is not None and background_loop.running:
+        try:
+            background_loop.run(link_prober.close(), timeout=5)
+        except Exception:
+            pass
+
+
+def probe_links(urls):
+    """Probes `urls` with the shared prober on the shared background loop; returns result dicts in order."""
+    return run_coroutine(link_prober.probe_many(list(urls)))
+
+
+if __name__ == "__main__":
+    logger=local_loggerSetup(use_filename=__file__)
+    parser = argparse.ArgumentParser(description="Link Prober")
+    parser.add_argument('urls', nargs='+', help='URLs to probe')
+    args = parser.parse_args()
+    for result in probe_links(args.urls):
+        logger.info(f"[{result['status'] or result['error']}] {result['url']} via {result['method']} "
+                    f"in {result['elapsed_ms']} ms")
@@ -0,0 +1,157 @@
+# File: functions_folder/link_status_cache.py
+
+import os
+import time
+from collections import defaultdict
+
+from functions_folder.crawl_store import connect
+from functions_folder.link_prober import HOST_UNREACHABLE, probe_links
+from functions_folder.url_canonicalizer import link_target
+from functions_folder.APP_loggerSetup import app_loggerSetup
+
+logger = app_loggerSetup()
+
+DEFAULT_CACHE_PATH = "crawl_data/link_status.db"
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Seconds a probe result stays fresh, by outcome class (see status_class()). Each can be
+# overridden with LINK_STATUS_TTL_<CLASS>, e.g. LINK_STATUS_TTL_5XX=600.
+DEFAULT_TTLS = {
+    "2xx": 7 * DAY,
+    "3xx": DAY,
+    "4xx": DAY,
+    "5xx": HOUR,
+    "timeout": 15 * 60,
+    "network": HOUR,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS link_status (
+    url TEXT PRIMARY KEY,
+    status INTEGER,
+    final_url TEXT,
+    error TEXT,
+    error_class TEXT,
+    checked_at REAL NOT NULL
+);
+"""
+
+
+def status_class(status, error_class=None):
+    if status is not None:
+        return f"{min(max(status // 100, 1), 5)}xx"
+    if error_class and "Timeout" in error_class:
+        return "timeout"
+    return "network"
+
+
+def configured_ttls():
+    return {name: int(os.getenv(f"LINK_STATUS_TTL_{name.upper()}", ttl)) for name, ttl in DEFAULT_TTLS.items()}
+
+
+def cache_key(url):
+    """The fragment and the case of scheme and host never change a link's status; the rest can (/docs vs /docs/)."""
+    return link_target(url) or url
+
+
+class LinkStatusCache:
+    """
+    SQLite cache of link probe results shared by every checker run.
+
+    Entries are keyed by link target (see cache_key()) and stay fresh for a TTL chosen
+    by their outcome class: a 200 is trusted for a week, a 5xx or a
+    timeout for minutes. `ttls` overrides any of DEFAULT_TTLS and of the
+    LINK_STATUS_TTL_* environment variables.
+    """
+
+    def __init__(self, path=None, ttls=None):
+        self.path = path or os.getenv("LINK_STATUS_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self.ttls = dict(configured_ttls(), **(ttls or {}))
+        self.conn = connect(self.path)
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def is_fresh(self, row, now=None):
+        ttl = self.ttls[status_class(row["status"], row["error_class"])]
+        return (now or time.time()) - row["checked_at"] <= ttl
+
+    def get_many(self, urls):
+        """Returns {url: result dict} for the URLs with a fresh entry."""
+        now = time.time()
+        keys = defaultdict(list)
+        for url in urls:
+            keys[cache_key(url)].append(url)
+        fresh = {}
+        key_list = list(keys)
+        for start in range(0, len(key_list), 500):
+            chunk = key_list[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT * FROM link_status WHERE url IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for row in rows:
+                if not self.is_fresh(row, now):
+                    continue
+                for url in keys[row["url"]]:
+                    fresh[url] = {"url": url, "status": row["status"], "method": "cache",
+                                  "final_url": row["final_url"], "error": row["error"],
+                                  "error_class": row["error_class"], "checked_at": row["checked_at"],
+                                  "cached": True}
+        return fresh
+
+    def put_many(self, results):
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO link_status (url, status, final_url, error, error_class, checked_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(cache_key(r["url"]), r["status"], r["final_url"], r["error"], r["error_class"], now) for r in results]
+        )
+        self.conn.commit()
+
+    def purge_expired(self):
+        """Deletes entries older than the longest TTL; returns how many were removed."""
+        cursor = self.conn.execute("DELETE FROM link_status WHERE checked_at < ?",
+                                   (time.time() - max(self.ttls.values()),))
+        self.conn.commit()
+        return cursor.rowcount
+
+
+def check_links(urls, use_cache=True, cache_path=None, ttls=None):
+    """
+    Probes links, answering from the link-status cache where it can.
+    Only unknown or stale URLs are probed; their results are stored for
+    the next run. With `use_cache` off every link is probed (and the
+    cache still refreshed).
+
+    Returns:
+        tuple: (list of probe result dicts in the order of `urls`, with
+        'cached' set on cache answers; dict with 'cache_hits',
+        'cache_misses' and 'cache_hit_rate')
+    """
+    urls = list(urls)
+    unique = list(dict.fromkeys(urls))
+    cache = LinkStatusCache(cache_path, ttls)
+    try:
+        cached = cache.get_many(unique) if use_cache else {}
+        to_probe = [url for url in unique if url not in cached]
+        probed = probe_links(to_probe) if to_probe else []
+        # Links skipped by an open circuit were never actually probed.
+        cache.put_many([result for result in probed if result["error_class"] != HOST_UNREACHABLE])
+    finally:
+        cache.close()
+
+    by_url = dict(cached)
+    by_url.update((result["url"], dict(result, cached=False)) for result in probed)
+    stats = {
+        "cache_hits": len(cached),
+        "cache_misses": len(to_probe),
+        "cache_hit_rate": round(len(cached) / len(unique), 3) if unique else 0.0
+    }
+    logger.info(f"Link status cache: {stats['cache_hits']} hits, {stats['cache_misses']} probed "
+                f"({stats['cache_hit_rate']:.0%} hit rate)")
+    return [by_url[url] for url in urls], stats
@@ -0,0 +1,270 @@
+# File: functions_folder/model_registry.py
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+from functions_folder.APP_loggerSetup import app_loggerSetup
+from functions_folder.LOCAL_loggerSetup import local_loggerSetup
+
+logger = app_loggerSetup()
+
+# Recorded at first import, i.e. while app.py (or a CLI tool) is starting up.
+PROCESS_STARTED = time.perf_counter()
+
+MINILM = "sentence-transformers/all-MiniLM-L6-v2"
+INTENT_MODEL_PATH = "intent_model.pkl"
+
+# Libraries whose import alone costs seconds and tens of MB; the startup
+# report shows which of them a process has pulled in so far.
+HEAVY_MODULES = ("torch", "onnxruntime", "transformers", "sentence_transformers", "spacy", "keybert",
+                 "gensim", "pyLDAvis", "prophet", "xgboost", "matplotlib", "sklearn")
+
+
+def rss_mb():
+    """Current resident set size of this process in MB (None where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class ModelEntry:
+    def __init__(self, name, loader, description):
+        self.name = name
+        self.loader = loader
+        self.description = description
+        self.lock = threading.Lock()
+        self.model = None
+        self.state = "not loaded"
+        self.load_seconds = None
+        self.rss_delta_mb = None
+        self.error = None
+
+
+class ModelRegistry:
+    """
+    Loads each model on first use and keeps it for the life of the process.
+
+    Tools ask for a model by name with get() instead of loading it at
+    import time, so importing app.py (or spawning a Passenger worker) no
+    longer pays for spaCy, KeyBERT, MiniLM and friends; each one is loaded
+    by the first request that needs it. Loading is thread-safe: concurrent
+    callers of the same model wait for a single load, different models can
+    load in parallel. A failed load is not cached, so the next call retries.
+
+    warm_up() loads models on a background thread so the first user does
+    not wait either, and report() shows what startup and each model cost.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._ready_seconds = None
+
+    def register(self, name, loader, description=""):
+        """Registers a zero-argument `loader` returning the model; nothing is loaded yet."""
+        with self._lock:
+            self._entries[name] = ModelEntry(name, loader, description)
+
+    def names(self):
+        return list(self._entries)
+
+    def is_loaded(self, name):
+        return self._entries[name].state == "loaded"
+
+    def get(self, name):
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"Unknown model '{name}'")
+        if entry.state == "loaded":
+            return entry.model
+        with entry.lock:
+            if entry.state == "loaded":
+                return entry.model
+            entry.state = "loading"
+            logger.info(f"⏳ Loading model '{name}'")
+            started, rss_before = time.perf_counter(), rss_mb()
+            try:
+                model = entry.loader()
+            except Exception as e:
+                entry.state, entry.error = "failed", f"{type(e).__name__}: {e}"
+                logger.error(f"Loading model '{name}' failed: {entry.error}")
+                raise
+            entry.load_seconds = round(time.perf_counter() - started, 2)
+            rss_after = rss_mb()
+            entry.rss_delta_mb = round(rss_after - rss_before, 1) if rss_before is not None else None
+            entry.model, entry.error = model, None
+            entry.state = "loaded"
+            logger.info(f"✅ Model '{name}' loaded in {entry.load_seconds}s")
+            return model
+
+    def warm_up(self, names=None, background=True):
+        """
+        Loads `names` (None: every registered model) ahead of the first
+        request. In the background a daemon thread does the loading, one
+        model after the other, and failures are only logged.
+
+        Returns:
+            threading.Thread or None: The warm-up thread when `background`.
+        """
+        names = list(self.names() if names is None else names)
+
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception:
+                    pass  # already logged by get(); the request that needs it will retry
+
+        if not background:
+            load_all()
+            return None
+        thread = threading.Thread(target=load_all, name="model-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def mark_ready(self):
+        """Records how long the process took to become ready to serve (call at the end of app.py)."""
+        self._ready_seconds = round(time.perf_counter() - PROCESS_STARTED, 2)
+        logger.info(f"🚀 Ready to serve {self._ready_seconds}s after startup "
+                    f"({rss_mb()} MB RSS, {sum(e.state == 'loaded' for e in self._entries.values())} models loaded)")
+
+    def report(self):
+        """
+        Returns:
+            dict: 'ready_seconds' (startup until mark_ready()),
+            'uptime_seconds', 'rss_mb', 'heavy_modules_imported' and
+            'models' (state, load time and RSS growth per model).
+        """
+        return {
+            "ready_seconds": self._ready_seconds,
+            "uptime_seconds": round(time.perf_counter() - PROCESS_STARTED, 2),
+            "rss_mb": rss_mb(),
+            "heavy_modules_imported": [name for name in HEAVY_MODULES if name in sys.modules],
+            "models": {
+                entry.name: {
+                    "description": entry.description,
+                    "state": entry.state,
+                    "load_seconds": entry.load_seconds,
+                    "rss_delta_mb": entry.rss_delta_mb,
+                    "error": entry.error,
+                }
+                for entry in self._entries.values()
+            }
+        }
+
+
+# Loaders import their libraries themselves so that nothing heavy is
+# imported before a model is actually needed.
+
+def load_spacy_en():
+    import spacy
+    return spacy.load("en_core_web_sm")
+
+
+def load_minilm():
+    # fp32 PyTorch, or int8 onnxruntime with EMBEDDING_BACKEND=onnx
+    from functions_folder.embedding_service import load_embedder
+    return load_embedder(MINILM)
+
+
+def load_keybert():
+    from keybert import KeyBERT
+    from keybert.backend import BaseEmbedder
+    from functions_folder.embedding_service import encode
+
+    class SharedEmbedder(BaseEmbedder):
+        # KeyBERT's default model is the same MiniLM; use the shared one instead of loading a second copy.
+        def embed(self, documents, verbose=False):
+            return encode(documents)
+
+    return KeyBERT(model=SharedEmbedder())
+
+
+def load_intent_classifier():
+    import joblib
+    try:
+        return joblib.load(INTENT_MODEL_PATH)
+    except FileNotFoundError:
+        from sklearn.linear_model import LogisticRegression
+        from functions_folder.embedding_service import encode
+        sample_texts = ["buy MOF membrane", "how does crystallization work?", "login issue"]
+        sample_labels = ["purchase", "informational", "support"]
+        clf = LogisticRegression()
+        clf.fit(encode(sample_texts), sample_labels)
+        joblib.dump(clf, INTENT_MODEL_PATH)
+        return clf
+
+
+def load_fill_mask():
+    from transformers import pipeline
+    return pipeline("fill-mask", model="bert-base-uncased")
+
+
+def load_text_generator(model_name):
+    """
+    (tokenizer, model) of a causal language model for brief_generator.
+    GPT-2 has no padding token; the end-of-text token stands in, and
+    prompts are padded on the left so a batch of them can be continued
+    (and truncated on the left, so an overlong prompt keeps its end).
+    """
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer.pad_token = tokenizer.pad_token or tokenizer.eos_token
+    tokenizer.padding_side = "left"
+    tokenizer.truncation_side = "left"
+    model = AutoModelForCausalLM.from_pretrained(model_name).eval()
+    return tokenizer, model
+
+
+registry = ModelRegistry()
+registry.register("spacy_en", load_spacy_en, "spaCy en_core_web_sm (seo_analyzer, schema_generator)")
+registry.register("minilm", load_minilm,
+                  "all-MiniLM-L6-v2 behind the embedding service (scorer, intents, gaps, topics, KeyBERT)")
+registry.register("keybert", load_keybert, "KeyBERT on the shared MiniLM (seo_analyzer)")
+registry.register("intent_classifier", load_intent_classifier, "Logistic regression on MiniLM embeddings")
+registry.register("fill_mask", load_fill_mask, "bert-base-uncased fill-mask pipeline (headline_optimizer)")
+registry.register("gpt2", lambda: load_text_generator("gpt2"), "GPT-2 for brief FAQ answers (brief_generator)")
+registry.register("distilgpt2", lambda: load_text_generator("distilgpt2"),
+                  "DistilGPT-2: half the layers of GPT-2, faster brief FAQ answers")
+
+
+def get_model(name):
+    return registry.get(name)
+
+
+def warm_up_from_env(var="MODEL_WARMUP"):
+    """
+    Starts a background warm-up as configured by the environment:
+    MODEL_WARMUP=all warms every model, a comma-separated list warms
+    those, unset/empty keeps everything lazy. A list that names no
+    registered model warms nothing.
+    """
+    value = os.getenv(var, "").strip()
+    if not value:
+        return None
+    names = None if value.lower() == "all" else [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names or [] if name not in registry.names()]
+    if unknown:
+        logger.warning(f"{var}: unknown models {unknown} ignored")
+        names = [name for name in names if name not in unknown]
+    if names == []:  # nothing valid was asked for; None would mean every model
+        return None
+    return registry.warm_up(names)
+
+
+if __name__ == "__main__":
+    logger=local_loggerSetup(use_filename=__file__)
+    parser = argparse.ArgumentParser(description="Model registry: load models and report their cost")
+    parser.add_argument('--load', action='append', default=[], help='Model to load (repeatable, or "all")')
+    args = parser.parse_args()
+
+    names = registry.names() if "all" in args.load else args.load
+    registry.warm_up(names, background=False)
+    registry.mark_ready()
+    for name, info in registry.report()["models"].items():
+        logger.info(f"{name}: {info['state']} {info['load_seconds'] or ''} {info['error'] or ''}")
@@ -2,11 +2,6 @@
 
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
-import plotly.io as pio
-from prophet import Prophet
-from xgboost import XGBRegressor
-from sklearn.metrics import mean_squared_error
 
 from functions_folder.APP_loggerSetup import app_loggerSetup
 from functions_folder.LOCAL_loggerSetup import local_loggerSetup
@@ -32,6 +27,11 @@ def ranking_forecast_model(data: pd.DataFrame, forecast_horizon: int = 30):
     Forecasts future keyword rankings using Prophet and XGBoost.
     Returns forecasted ranks and model diagnostics.
     """
+    # Prophet and XGBoost take several seconds to import; only pay for it when forecasting
+    from prophet import Prophet
+    from xgboost import XGBRegressor
+    from sklearn.metrics import mean_squared_error
+
     if "keyword" not in data.columns:
         raise ValueError("Input data must contain a 'keyword' column.")
 
@@ -90,6 +90,9 @@ def visualize_forecast_results(forecast_data: dict) -> str:
     Generates an interactive Plotly HTML chart for keyword ranking forecast.
     Returns HTML string to embed in Flask template.
     """
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
     keyword = forecast_data.get("keyword", "Unknown Keyword")
     forecast = forecast_data.get("forecast", [])
 
@@ -1,8 +1,30 @@
 # File: functions_folder/redirect_mapper.py
 
+import argparse
+import asyncio
+import csv
+import io
+import statistics
+from collections import Counter
+from urllib.parse import urlparse
+
 import httpx
 import networkx as nx
 
+from functions_folder.background_loop import run_coroutine
+from functions_folder.APP_loggerSetup import app_loggerSetup
+from functions_folder.LOCAL_loggerSetup import local_loggerSetup
+
+logger = app_loggerSetup()
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+CSV_FIELDS = ("source_url", "hops", "final_url", "final_status", "loop_detected", "issue", "chain")
+
+
+def resolve_location(current_url, location):
+    return str(httpx.URL(current_url).join(location))
+
+
 def redirect_mapper(start_url, max_redirects=10, timeout=10):
     graph = nx.DiGraph()
     visited = set()
@@ -23,11 +45,11 @@ def redirect_mapper(start_url, max_redirects=10, timeout=10):
             visited.add(current_url)
             response = httpx.get(current_url, follow_redirects=False, timeout=timeout)
 
-            if response.status_code in (301, 302, 303, 307, 308):
+            if response.status_code in REDIRECT_STATUSES:
                 next_url = response.headers.get("location")
                 if not next_url:
                     break
-                next_url = httpx.URL(next_url, base=current_url).resolve().human_repr()
+                next_url = resolve_location(current_url, next_url)
                 graph.add_edge(current_url, next_url)
                 chain.append((current_url, response.status_code))
                 current_url = next_url
@@ -44,8 +66,215 @@ def redirect_mapper(start_url, max_redirects=10, timeout=10):
 
     except Exception as e:
         return {"error": f"Redirect mapping failed: {e}"}
-    
+
+
+class BulkRedirectResolver:
+    """
+    Resolves the redirect chains of many URLs concurrently.
+
+    Every hop (one request, one answer) is fetched once per run and
+    memoized, in-flight requests included, so thousands of legacy URLs
+    that funnel into the same chain cost one request per distinct URL.
+    Requests share one pooled httpx.AsyncClient and are capped globally
+    (`concurrency`) and per host (`per_host`). Bodies are never read.
+    """
+
+    def __init__(self, max_redirects=10, timeout=10, concurrency=50, per_host=10):
+        self.max_redirects = max_redirects
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.hops = {}
+        self.requests_made = 0
+
+    async def fetch_hop(self, client, url):
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with self._semaphore, semaphore:
+            self.requests_made += 1
+            try:
+                async with client.stream("GET", url) as response:
+                    location = response.headers.get("location")
+                    if response.status_code in REDIRECT_STATUSES and location:
+                        return response.status_code, resolve_location(url, location), None
+                    return response.status_code, None, None
+            except Exception as e:
+                return None, None, str(e) or type(e).__name__
+
+    def hop(self, client, url):
+        """(status, next_url, error) for `url`; concurrent callers share one request."""
+        task = self.hops.get(url)
+        if task is None:
+            task = self.hops[url] = asyncio.ensure_future(self.fetch_hop(client, url))
+        return task
+
+    async def resolve(self, client, start_url):
+        chain = []
+        visited = set()
+        current_url = start_url
+        status, error = None, None
+        for _ in range(self.max_redirects + 1):
+            if current_url in visited:
+                return self.chain_result(start_url, chain, current_url, None, True, None)
+            visited.add(current_url)
+            status, next_url, error = await self.hop(client, current_url)
+            chain.append((current_url, status))
+            if next_url is None:
+                break
+            current_url = next_url
+        else:
+            error = f"More than {self.max_redirects} redirects"
+        return self.chain_result(start_url, chain, current_url, status, False, error)
+
+    @staticmethod
+    def chain_result(start_url, chain, final_url, final_status, loop_detected, error):
+        return {
+            "source_url": start_url,
+            "redirect_chain": chain,
+            "loop_detected": loop_detected,
+            "final_url": final_url,
+            "final_status": final_status,
+            "hops": sum(1 for _, status in chain if status in REDIRECT_STATUSES),
+            "error": error
+        }
+
+    async def resolve_all(self, urls):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._host_semaphores = {}
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(follow_redirects=False, timeout=self.timeout, limits=limits) as client:
+            return await asyncio.gather(*(self.resolve(client, url) for url in urls))
+
+    def graph(self):
+        """All hops fetched in the run as one DiGraph; nodes carry 'status', edges the redirect 'status'."""
+        graph = nx.DiGraph()
+        for url, task in self.hops.items():
+            status, next_url, error = task.result()
+            graph.add_node(url, status=status, error=error)
+            if next_url is not None:
+                graph.add_edge(url, next_url, status=status)
+        return graph
+
+
+def chain_issue(result):
+    if result["loop_detected"]:
+        return "loop"
+    if result["error"]:
+        return "error"
+    if result["hops"] and result["final_status"] in (404, 410):
+        return "redirect_to_404"
+    if result["hops"] > 1:
+        return "multi_hop"
+    return ""
+
+
+def read_url_list(text):
+    """
+    URLs from pasted text or CSV content: the first http(s) cell of each
+    row is taken, so header rows and extra columns are ignored.
+    """
+    urls = []
+    for row in csv.reader(io.StringIO(text)):
+        for cell in row:
+            cell = cell.strip()
+            if cell.lower().startswith(("http://", "https://")):
+                urls.append(cell)
+                break
+    return list(dict.fromkeys(urls))
+
+
+def bulk_redirect_mapper(urls, max_redirects=10, timeout=10, concurrency=50, per_host=10):
+    """
+    Maps the redirects of many URLs at once, e.g. every legacy URL of a
+    site migration.
+
+    Args:
+        urls (list): URLs to resolve (see read_url_list for pasted/CSV input).
+        max_redirects (int): Longest chain followed before giving up.
+        timeout (float): Per-request timeout in seconds.
+        concurrency (int): Maximum requests in flight.
+        per_host (int): Maximum requests in flight per host.
+
+    Returns:
+        dict: 'results' (one chain per URL, same fields as redirect_mapper
+        plus 'final_status', 'hops' and 'issue'), 'graph' (one merged
+        networkx.DiGraph), 'stats' (chain length distribution and counts),
+        and the 'loops', 'redirects_to_404' and 'multi_hop' results;
+        multi-hop chains can be flattened to point straight at 'final_url'.
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {"error": "No URLs given"}
+    resolver = BulkRedirectResolver(max_redirects, timeout, concurrency, per_host)
+    try:
+        results = run_coroutine(resolver.resolve_all(urls))
+    except Exception as e:
+        return {"error": f"Redirect mapping failed: {e}"}
+
+    for result in results:
+        result["issue"] = chain_issue(result)
+    hops = [result["hops"] for result in results]
+    stats = {
+        "urls": len(urls),
+        "requests_made": resolver.requests_made,
+        "hop_distribution": dict(sorted(Counter(hops).items())),
+        "mean_hops": round(statistics.mean(hops), 2),
+        "max_hops": max(hops),
+        "errors": sum(1 for result in results if result["error"]),
+    }
+    issues = {issue: [result for result in results if result["issue"] == issue]
+              for issue in ("loop", "redirect_to_404", "multi_hop")}
+    logger.info(f"Mapped {len(urls)} URLs with {resolver.requests_made} requests: "
+                f"{len(issues['loop'])} loops, {len(issues['redirect_to_404'])} redirects to 404, "
+                f"{len(issues['multi_hop'])} multi-hop chains")
+    return {
+        "results": results,
+        "graph": resolver.graph(),
+        "stats": stats,
+        "loops": issues["loop"],
+        "redirects_to_404": issues["redirect_to_404"],
+        "multi_hop": issues["multi_hop"]
+    }
+
+
+def export_csv(results, file=None):
+    """Writes one row per source URL; returns the CSV text when no file is given."""
+    out = file or io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for result in results:
+        writer.writerow({
+            "source_url": result["source_url"],
+            "hops": result["hops"],
+            "final_url": result["final_url"],
+            "final_status": result["final_status"] if result["final_status"] is not None else result["error"] or "",
+            "loop_detected": result["loop_detected"],
+            "issue": result["issue"],
+            "chain": " -> ".join(f"{url} [{status}]" for url, status in result["redirect_chain"])
+        })
+    return out.getvalue() if file is None else None
+
 
 if __name__ == "__main__":
-    result=redirect_mapper("https://www.seomasterz.com/")
-    print(result)
\ No newline at end of file
+    logger=local_loggerSetup(use_filename=__file__)
+    parser = argparse.ArgumentParser(description="Redirect Mapper")
+    parser.add_argument('--url', default="https://www.seomasterz.com/", help='URL to follow')
+    parser.add_argument('--url_file', default=None, help='Text or CSV file of URLs for bulk mapping')
+    parser.add_argument('--output', default=None, help='CSV report path (bulk mode)')
+    parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight (bulk mode)')
+    args = parser.parse_args()
+
+    if args.url_file:
+        with open(args.url_file, encoding="utf-8") as f:
+            result = bulk_redirect_mapper(read_url_list(f.read()), concurrency=args.concurrency)
+        if "error" in result:
+            logger.error(result["error"])
+        else:
+            logger.info(result["stats"])
+            if args.output:
+                with open(args.output, "w", newline="", encoding="utf-8") as f:
+                    export_csv(result["results"], f)
+                logger.info(f"✅ Report written to {args.output}")
+    else:
+        result=redirect_mapper(args.url)
+        print(result)
@@ -0,0 +1,211 @@
+# File: functions_folder/robots_sitemap.py
+
+import asyncio
+import threading
+import time
+import zlib
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+import aiohttp
+
+from functions_folder.APP_loggerSetup import app_loggerSetup
+
+logger = app_loggerSetup()
+
+USER_AGENT = "Rank4SureBot/1.0 (+https://rank4sure.com/aio)"
+ROBOTS_TTL = 3600
+ROBOTS_ERROR_TTL = 300
+MAX_SITEMAP_NESTING = 3
+CHUNK_SIZE = 64 * 1024
+
+
+class RobotsRules:
+    """Parsed robots.txt of one host plus the time it was fetched."""
+
+    def __init__(self, parser, fetched_at, ttl):
+        self.parser = parser
+        self.fetched_at = fetched_at
+        self.ttl = ttl
+
+    @property
+    def expired(self):
+        return time.monotonic() - self.fetched_at > self.ttl
+
+    def can_fetch(self, url, user_agent=USER_AGENT):
+        return self.parser.can_fetch(user_agent, url)
+
+    def crawl_delay(self, user_agent=USER_AGENT):
+        delay = self.parser.crawl_delay(user_agent)
+        if delay is None:
+            rate = self.parser.request_rate(user_agent)
+            if rate:
+                delay = rate.seconds / rate.requests
+        return float(delay) if delay else None
+
+    def sitemaps(self):
+        return self.parser.site_maps() or []
+
+
+def parse_robots(text):
+    parser = RobotFileParser()
+    parser.parse(text.splitlines())
+    return parser
+
+
+class RobotsCache:
+    """
+    Per-host robots.txt rules shared by every crawl in the process.
+
+    Each host's file is fetched once and reused until its TTL runs out;
+    concurrent requests for the same host wait on a single fetch. As in
+    urllib.robotparser, 401/403 disallows everything and other 4xx
+    allow everything; unreachable files allow everything but are
+    retried sooner.
+    """
+
+    def __init__(self, ttl=ROBOTS_TTL, error_ttl=ROBOTS_ERROR_TTL):
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self._rules = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock(self, host):
+        loop = asyncio.get_running_loop()
+        with self._guard:
+            owner, lock = self._locks.get(host, (None, None))
+            if owner is not loop:
+                lock = asyncio.Lock()
+                self._locks[host] = (loop, lock)
+            return lock
+
+    async def rules_for(self, session, url, timeout=10):
+        parts = urlparse(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        rules = self._rules.get(host)
+        if rules is not None and not rules.expired:
+            return rules
+
+        async with self._lock(host):
+            rules = self._rules.get(host)
+            if rules is None or rules.expired:
+                rules = await self._fetch(session, host, timeout)
+                self._rules[host] = rules
+        return rules
+
+    async def _fetch(self, session, host, timeout):
+        parser = RobotFileParser()
+        ttl = self.ttl
+        try:
+            async with session.get(f"{host}/robots.txt", timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                if response.status in (401, 403):
+                    parser.disallow_all = True
+                elif 400 <= response.status < 500:
+                    parser.allow_all = True
+                elif response.status >= 500:
+                    parser.allow_all = True
+                    ttl = self.error_ttl
+                else:
+                    parser = parse_robots(await response.text(errors='replace'))
+        except Exception as e:
+            logger.info(f"Could not fetch robots.txt for {host}: {e}")
+            parser.allow_all = True
+            ttl = self.error_ttl
+        return RobotsRules(parser, time.monotonic(), ttl)
+
+
+robots_cache = RobotsCache()
+
+
+def local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def inflate(decompressor, chunk):
+    """Gunzips `chunk` in CHUNK_SIZE pieces; sitemaps compress well enough to explode otherwise."""
+    while chunk:
+        yield decompressor.decompress(chunk, CHUNK_SIZE)
+        chunk = decompressor.unconsumed_tail
+
+
+async def iter_sitemap_urls(session, sitemap_url, max_urls=None, timeout=30, _nesting=0):
+    """
+    Streams page URLs out of a sitemap or sitemap index.
+
+    The body is read in chunks, gunzipped on the fly when it is a .gz
+    file, and fed to an incremental XML parser; each <url> element is
+    cleared once its <loc> has been yielded, so a 50,000-URL sitemap
+    never sits in memory as a whole. Sitemap indexes are followed up to
+    MAX_SITEMAP_NESTING levels deep.
+
+    Yields:
+        str: Absolute page URLs, at most `max_urls` in total.
+    """
+    yielded = 0
+    child_sitemaps = []
+    try:
+        async with session.get(sitemap_url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                logger.info(f"Sitemap {sitemap_url} returned {response.status}")
+                return
+
+            parser = XMLPullParser(events=("start", "end"))
+            decompressor = None
+            first_chunk = True
+            root = root_elem = None
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                if first_chunk:
+                    first_chunk = False
+                    if chunk[:2] == b"\x1f\x8b":
+                        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                for piece in (inflate(decompressor, chunk) if decompressor else (chunk,)):
+                    parser.feed(piece)
+                    for event, elem in parser.read_events():
+                        name = local_name(elem.tag)
+                        if event == "start":
+                            if root is None:
+                                root, root_elem = name, elem
+                            continue
+                        if name != "loc":
+                            if name in ("url", "sitemap"):
+                                # Drop finished entries so the tree never grows.
+                                root_elem.clear()
+                            continue
+                        loc = (elem.text or "").strip()
+                        if not loc:
+                            continue
+                        if root == "sitemapindex":
+                            child_sitemaps.append(urljoin(sitemap_url, loc))
+                        else:
+                            yield urljoin(sitemap_url, loc)
+                            yielded += 1
+                            if max_urls is not None and yielded >= max_urls:
+                                return
+            if decompressor:
+                parser.feed(decompressor.flush())
+            parser.close()
+    except ParseError as e:
+        logger.info(f"Malformed sitemap {sitemap_url}: {e}")
+    except Exception as e:
+        logger.info(f"Could not read sitemap {sitemap_url}: {e}")
+
+    if _nesting >= MAX_SITEMAP_NESTING:
+        return
+    for child in child_sitemaps:
+        remaining = None if max_urls is None else max_urls - yielded
+        if remaining is not None and remaining <= 0:
+            return
+        async for url in iter_sitemap_urls(session, child, remaining, timeout, _nesting + 1):
+            yield url
+            yielded += 1
+
+
+async def discover_sitemaps(session, start_url, robots=None):
+    """Sitemaps declared in robots.txt, or /sitemap.xml when there are none."""
+    declared = robots.sitemaps() if robots else []
+    if declared:
+        return declared
+    parts = urlparse(start_url)
+    return [f"{parts.scheme}://{parts.netloc}/sitemap.xml"]
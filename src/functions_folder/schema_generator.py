@@ -1,19 +1,17 @@
 # File: functions_folder/schema_generator.py
 
-import spacy
 import json
 from typing import Dict
 
+from functions_folder.model_registry import get_model
 from functions_folder.APP_loggerSetup import app_loggerSetup
 from functions_folder.LOCAL_loggerSetup import local_loggerSetup
 
 logger = app_loggerSetup()
 
-# Load spaCy model (English by default)
-nlp = spacy.load("en_core_web_sm")
-
 def generate_schema_ld(text: str, schema_type: str = "Article") -> Dict:
-    doc = nlp(text)
+    # spaCy en_core_web_sm, shared with seo_analyzer and loaded on first use
+    doc = get_model("spacy_en")(text)
     
     # Extract named entities
     entities = []
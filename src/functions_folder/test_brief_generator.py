@@ -0,0 +1,82 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+import torch
+from functions_folder import brief_generator
+from functions_folder.brief_generator import (FAILED_ANSWER, MAX_NEW_TOKENS, faq_prompt, generate_answers,
+                                              generate_brief, stream_brief)
+
+SEED = "Technical audits improve crawling, indexing, rankings, backlinks and snippets for ecommerce websites"
+
+class WordTokenizer:
+    """One token per word, left-padded with 0, like the GPT-2 tokenizer from load_text_generator."""
+    pad_token_id = 0
+
+    def __call__(self, prompts, max_length=None, **kwargs):
+        lengths = [min(len(prompt.split()), max_length or 2 ** 31) for prompt in prompts]
+        ids = torch.tensor([[0] * (max(lengths) - n) + [1] * n for n in lengths])
+        return {"input_ids": ids, "attention_mask": (ids != 0).long()}
+
+    def decode(self, ids, skip_special_tokens=True):
+        return " ".join("word" for token in ids.tolist() if token != self.pad_token_id)
+
+class EchoModel:
+    config = SimpleNamespace(max_position_embeddings=1024)
+
+    def generate(self, input_ids, attention_mask, max_new_tokens, **kwargs):
+        return torch.cat([input_ids, torch.full((input_ids.shape[0], max_new_tokens), 7)], dim=1)
+
+class TestBriefGenerator(unittest.TestCase):
+    def setUp(self):
+        brief_generator.answer_cache.clear()
+        self.addCleanup(brief_generator.answer_cache.clear)
+
+    def test_faqs_generated_in_one_batch_then_cached(self):
+        def answers(prompts, model):
+            return [f"{model} answer {i}" for i in range(len(prompts))]
+
+        with mock.patch.object(brief_generator, "generate_answers", side_effect=answers) as generate:
+            first = generate_brief(SEED, faq_count=4, model="distilgpt2")
+            self.assertEqual(generate.call_count, 1)
+            self.assertEqual(len(generate.call_args[0][0]), 4)
+            again = generate_brief(SEED, faq_count=4, model="distilgpt2")
+            self.assertEqual(generate.call_count, 1)  # every answer came from the cache
+            generate_brief(SEED, faq_count=4, model="gpt2")
+            self.assertEqual(generate.call_count, 2)  # the cache is per model
+        self.assertEqual(len(first["faqs"]), 4)
+        self.assertTrue(all(faq["answer"].startswith("distilgpt2 answer") for faq in first["faqs"]))
+        self.assertEqual({faq["question"] for faq in again["faqs"]}, {faq["question"] for faq in first["faqs"]})
+
+    def test_failed_generation_is_reported_not_cached(self):
+        with mock.patch.object(brief_generator, "generate_answers", side_effect=RuntimeError("no model")) as generate:
+            result = generate_brief(SEED, faq_count=2)
+            generate_brief(SEED, faq_count=2)
+        self.assertEqual([faq["answer"] for faq in result["faqs"]], [FAILED_ANSWER] * 2)
+        self.assertEqual(generate.call_count, 2)
+        self.assertTrue(result["h1"].startswith("Overview of"))
+
+    def test_stream_sends_outline_first_then_tokens_and_caches_answers(self):
+        def answers(prompts, model, on_token, stop_event):
+            for row in range(len(prompts)):
+                on_token(row, "streamed ")
+                on_token(row, f"answer {row}")
+            return [f"streamed answer {row}" for row in range(len(prompts))]
+
+        with mock.patch.object(brief_generator, "generate_answers", side_effect=answers) as generate:
+            events = list(stream_brief(SEED, faq_count=3))
+            cached = list(stream_brief(SEED, faq_count=3))
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(events[0]["event"], "outline")
+        self.assertEqual(len(events[0]["questions"]), 3)
+        self.assertEqual(events[-1]["event"], "done")
+        tokens = [event for event in events if event["event"] == "token"]
+        self.assertEqual(len(tokens), 6)
+        self.assertLess(events.index(tokens[0]), next(i for i, e in enumerate(events) if e["event"] == "answer"))
+        self.assertEqual([e["event"] for e in cached], ["outline", "answer", "answer", "answer", "done"])
+        self.assertEqual({e["answer"] for e in cached[1:4]}, {f"streamed answer {row}" for row in range(3)})
+
+    def test_long_seed_still_gets_full_answers(self):
+        long_seed = " ".join(["crawl budget"] * 200)
+        with mock.patch.object(brief_generator, "get_model", return_value=(WordTokenizer(), EchoModel())):
+            answers = generate_answers([faq_prompt(long_seed, "indexing"), faq_prompt(SEED, "audits")])
+        self.assertEqual([len(answer.split()) for answer in answers], [MAX_NEW_TOKENS] * 2)
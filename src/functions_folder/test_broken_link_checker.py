@@ -0,0 +1,26 @@
+import unittest
+from functions_folder.broken_link_checker import collect_references
+
+PAGE = ('<html><body><a href="/docs/#top">Docs</a><a href="/a%2Fb/">Encoded</a>'
+        '<a href="HTTPS://Example.com/about">About</a><a href="mailto:x@example.com">Mail</a></body></html>')
+
+class TestCollectReferences(unittest.TestCase):
+    def test_targets_are_kept_as_linked(self):
+        pages = [{"url": "https://example.com/", "status": 200, "html": PAGE},
+                 {"url": "https://example.com/about", "status": 304, "html": None}]
+        references, known, page_count = collect_references(pages)
+        self.assertEqual(set(references), {"https://example.com/docs/", "https://example.com/a%2Fb/",
+                                           "https://example.com/about"})
+        self.assertEqual(references["https://example.com/docs/"][0]["text"], "Docs")
+        self.assertEqual(known["https://example.com/about"], 200)  # 304: the stored copy was current
+        self.assertEqual(page_count, 2)
+
+    def test_relative_links_resolve_against_the_served_url_or_base(self):
+        pages = [{"url": "https://example.com/blog/", "status": 200, "html": '<a href="post-1.html">Post</a>'},
+                 {"url": "https://example.com/docs/guide/", "status": 200,
+                  "html": '<base href="/static/"><img src="logo.png"><a href="../about">About</a>'}]
+        references, known, _ = collect_references(pages)
+        self.assertEqual(set(references), {"https://example.com/blog/post-1.html", "https://example.com/static/logo.png",
+                                           "https://example.com/about"})
+        self.assertEqual(references["https://example.com/blog/post-1.html"][0]["page"], "https://example.com/blog/")
+        self.assertEqual(known["https://example.com/blog"], 200)  # matched with targets in canonical form
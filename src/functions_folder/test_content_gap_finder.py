@@ -0,0 +1,30 @@
+import unittest
+from unittest import mock
+import numpy as np
+from functions_folder.content_gap_finder import find_content_gaps, top_indices
+
+def fake_encode(texts):
+    # Unit vectors; the page is the last text, terms starting with 'a' point its way.
+    vectors = np.array([[1.0, 0.0] if text.startswith("a") else [0.0, 1.0] for text in texts], dtype=np.float32)
+    vectors[-1] = [1.0, 0.0]
+    return vectors
+
+class TestContentGapFinder(unittest.TestCase):
+    def test_top_indices_keeps_ties(self):
+        scores = np.array([0.1, 0.5, 0.3, 0.5, 0.3, 0.2])
+        self.assertEqual(top_indices(scores, 2).tolist(), [1, 3])
+        self.assertEqual(top_indices(scores, 3).tolist(), [1, 2, 3, 4])
+        self.assertEqual(top_indices(scores, 10).tolist(), list(range(6)))
+
+    def test_only_top_gap_terms_are_embedded(self):
+        competitors = ["analytics dashboards modeling", "analytics pipelines dashboards"]
+        with mock.patch("functions_folder.content_gap_finder.encode", side_effect=fake_encode) as encode:
+            gaps = find_content_gaps("cloud infrastructure", competitors, top_n=2)
+        self.assertEqual(encode.call_count, 1)
+        self.assertEqual(len(encode.call_args[0][0]), 3)  # two tied gap terms plus the page
+        self.assertEqual([gap["term"] for gap in gaps], ["dashboards", "analytics"])  # tie: less related first
+        self.assertEqual([gap["semantic_score"] for gap in gaps], [0.0, 1.0])
+        self.assertTrue(all(gap["tfidf_score"] > 0 for gap in gaps))
+
+    def test_no_competitors_no_gaps(self):
+        self.assertEqual(find_content_gaps("cloud infrastructure", []), [])
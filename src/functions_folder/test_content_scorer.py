@@ -0,0 +1,30 @@
+import unittest
+from unittest import mock
+import numpy as np
+from functions_folder.content_scorer import export_scores_csv, read_documents, score_batch
+
+class TestContentScorer(unittest.TestCase):
+    def test_read_documents_formats(self):
+        csv_text = 'title,text\nFirst,"Body, with a comma"\nSecond,Another body\n,\n'
+        self.assertEqual(read_documents(csv_text), [("First", "Body, with a comma"), ("Second", "Another body")])
+        pasted = "First draft\nstill first\n---\nSecond draft"
+        self.assertEqual([text for _, text in read_documents(pasted)], ["First draft\nstill first", "Second draft"])
+        self.assertEqual(read_documents("seo audit\n\nlink building\n", one_per_line=True),
+                         [("seo audit", "seo audit"), ("link building", "link building")])
+
+    def test_batch_ranks_drafts_by_best_reference(self):
+        # Drafts and references map to fixed unit vectors; draft i is closest to reference i % 2.
+        vectors = np.array([[0.6, 0.8], [1.0, 0.0], [0.0, 1.0], [1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+        with mock.patch("functions_folder.content_scorer.encode_documents", return_value=vectors):
+            batch = score_batch(["a", "b", "c"], ["x", "y"], readability_scores=False)
+        self.assertEqual(batch["matrix"].shape, (3, 2))
+        self.assertEqual([row["name"] for row in batch["results"]], ["Draft 2", "Draft 3", "Draft 1"])
+        self.assertEqual(batch["results"][2]["best_reference"], "y")
+        self.assertEqual(batch["results"][2]["similarities"], [0.6, 0.8])
+        lines = export_scores_csv(batch).splitlines()
+        self.assertEqual(lines[0].split(",")[-2:], ["x", "y"])
+        self.assertEqual(len(lines), 4)
+
+    def test_batch_needs_both_sides(self):
+        self.assertIn("error", score_batch([], ["x"]))
+        self.assertIn("error", score_batch(["a"], []))
@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+import unittest
+from functions_folder.corpus_gap_finder import corpus_gap_analysis, find_corpus_gaps, ingest_corpus, resolve_source
+
+SEO = "keyword research and backlink audits improve rankings"
+BAKING = "sourdough starter needs flour water and a hot oven"
+
+class TestCorpusGapFinder(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.db = os.path.join(self.directory, "terms.db")
+
+    def test_competitor_topics_missing_from_site_are_gaps(self):
+        ingest_corpus("site", [SEO] * 20, path=self.db, chunk_size=7)
+        ingest_corpus("rival", [SEO] * 5 + [BAKING] * 5, path=self.db, chunk_size=7)
+        stats = ingest_corpus("other", [BAKING, ""], path=self.db)
+        self.assertEqual(stats["documents"], 1)  # the empty document is skipped
+        result = find_corpus_gaps("site", ["rival", "other"], path=self.db, top_n=3, clusters=0)
+        self.assertLessEqual({gap["term"] for gap in result["gaps"]}, set(BAKING.split()))
+        self.assertEqual(result["gaps"][0]["coverage"], 1.0)
+        self.assertEqual(result["gaps"][0]["site_documents"], 0)
+        self.assertIn("error", find_corpus_gaps("site", ["unknown"], path=self.db))
+
+    def test_sources_are_only_read_once(self):
+        for name, text in (("site", SEO), ("rival", BAKING)):
+            os.makedirs(os.path.join(self.directory, name))
+            with open(os.path.join(self.directory, name, "page.txt"), "w") as f:
+                f.write(text)
+        first = corpus_gap_analysis("dir:site", ["mine=dir:rival"], path=self.db, root=self.directory, clusters=0)
+        self.assertEqual([stats["domain"] for stats in first["ingested"]], ["site", "mine"])
+        again = corpus_gap_analysis("dir:site", ["mine=dir:rival"], path=self.db, root=self.directory, clusters=0)
+        self.assertEqual(again["ingested"], [])
+        self.assertEqual(again["gaps"], first["gaps"])
+
+    def test_directories_stay_under_root(self):
+        with self.assertRaises(ValueError):
+            resolve_source("dir:../", root=self.directory)
+        with self.assertRaises(ValueError):
+            resolve_source("ftp:somewhere")
@@ -0,0 +1,37 @@
+import os
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+from functions_folder.crawl_coordinator import crawl_site_sharded, shard_of
+from functions_folder.test_crawl_engine import StubSite, crawl_options
+
+def linked_site(size):
+    """Pages /0.html ... linking to the next three pages and back to the home page, so most links cross shards."""
+    pages = {"/": (200, {}, '<a href="/0.html">Start</a>')}
+    for i in range(size):
+        links = "".join(f'<a href="/{j % size}.html">{j}</a>' for j in range(i + 1, i + 4))
+        pages[f"/{i}.html"] = (200, {}, links + '<a href="/">Home</a>')
+    return pages
+
+class TestShardedCrawl(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "crawl.db")
+        self.site = StubSite(linked_site(20))
+        self.addCleanup(self.site.close)
+
+    def test_every_url_is_crawled_once_across_shards(self):
+        self.assertEqual(len({shard_of(f"{self.site.url}/{i}.html", 3) for i in range(20)}), 3)
+        result = crawl_site_sharded(self.site.url + "/", processes=3, max_pages=100, **crawl_options(self.path))
+        requests = Counter(self.site.paths())
+        self.assertEqual(len(requests), 21)
+        self.assertEqual(set(requests.values()), {1})
+        # Returning at all means every shard saw the outstanding count drop to zero
+        self.assertEqual((result["stats"]["pages"], result["stats"]["total_pages"]), (21, 21))
+
+    def test_max_pages_is_shared_by_the_shards(self):
+        result = crawl_site_sharded(self.site.url + "/", processes=3, max_pages=7, **crawl_options(self.path))
+        self.assertEqual((result["stats"]["pages"], result["stats"]["total_pages"]), (7, 7))
+        self.assertEqual(set(Counter(self.site.paths()).values()), {1})
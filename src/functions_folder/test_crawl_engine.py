@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from functions_folder.crawl_engine import async_crawl_site
+from functions_folder.crawl_store import CrawlStore
+
+class StubSite:
+    """A local HTTP server answering from `pages` (path -> (status, headers, body)) and logging every request."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests.append((self.path, dict(self.headers)))
+                status, headers, body = site.pages.get(self.path, (404, {}, "not found"))
+                if callable(status):
+                    status, headers, body = status(self.headers)
+                self.send_response(status)
+                for name, value in dict({"Content-Type": "text/html"}, **headers).items():
+                    self.send_header(name, value)
+                data = body if isinstance(body, bytes) else body.encode("utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def paths(self):
+        return [path for path, _ in self.requests]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def crawl_options(path):
+    return {"store_path": path, "respect_robots": False, "use_sitemaps": False, "delay": 0}
+
+def stored_pages(result):
+    return {page["url"]: page for page in result["pages"]}
+
+class TestCrawl(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "crawl.db")
+
+    def serve(self, pages):
+        site = StubSite(pages)
+        self.addCleanup(site.close)
+        return site
+
+    def test_links_are_requested_as_written_and_resolved_against_the_page(self):
+        site = self.serve({
+            "/": (200, {}, '<a href="/blog/">Blog</a> <a href="/blog#top">Blog again</a>'),
+            "/blog": (301, {"Location": "/blog/"}, ""),
+            "/blog/": (200, {}, '<a href="post-1.html">Post</a>'),
+            "/blog/post-1.html": (200, {}, "post"),
+        })
+        result = async_crawl_site(site.url + "/", **crawl_options(self.path))
+        self.assertEqual(sorted(site.paths()), ["/", "/blog/", "/blog/post-1.html"])
+        self.assertEqual(set(stored_pages(result)), {site.url + "/", site.url + "/blog/", site.url + "/blog/post-1.html"})
+
+    def test_redirected_page_is_stored_under_its_response_url(self):
+        site = self.serve({
+            "/old": (301, {"Location": "/new/"}, ""),
+            "/new/": (200, {}, '<a href="page.html">Page</a> <a href="/new/">Self</a>'),
+            "/new/page.html": (200, {}, "page"),
+        })
+        result = async_crawl_site(site.url + "/old", **crawl_options(self.path))
+        self.assertEqual(set(stored_pages(result)), {site.url + "/new/", site.url + "/new/page.html"})
+        self.assertEqual(site.paths().count("/new/"), 1)
+
+    def test_not_modified_pages_reuse_the_stored_body_and_links(self):
+        def revalidated(headers):
+            if headers.get("If-None-Match") == '"v1"':
+                return 304, {"ETag": '"v1"'}, ""
+            return 200, {"ETag": '"v1"'}, '<a href="/team">Team</a> Home'
+
+        def dated(headers):
+            if headers.get("If-Modified-Since") == "Mon, 05 Oct 2026 10:00:00 GMT":
+                return 304, {}, ""
+            return 200, {"Last-Modified": "Mon, 05 Oct 2026 10:00:00 GMT"}, "Team"
+
+        site = self.serve({"/": (revalidated, {}, ""), "/team": (dated, {}, "")})
+        first = async_crawl_site(site.url + "/", **crawl_options(self.path))
+        self.assertEqual(sorted(first["diff"]["added"]), [site.url + "/", site.url + "/team"])
+        original = stored_pages(first)
+
+        site.requests.clear()
+        second = async_crawl_site(site.url + "/", **crawl_options(self.path))
+        self.assertEqual(site.paths(), ["/", "/team"])  # the stored links led to /team
+        self.assertEqual([headers.get("If-None-Match") for _, headers in site.requests][0], '"v1"')
+        self.assertEqual((second["stats"]["unchanged"], second["stats"]["new"]), (2, 0))
+        diff = second["diff"]
+        self.assertEqual((diff["added"], diff["changed"], diff["removed"], diff["unchanged"]), ([], [], [], 2))
+        self.assertEqual(diff["previous_crawl_id"], first["crawl_id"])
+        for url, page in stored_pages(second).items():
+            self.assertEqual((page["status"], page["change"]), (304, "unchanged"))
+            self.assertEqual(page["html"], original[url]["html"])  # the body of the first crawl
+
+class TestResume(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "crawl.db")
+
+    def create_crawl(self, params):
+        store = CrawlStore(self.path)
+        crawl_id = store.create_crawl("https://example.com/", params)
+        store.close()
+        return crawl_id
+
+    def test_legacy_crawls_cannot_be_resumed(self):
+        crawl_id = self.create_crawl({"engine": "legacy", "max_pages": 10})
+        result = async_crawl_site(None, resume=crawl_id, store_path=self.path)
+        self.assertIn("cannot be resumed", result["error"])
+        self.assertIn("Unknown crawl id", async_crawl_site(None, resume="nope", store_path=self.path)["error"])
+
+    def test_sharded_crawls_cannot_be_resumed(self):
+        crawl_id = self.create_crawl({"max_pages": 100, "shards": 4})
+        result = async_crawl_site(None, resume=crawl_id, store_path=self.path)
+        self.assertIn("4 shards and cannot be resumed", result["error"])
@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+from functions_folder.crawl_store import CrawlStore, iter_pages
+from functions_folder.crawler import crawl_site
+from functions_folder.test_crawl_engine import StubSite
+
+class TestCrawlStore(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "crawl.db")
+        self.store = CrawlStore(self.path)
+        self.addCleanup(self.store.close)
+
+    def crawl(self, pages):
+        """Stores a finished crawl of (url, html, change) pages."""
+        crawl_id = self.store.create_crawl("https://example.com/", {})
+        for url, html, change in pages:
+            self.store.save_page(crawl_id, url, 304 if change == "unchanged" else 200, 0, "text/html", html, change)
+        self.store.finish_crawl(crawl_id, {})
+        return crawl_id
+
+    def test_frontier_survives_a_restart(self):
+        crawl_id = self.store.create_crawl("https://example.com/", {})
+        for url, depth in [("https://example.com/", 0), ("https://example.com/b/", 2), ("https://example.com/a", 1)]:
+            self.store.add_frontier(crawl_id, url, depth)
+        self.store.add_frontier(crawl_id, "https://example.com/a", 5)  # already queued: kept as it was
+        self.store.mark_done(crawl_id, "https://example.com/")
+        self.store.checkpoint()
+        self.store.add_frontier(crawl_id, "https://example.com/lost", 1)  # after the last checkpoint
+        self.store.conn.rollback()  # what a crash would discard
+
+        reopened = CrawlStore(self.path)
+        self.addCleanup(reopened.close)
+        seen, pending = reopened.load_frontier(crawl_id)
+        self.assertEqual(set(seen), {"https://example.com/", "https://example.com/a", "https://example.com/b/"})
+        self.assertEqual(pending, [("https://example.com/a", 1), ("https://example.com/b/", 2)])
+
+    def test_iter_pages_is_lazy_and_fills_in_unchanged_bodies(self):
+        first = self.crawl([("https://example.com/", "home v1", "new"), ("https://example.com/team", "team", "new")])
+        second = self.crawl([("https://example.com/", "home v2", "changed"), ("https://example.com/team", None, "unchanged")])
+        with mock.patch("functions_folder.crawl_store.zlib.decompress", wraps=zlib.decompress) as decompress:
+            pages = iter_pages(second, self.path)
+            self.assertEqual(decompress.call_count, 0)  # nothing is read until the pages are iterated
+            first_page = next(pages)
+            self.assertEqual(decompress.call_count, 1)  # one body at a time
+            pages = {page["url"]: page for page in [first_page, *pages]}
+        self.assertEqual(pages["https://example.com/team"]["html"], "team")
+        self.assertEqual(pages["https://example.com/team"]["size"], 4)
+        self.assertEqual(pages["https://example.com/"]["html"], "home v2")
+        self.assertEqual([page["url"] for page in iter_pages(second, self.path, changed_only=True)],
+                         ["https://example.com/"])
+        self.assertEqual(len(list(iter_pages(first, self.path))), 2)
+
+    def test_diff_against_the_previous_crawl(self):
+        self.crawl([("https://example.com/", "home", "new"), ("https://example.com/old", "old", "new"),
+                    ("https://example.com/team", "team", "new")])
+        crawl_id = self.crawl([("https://example.com/", "home 2", "changed"), ("https://example.com/team", None, "unchanged"),
+                               ("https://example.com/new", "new", "new")])
+        diff = self.store.crawl_diff(crawl_id)
+        self.assertEqual((diff["added"], diff["changed"], diff["removed"], diff["unchanged"]),
+                         (["https://example.com/new"], ["https://example.com/"], ["https://example.com/old"], 1))
+
+    def test_page_change_compares_with_the_previous_body(self):
+        first = self.crawl([("https://example.com/", "home", "new")])
+        second = self.crawl([("https://example.com/", None, "unchanged")])
+        self.assertEqual(self.store.page_change(None, "https://example.com/", "home"), "new")
+        self.assertEqual(self.store.page_change(first, "https://example.com/other", "home"), "new")
+        self.assertEqual(self.store.page_change(first, "https://example.com/", "home"), "unchanged")
+        self.assertEqual(self.store.page_change(second, "https://example.com/", "home"), "unchanged")
+        self.assertEqual(self.store.page_change(second, "https://example.com/", "home!"), "changed")
+
+    def test_legacy_recrawl_is_diffed_like_an_async_one(self):
+        site = StubSite({"/": (200, {}, '<a href="/team">Team</a>'), "/team": (200, {}, "team")})
+        self.addCleanup(site.close)
+        with mock.patch.dict(os.environ, {"CRAWL_STORE_PATH": self.path}):
+            first = crawl_site(site.url + "/", engine="legacy", delay=0)
+            site.pages["/team"] = (200, {}, "team, updated")
+            second = crawl_site(site.url + "/", engine="legacy", delay=0)
+        self.assertEqual(len(first["diff"]["added"]), 2)
+        diff = second["diff"]
+        self.assertEqual((diff["added"], diff["changed"], diff["removed"], diff["unchanged"]),
+                         ([], [site.url + "/team"], [], 1))
+        self.assertEqual({page["url"]: page["html"] for page in second["pages"]},
+                         {site.url + "/": '<a href="/team">Team</a>', site.url + "/team": "team, updated"})
@@ -0,0 +1,60 @@
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from functions_folder.embedding_cache import EmbeddingCache, cache_key
+from functions_folder.embedding_service import EmbeddingService
+from functions_folder.model_registry import ModelRegistry
+from functions_folder.test_embedding_service import FakeEmbedder
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def vectors(self, n, dim=4):
+        return {f"text {i}": np.full(dim, i, dtype=np.float32) for i in range(n)}
+
+    def test_key_ignores_whitespace_but_not_model(self):
+        self.assertEqual(cache_key("m", "keyword  research\n"), cache_key("m", "keyword research"))
+        self.assertNotEqual(cache_key("m", "keyword research"), cache_key("other", "keyword research"))
+
+    def test_disk_tier_survives_restart(self):
+        EmbeddingCache(self.directory).put_many("m", 4, self.vectors(10))
+        cache = EmbeddingCache(self.directory)  # a fresh process: empty memory tier
+        found = cache.get_many("m", 4, ["text 3", "text 7", "unknown"])
+        np.testing.assert_array_equal(found["text 7"], np.full(4, 7))
+        self.assertEqual(set(found), {"text 3", "text 7"})
+        stats = cache.stats()
+        self.assertEqual((stats["disk_hits"], stats["misses"], stats["disk_entries"]), (2, 1, 10))
+        self.assertGreaterEqual(stats["disk_bytes"], 10 * 4 * 4)
+
+    def test_concurrent_writers_get_distinct_rows(self):
+        first, second = EmbeddingCache(self.directory), EmbeddingCache(self.directory)
+        first.put_many("m", 4, self.vectors(3))
+        second.put_many("m", 4, {f"other {i}": np.full(4, 100 + i, dtype=np.float32) for i in range(3)})
+        first.put_many("m", 4, self.vectors(3))  # already stored: nothing written
+        reader = EmbeddingCache(self.directory)
+        found = reader.get_many("m", 4, ["text 2", "other 2"])
+        self.assertEqual((found["text 2"][0], found["other 2"][0]), (2, 102))
+        self.assertEqual(reader.stats()["disk_entries"], 6)
+
+    def test_memory_tier_is_bounded_lru(self):
+        cache = EmbeddingCache(self.directory, max_memory_entries=3, disk=False)
+        cache.put_many("m", 4, self.vectors(3))
+        cache.get_many("m", 4, ["text 0"])  # refresh: text 1 is now the oldest
+        cache.put_many("m", 4, {"text 9": np.zeros(4, dtype=np.float32)})
+        self.assertEqual(set(cache.get_many("m", 4, ["text 0", "text 1", "text 2"])), {"text 0", "text 2"})
+        self.assertEqual(cache.stats()["memory_bytes"], 3 * 4 * 4)
+
+    def test_service_skips_cached_texts(self):
+        fake = FakeEmbedder()
+        fake.model_id = "fake"
+        models = ModelRegistry()
+        models.register("fake", lambda: fake)
+        service = EmbeddingService("fake", models=models, cache=EmbeddingCache(self.directory))
+        first = service.encode(["alpha beta", "gamma"])
+        self.assertEqual(service.stats["texts"], 2)
+        again = service.encode(["gamma", "alpha beta", "delta epsilon zeta"])
+        self.assertEqual(service.stats["texts"], 3)  # only the new text went through the model
+        np.testing.assert_array_equal(again[:2], first[::-1])
@@ -0,0 +1,98 @@
+import unittest
+import numpy as np
+from functions_folder.embedding_service import EmbeddingService, load_embedder, mean_pool, pad_batch
+from functions_folder.model_registry import ModelRegistry
+
+class FakeEmbedder:
+    """Word-count 'model': one token per word, vector = token ids' histogram."""
+    dim = 8
+
+    def __init__(self):
+        self.batches = []
+
+    def tokenize(self, texts, max_length):
+        return [[len(word) % self.dim for word in text.split()][:max_length] or [0] for text in texts]
+
+    def count_tokens(self, texts):
+        return [len(text.split()) for text in texts]
+
+    def embed(self, token_ids):
+        self.batches.append([len(ids) for ids in token_ids])
+        vectors = np.zeros((len(token_ids), self.dim), dtype=np.float32)
+        for row, ids in enumerate(token_ids):
+            for token in ids:
+                vectors[row, token] += 1
+        return vectors
+
+class TestEmbeddingService(unittest.TestCase):
+    def setUp(self):
+        self.fake = FakeEmbedder()
+        models = ModelRegistry()
+        models.register("fake", lambda: self.fake)
+        self.service = EmbeddingService("fake", max_seq_length=16, max_batch_size=4, max_batch_tokens=20,
+                                        models=models)
+
+    def test_normalized_float32_rows_in_input_order(self):
+        texts = ["a bb ccc", "dddd", "a bb ccc", "ee ff"]
+        vectors = self.service.encode(texts)
+        self.assertEqual(vectors.shape, (4, 8))
+        self.assertEqual(vectors.dtype, np.float32)
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-6)
+        np.testing.assert_array_equal(vectors[0], vectors[2])
+        self.assertEqual(self.service.stats["texts"], 3)  # the duplicate was embedded once
+
+    def test_batches_respect_size_and_token_budget(self):
+        texts = [" ".join(["w"] * n) + f" x{i}" for i, n in enumerate([1, 9, 2, 2, 2, 2, 2, 15])]
+        self.service.encode(texts)
+        for lengths in self.fake.batches:
+            self.assertLessEqual(len(lengths), 4)
+            self.assertLessEqual(max(lengths) * len(lengths), max(20, max(lengths)))
+        self.assertEqual(sum(len(lengths) for lengths in self.fake.batches), len(texts))
+
+    def test_single_string_and_empty_input(self):
+        self.assertEqual(self.service.encode("one text").shape, (1, 8))
+        self.assertEqual(self.service.encode([]).shape, (0, 8))
+
+    def test_mean_pool_ignores_padding(self):
+        input_ids, mask = pad_batch([[5, 6, 7], [5]])
+        self.assertEqual(input_ids.tolist(), [[5, 6, 7], [5, 0, 0]])
+        tokens = np.ones((2, 3, 2), dtype=np.float32)
+        tokens[1, 1:] = 100  # padding positions must not count
+        np.testing.assert_allclose(mean_pool(tokens, mask), np.ones((2, 2)))
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            load_embedder(backend="tensorflow")
+
+    def test_document_windows_cover_text_within_budget(self):
+        lengths = (5, 6, 4, 7, 3, 30, 2)
+        text = " ".join(" ".join([f"s{i}"] * n) + "." for i, n in enumerate(lengths))
+        windows = [text[start:end].split() for start, end in self.service.windows(text)]
+        for words in windows:
+            self.assertLessEqual(len(words), 14)  # max_seq_length 16 minus [CLS]/[SEP]
+        for i, n in enumerate(lengths):
+            self.assertGreaterEqual(sum(word.strip(".") == f"s{i}" for words in windows for word in words), n)
+        # Consecutive windows share a sentence; the 30-word one is cut into pieces.
+        self.assertEqual((windows[0][-1], windows[1][5]), ("s1.", "s1."))  # sentence s1 is in both
+        self.assertEqual(sum(words.count("s5") + words.count("s5.") for words in windows), 30)
+
+    def test_document_pooling_and_sections(self):
+        text = "alpha beta gamma. delta epsilon. " * 10
+        reference = self.service.encode(["alpha beta gamma."])[0]
+        mean = self.service.encode_document(text, reference=reference)
+        peak = self.service.encode_document(text, pooling="max")
+        self.assertGreater(mean["chunks"], 1)
+        self.assertEqual(len(mean["sections"]), mean["chunks"])
+        self.assertTrue(all(0 < section["similarity"] <= 1 for section in mean["sections"]))
+        self.assertIsNone(peak["sections"][0]["similarity"])
+        for result in (mean, peak):
+            self.assertAlmostEqual(float(np.linalg.norm(result["vector"])), 1.0, places=5)
+        with self.assertRaises(ValueError):
+            self.service.encode_document(text, pooling="median")
+
+    def test_documents_share_batches_and_match_single_documents(self):
+        texts = ["alpha beta gamma. delta epsilon. " * 6, "short draft.", "", "zeta eta theta iota."]
+        vectors = self.service.encode_documents(texts, pooling="max")
+        self.assertEqual(vectors.shape, (4, 8))
+        for text, vector in zip(texts, vectors):
+            np.testing.assert_allclose(vector, self.service.encode_document(text, pooling="max")["vector"], rtol=1e-5)
@@ -0,0 +1,80 @@
+import os
+import unittest
+from functions_folder.htaccess_simulator import (HtaccessRules, HtaccessSyntaxError, simulate_bulk,
+                                                 simulate_redirects, split_arguments)
+
+RULES = r"""
+<IfModule mod_rewrite.c>
+RewriteEngine On
+RewriteCond %{HTTP_HOST} ^www\.(.+)$ [NC]
+RewriteRule ^(.*)$ https://%1/$1 [R=301,L]
+RewriteCond %{HTTPS} off
+RewriteRule ^ https://%{HTTP_HOST}%{REQUEST_URI} [R=301,L]
+RewriteRule ^old/(.*)$ /new/$1 [R=302,L]
+RewriteRule ^new/(.*)$ /newer/$1 [R=301,L]
+RewriteRule ^loop1$ /loop2 [R,L]
+RewriteRule ^loop2$ /loop1 [R,L]
+RewriteRule ^private - [F]
+RewriteCond %{REQUEST_FILENAME} !-f
+RewriteRule ^page/(\d+)$ index.php?p=$1 [QSA,L]
+</IfModule>
+Redirect 301 /legacy https://example.com/modern
+RedirectMatch 410 ^/retired/
+"""
+HOSTS = {"example.com", "www.example.com"}
+
+class TestHtaccessSimulator(unittest.TestCase):
+    def setUp(self):
+        self.rules = HtaccessRules(RULES, files={"/index.php", "/newer/ok"})
+
+    def test_follows_chain_across_hosts_and_schemes(self):
+        result = simulate_redirects(self.rules, "http://www.example.com/old/ok", hosts=HOSTS)
+        self.assertEqual([status for _, status in result["redirect_chain"]], [301, 302, 301, 200])
+        self.assertEqual(result["final_url"], "https://example.com/newer/ok")
+        self.assertEqual(result["issue"], "multi_hop")
+        self.assertEqual(result["graph"].number_of_edges(), 3)
+
+    def test_detects_loop(self):
+        result = simulate_redirects(self.rules, "https://example.com/loop1")
+        self.assertTrue(result["loop_detected"])
+        self.assertEqual(result["redirect_chain"], [("https://example.com/loop1", 302), ("https://example.com/loop2", 302)])
+        self.assertTrue(result["graph"].has_edge("https://example.com/loop1", "https://example.com/loop1"))
+
+    def test_internal_rewrite_with_query_append(self):
+        answer = self.rules.evaluate("https://example.com/page/4?x=1")
+        self.assertEqual(answer["status"], 200)
+        self.assertEqual(answer["served_path"], "/index.php")
+
+    def test_status_flags_and_mod_alias(self):
+        self.assertEqual(self.rules.evaluate("https://example.com/private/a")["status"], 403)
+        self.assertEqual(self.rules.evaluate("https://example.com/retired/x")["status"], 410)
+        answer = self.rules.evaluate("https://example.com/legacy/a?b=2")
+        self.assertEqual((answer["status"], answer["location"]), (301, "https://example.com/modern/a?b=2"))
+        self.assertEqual(self.rules.evaluate("https://example.com/legacyish")["status"], 200)
+
+    def test_external_redirect_ends_chain(self):
+        result = simulate_redirects(self.rules, "http://www.example.com/x")
+        self.assertTrue(result["external"])
+        self.assertIsNone(result["final_status"])
+        self.assertEqual(result["final_url"], "https://example.com/x")
+
+    def test_bulk_reports_redirects_to_missing_pages(self):
+        urls = ["https://example.com/old/ok", "https://example.com/old/missing", "https://example.com/loop2"]
+        result = simulate_bulk(RULES, urls, files={"/newer/ok"}, check_files=True)
+        self.assertEqual(result["stats"]["urls"], 3)
+        self.assertEqual([r["source_url"] for r in result["redirects_to_404"]], ["https://example.com/old/missing"])
+        self.assertEqual(len(result["loops"]), 1)
+        self.assertEqual([r["source_url"] for r in result["multi_hop"]], ["https://example.com/old/ok"])
+        self.assertTrue(result["graph"].has_edge("https://example.com/new/ok", "https://example.com/newer/ok"))
+
+    def test_repo_htaccess_keeps_aio_requests(self):
+        rules = HtaccessRules(open(os.path.join(os.path.dirname(__file__), "..", "..", "htaccess.txt"), encoding="utf-8").read())
+        self.assertEqual(rules.warnings, [])
+        answer = rules.evaluate("https://rank4sure.com/aio/seo_analyzer")
+        self.assertEqual((answer["status"], answer["served_path"]), (200, "/aio/seo_analyzer"))
+
+    def test_parsing(self):
+        self.assertEqual(split_arguments(r'RewriteRule ^a\.html$ "/b c" [L] # note'),
+                         ["RewriteRule", r"^a\.html$", "/b c", "[L]"])
+        with self.assertRaises(HtaccessSyntaxError):
+            HtaccessRules("RewriteEngine On\nRewriteRule ^(a b [L]")
@@ -0,0 +1,80 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from functions_folder.job_queue import JobQueue, JobStore
+
+def square_job(progress, number):
+    progress(0.5, "squaring")
+    return {"square": number * number, "pid": os.getpid()}
+
+def failing_job(progress):
+    raise RuntimeError("no lighthouse")
+
+def waiting_job(progress, release):
+    deadline = time.monotonic() + 10
+    while not os.path.exists(release) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return {"released": True}
+
+def wait_for(queue, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.db = os.path.join(self.directory, "jobs.db")
+        self.queue = JobQueue(self.db, limits={})
+        self.addCleanup(self.queue.shutdown)
+
+    def test_results_and_errors_are_persisted(self):
+        self.queue.register("square", "functions_folder.test_job_queue:square_job")
+        self.queue.register("audit", "functions_folder.test_job_queue:failing_job")
+        done = wait_for(self.queue, self.queue.submit("square", {"number": 7}))
+        failed = wait_for(self.queue, self.queue.submit("audit", {}))
+        self.assertEqual(done["result"]["square"], 49)
+        self.assertEqual((done["progress"], done["params"]), (1.0, {"number": 7}))
+        self.assertEqual((failed["status"], failed["error"]), ("failed", "no lighthouse"))
+        self.assertEqual(JobStore(self.db).get(done["job_id"])["result"], done["result"])  # another process sees it
+        self.assertEqual(self.queue.report()["square"]["jobs"], {"done": 1})
+
+    def test_process_pool_runs_jobs_in_a_worker_process(self):
+        self.queue.register("square", "functions_folder.test_job_queue:square_job", pool="process")
+        job = wait_for(self.queue, self.queue.submit("square", {"number": 3}))
+        self.assertEqual(job["result"]["square"], 9)
+        self.assertNotEqual(job["result"]["pid"], os.getpid())
+        self.assertRaises(ValueError, self.queue.register, "square", "x:y", pool="cluster")
+
+    def test_concurrency_limit_queues_extra_jobs(self):
+        release = os.path.join(self.directory, "release")
+        self.queue.register("crawl", "functions_folder.test_job_queue:waiting_job", concurrency=1)
+        first = self.queue.submit("crawl", {"release": release})
+        second = self.queue.submit("crawl", {"release": release})
+        time.sleep(0.2)
+        self.assertEqual(self.queue.get(first)["status"], "running")
+        self.assertEqual(self.queue.get(second)["status"], "queued")
+        open(release, "w").close()
+        self.assertEqual(wait_for(self.queue, second)["result"], {"released": True})
+
+    def test_jobs_of_a_dead_server_are_failed_on_restart(self):
+        store = JobStore(self.db)
+        job_id = store.create("crawl", {})
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])  # a web process that has gone
+        exited.wait()
+        conn = sqlite3.connect(self.db)
+        with conn:
+            conn.execute("UPDATE jobs SET owner_pid = ? WHERE job_id = ?", (exited.pid, job_id))
+        conn.close()
+        self.assertEqual(store.recover(), 1)
+        self.assertEqual(store.get(job_id)["status"], "failed")
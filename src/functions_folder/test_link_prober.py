@@ -0,0 +1,92 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest import mock
+import aiohttp
+from functions_folder.link_prober import CircuitBreaker, LinkProber, parse_retry_after
+
+def answered(status):
+    return {"status": status}
+
+class TestRetryDelay(unittest.TestCase):
+    def setUp(self):
+        self.prober = LinkProber(retries=2, backoff=0.5, max_backoff=8, max_retry_after=30)
+
+    def test_retry_after_seconds_and_http_date(self):
+        self.assertEqual(parse_retry_after(" 12 "), 12.0)
+        in_a_minute = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+        self.assertAlmostEqual(parse_retry_after(in_a_minute), 60, delta=2)
+        past = format_datetime(datetime.now(timezone.utc) - timedelta(hours=1), usegmt=True)
+        self.assertEqual(parse_retry_after(past), 0.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+        in_ten_seconds = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=10), usegmt=True)
+        self.assertAlmostEqual(self.prober.retry_delay(answered(503), in_ten_seconds, None, 0), 10, delta=2)
+        self.assertEqual(self.prober.retry_delay(answered(429), "3", None, 0), 3.0)
+
+    def test_retry_after_over_the_cap_is_not_waited_for(self):
+        self.assertEqual(self.prober.retry_delay(answered(429), "30", None, 0), 30.0)
+        self.assertIsNone(self.prober.retry_delay(answered(429), "31", None, 0))
+        in_an_hour = format_datetime(datetime.now(timezone.utc) + timedelta(hours=1), usegmt=True)
+        self.assertIsNone(self.prober.retry_delay(answered(503), in_an_hour, None, 0))
+
+    def test_backoff_without_retry_after(self):
+        with mock.patch("functions_folder.link_prober.random.uniform", side_effect=lambda low, high: high):
+            self.assertEqual(self.prober.retry_delay(answered(502), None, None, 0), 0.5)
+            self.assertEqual(self.prober.retry_delay(answered(503), "soon", None, 1), 1.0)
+            self.assertEqual(self.prober.retry_delay(answered(None), None, asyncio.TimeoutError(), 1), 1.0)
+            self.assertEqual(LinkProber(retries=9, max_backoff=8).retry_delay(answered(504), None, None, 8), 8)
+
+    def test_what_is_not_retried(self):
+        dns_error = aiohttp.ClientConnectorDNSError(mock.Mock(), OSError(-2, "Name or service not known"))
+        self.assertIsNone(self.prober.retry_delay(answered(None), None, dns_error, 0))  # an OSError, but permanent
+        self.assertIsNone(self.prober.retry_delay(answered(None), None, aiohttp.InvalidURL("x"), 0))
+        self.assertIsNone(self.prober.retry_delay(answered(None), None, None, 0))
+        for status in (200, 404, 410, 500):
+            self.assertIsNone(self.prober.retry_delay(answered(status), "1", None, 0))
+        self.assertIsNone(self.prober.retry_delay(answered(503), "1", None, 2))  # out of retries
+        self.assertIsNotNone(self.prober.retry_delay(answered(None), None, aiohttp.ServerDisconnectedError(), 1))
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("functions_folder.link_prober.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(threshold=3, cooldown=60)
+
+    def open_circuit(self, host="down.example"):
+        for _ in range(3):
+            self.assertTrue(self.breaker.allow(host))
+            self.breaker.record(host, ok=False)
+
+    def test_opens_after_consecutive_failures_only(self):
+        self.breaker.record("flaky.example", ok=False)
+        self.breaker.record("flaky.example", ok=False)
+        self.breaker.record("flaky.example", ok=True)
+        self.breaker.record("flaky.example", ok=False)
+        self.assertFalse(self.breaker.is_open("flaky.example"))
+        self.open_circuit()
+        self.assertTrue(self.breaker.is_open("down.example"))
+        self.assertFalse(self.breaker.allow("down.example"))
+        self.assertTrue(self.breaker.allow("other.example"))
+
+    def test_half_open_probe_closes_or_reopens(self):
+        self.open_circuit()
+        self.now += 59
+        self.assertFalse(self.breaker.allow("down.example"))
+        self.now += 1
+        self.assertTrue(self.breaker.allow("down.example"))  # half-open: one probe goes through
+        self.assertFalse(self.breaker.allow("down.example"))  # the rest wait for its outcome
+        self.breaker.record("down.example", ok=False)
+        self.assertTrue(self.breaker.is_open("down.example"))
+        self.now += 30
+        self.assertFalse(self.breaker.allow("down.example"))  # the cooldown restarted
+        self.now += 30
+        self.assertTrue(self.breaker.allow("down.example"))
+        self.breaker.record("down.example", ok=True)
+        self.assertFalse(self.breaker.is_open("down.example"))
+        self.assertTrue(self.breaker.allow("down.example"))
+        self.breaker.record("down.example", ok=False)  # the failure count was reset too
+        self.assertTrue(self.breaker.allow("down.example"))
@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from functions_folder.link_status_cache import LinkStatusCache, check_links
+
+def probed(url, status):
+    return {"url": url, "status": status, "method": "HEAD", "final_url": None, "error": None,
+            "error_class": None, "elapsed_ms": 5}
+
+class TestLinkStatusCache(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "links.db")
+        self.cache = LinkStatusCache(self.path)
+        self.addCleanup(self.cache.close)
+
+    def test_only_fragment_and_host_case_share_an_entry(self):
+        self.cache.put_many([{"url": "https://example.com/docs/", "status": 200, "final_url": None,
+                              "error": None, "error_class": None}])
+        fresh = self.cache.get_many(["https://Example.com/docs/#intro", "https://example.com/docs",
+                                     "https://example.com/docs/?page=2"])
+        self.assertEqual(list(fresh), ["https://Example.com/docs/#intro"])
+        self.assertEqual(fresh["https://Example.com/docs/#intro"]["status"], 200)
+
+    @mock.patch.dict(os.environ, {"LINK_STATUS_TTL_5XX": "600"})
+    def test_expired_entries_are_probed_again(self):
+        self.now = 1000.0
+        patcher = mock.patch("functions_folder.link_status_cache.time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        ok, down = "https://example.com/ok", "https://example.com/down"
+        self.cache.put_many([probed(ok, 200), probed(down, 503)])
+
+        self.now += 601  # past the 5xx TTL from the environment, well within the 2xx one
+        with mock.patch("functions_folder.link_status_cache.probe_links",
+                        side_effect=lambda urls: [probed(url, 200) for url in urls]) as probe:
+            results, stats = check_links([ok, down], cache_path=self.path)
+        probe.assert_called_once_with([down])
+        self.assertEqual([(r["status"], r["cached"]) for r in results], [(200, True), (200, False)])
+        self.assertEqual((stats["cache_hits"], stats["cache_misses"]), (1, 1))
+        self.assertEqual(self.cache.get_many([down])[down]["checked_at"], self.now)  # refreshed
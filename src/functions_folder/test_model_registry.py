@@ -0,0 +1,62 @@
+import threading
+import time
+import unittest
+from unittest import mock
+from functions_folder import model_registry
+from functions_folder.model_registry import ModelRegistry
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ModelRegistry()
+        self.loads = 0
+
+        def slow_loader():
+            self.loads += 1
+            time.sleep(0.05)
+            return object()
+
+        self.registry.register("slow", slow_loader)
+
+    def test_loads_once_under_concurrency(self):
+        models = []
+        threads = [threading.Thread(target=lambda: models.append(self.registry.get("slow"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(len({id(model) for model in models}), 1)
+        self.assertEqual(self.registry.report()["models"]["slow"]["state"], "loaded")
+
+    def test_nothing_loaded_until_requested(self):
+        self.assertFalse(self.registry.is_loaded("slow"))
+        self.registry.warm_up(background=True).join()
+        self.assertTrue(self.registry.is_loaded("slow"))
+
+    def test_failed_load_is_retried(self):
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise OSError("model files missing")
+            return "model"
+
+        self.registry.register("flaky", flaky)
+        with self.assertRaises(OSError):
+            self.registry.get("flaky")
+        self.assertEqual(self.registry.report()["models"]["flaky"]["state"], "failed")
+        self.assertEqual(self.registry.get("flaky"), "model")
+
+    def test_unknown_model(self):
+        with self.assertRaises(KeyError):
+            self.registry.get("missing")
+
+    def test_warm_up_of_no_valid_names_loads_nothing(self):
+        self.registry.warm_up([], background=False)
+        self.assertFalse(self.registry.is_loaded("slow"))
+        with mock.patch.object(model_registry, "registry", self.registry):
+            for value in (",", "no-such-model"):
+                with mock.patch.dict("os.environ", {"MODEL_WARMUP": value}):
+                    self.assertIsNone(model_registry.warm_up_from_env())
+        self.assertEqual(self.loads, 0)
@@ -0,0 +1,76 @@
+import csv
+import io
+import unittest
+from collections import Counter
+from functools import partial
+from unittest import mock
+import httpx
+from functions_folder.redirect_mapper import CSV_FIELDS, bulk_redirect_mapper, export_csv, read_url_list
+
+SITE = "https://old.example.com"
+# path -> (status, Location)
+ROUTES = {
+    "/a": (301, "/hub"), "/b": (301, "/hub"), "/c": (302, f"{SITE}/hub"),
+    "/hub": (301, "https://new.example.com/final"),
+    "/loop-1": (301, "/loop-2"), "/loop-2": (302, "/loop-1"),
+    "/gone": (301, "/missing"), "/broken": (307, "/error"), "/error": (503, None),
+    **{f"/chain-{i}": (301, f"/chain-{i + 1}") for i in range(10)},
+}
+
+class TestBulkRedirectMapper(unittest.TestCase):
+    def setUp(self):
+        self.requests = Counter()
+
+        def handler(request):
+            self.requests[str(request.url)] += 1
+            status, location = ROUTES.get(request.url.path, (404, None))
+            if request.url.host == "new.example.com":
+                status, location = 200, None
+            return httpx.Response(status, headers={"Location": location} if location else {})
+
+        client = partial(httpx.AsyncClient, transport=httpx.MockTransport(handler))
+        patcher = mock.patch("functions_folder.redirect_mapper.httpx.AsyncClient", client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def map(self, paths, **options):
+        result = bulk_redirect_mapper([SITE + path for path in paths], **options)
+        return result, {row["source_url"][len(SITE):]: row for row in result["results"]}
+
+    def test_shared_hops_are_requested_once(self):
+        result, rows = self.map(["/a", "/b", "/c", "/hub"])
+        self.assertEqual(result["stats"]["requests_made"], 5)  # a, b, c, hub and the final URL
+        self.assertEqual(set(self.requests.values()), {1})
+        self.assertEqual({row["final_url"] for row in rows.values()}, {"https://new.example.com/final"})
+        self.assertEqual([rows[path]["hops"] for path in ("/a", "/c", "/hub")], [2, 2, 1])
+        self.assertEqual(rows["/a"]["issue"], "multi_hop")
+        self.assertEqual(rows["/hub"]["issue"], "")
+        self.assertTrue(result["graph"].has_edge(f"{SITE}/hub", "https://new.example.com/final"))
+
+    def test_loops_and_the_redirect_limit(self):
+        result, rows = self.map(["/loop-1", "/chain-0"], max_redirects=3)
+        self.assertTrue(rows["/loop-1"]["loop_detected"])
+        self.assertEqual(rows["/loop-1"]["issue"], "loop")
+        self.assertEqual([row["source_url"] for row in result["loops"]], [f"{SITE}/loop-1"])
+        self.assertEqual(rows["/chain-0"]["error"], "More than 3 redirects")
+        self.assertEqual(rows["/chain-0"]["issue"], "error")
+        self.assertEqual(len(rows["/chain-0"]["redirect_chain"]), 4)
+        self.assertNotIn(f"{SITE}/chain-5", self.requests)  # stopped at the limit
+
+    def test_redirects_ending_in_an_error(self):
+        result, rows = self.map(["/gone", "/broken"])
+        self.assertEqual((rows["/gone"]["final_status"], rows["/gone"]["issue"]), (404, "redirect_to_404"))
+        self.assertEqual(result["redirects_to_404"][0]["final_url"], f"{SITE}/missing")
+        self.assertEqual((rows["/broken"]["final_status"], rows["/broken"]["hops"]), (503, 1))
+
+    def test_read_url_list_and_csv_export(self):
+        text = "url,note\nhttps://a.example/x,first\nnot a url\nhttps://a.example/x,again\nid,https://b.example/y\n"
+        self.assertEqual(read_url_list(text), ["https://a.example/x", "https://b.example/y"])
+
+        _, rows = self.map(["/a", "/gone"])
+        reader = csv.DictReader(io.StringIO(export_csv([rows["/a"], rows["/gone"]])))
+        self.assertEqual(tuple(reader.fieldnames), CSV_FIELDS)
+        exported = list(reader)
+        self.assertEqual(exported[0]["chain"], f"{SITE}/a [301] -> {SITE}/hub [301] -> https://new.example.com/final [200]")
+        self.assertEqual((exported[1]["hops"], exported[1]["final_status"], exported[1]["issue"]),
+                         ("1", "404", "redirect_to_404"))
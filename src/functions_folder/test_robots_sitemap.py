@@ -0,0 +1,129 @@
+import asyncio
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import aiohttp
+from functions_folder.crawl_engine import async_crawl_site
+from functions_folder.robots_sitemap import RobotsCache, discover_sitemaps, iter_sitemap_urls
+from functions_folder.test_crawl_engine import StubSite
+
+def urlset(*paths):
+    return ('<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + "".join(f"<url><loc>{path}</loc></url>" for path in paths) + "</urlset>")
+
+def sitemapindex(*paths):
+    return ('<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + "".join(f"<sitemap><loc>{path}</loc></sitemap>" for path in paths) + "</sitemapindex>")
+
+def xml(body):
+    return 200, {"Content-Type": "application/xml"}, body
+
+async def collect(sitemap_url, max_urls=None):
+    async with aiohttp.ClientSession() as session:
+        return [url async for url in iter_sitemap_urls(session, sitemap_url, max_urls)]
+
+class TestSitemaps(unittest.TestCase):
+    def serve(self, pages):
+        site = StubSite(pages)
+        self.addCleanup(site.close)
+        return site
+
+    def test_gzipped_sitemap(self):
+        site = self.serve({"/sitemap.xml.gz": (200, {"Content-Type": "application/gzip"},
+                                               gzip.compress(urlset(*(f"/page-{i}" for i in range(500))).encode()))})
+        urls = asyncio.run(collect(site.url + "/sitemap.xml.gz"))
+        self.assertEqual(len(urls), 500)
+        self.assertEqual(urls[0], site.url + "/page-0")
+        self.assertEqual(len(asyncio.run(collect(site.url + "/sitemap.xml.gz", max_urls=7))), 7)
+
+    def test_sitemap_indexes_are_followed_three_levels_deep(self):
+        site = self.serve({
+            "/index-0.xml": xml(sitemapindex("/index-1.xml", "/pages-0.xml")),
+            "/pages-0.xml": xml(urlset("/a", "/b")),
+            "/index-1.xml": xml(sitemapindex("/index-2.xml")),
+            "/index-2.xml": xml(sitemapindex("/index-3.xml", "/pages-2.xml")),
+            "/pages-2.xml": xml(urlset("/c")),
+            "/index-3.xml": xml(sitemapindex("/pages-4.xml")),  # nested 3 deep: its children are not read
+            "/pages-4.xml": xml(urlset("/too-deep")),
+        })
+        urls = asyncio.run(collect(site.url + "/index-0.xml"))
+        self.assertEqual(sorted(url[len(site.url):] for url in urls), ["/a", "/b", "/c"])
+        self.assertIn("/index-3.xml", site.paths())
+        self.assertNotIn("/pages-4.xml", site.paths())
+
+    def test_malformed_xml_keeps_the_urls_before_the_error(self):
+        body = urlset("/first", "/second").replace("</urlset>", "<url><loc>/third</url></loc>")
+        site = self.serve({"/sitemap.xml": xml(body)})
+        self.assertEqual(asyncio.run(collect(site.url + "/sitemap.xml")), [site.url + "/first", site.url + "/second"])
+
+    def test_sitemaps_are_discovered_in_robots_or_guessed(self):
+        site = self.serve({"/robots.txt": (200, {"Content-Type": "text/plain"},
+                                           "User-agent: *\nSitemap: https://example.com/s.xml\n")})
+
+        async def discover(url):
+            async with aiohttp.ClientSession() as session:
+                rules = await RobotsCache().rules_for(session, url)
+                return await discover_sitemaps(session, url, rules), await discover_sitemaps(session, url)
+
+        self.assertEqual(asyncio.run(discover(site.url + "/blog/")),
+                         (["https://example.com/s.xml"], [site.url + "/sitemap.xml"]))
+
+class TestRobots(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("functions_folder.robots_sitemap.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.answers = []
+        self.site = StubSite({"/robots.txt": (lambda headers: self.answers.pop(0), {}, "")})
+        self.addCleanup(self.site.close)
+        self.cache = RobotsCache(ttl=3600, error_ttl=300)
+
+    def rules(self):
+        async def fetch():
+            async with aiohttp.ClientSession() as session:
+                return await self.cache.rules_for(session, self.site.url + "/private/page")
+        return asyncio.run(fetch())
+
+    def test_rules_are_cached_until_their_ttl_runs_out(self):
+        self.answers = [(200, {}, "User-agent: *\nDisallow: /private/\nCrawl-delay: 2\n")] * 2
+        rules = self.rules()
+        self.assertFalse(rules.can_fetch(self.site.url + "/private/page"))
+        self.assertTrue(rules.can_fetch(self.site.url + "/public"))
+        self.assertEqual(rules.crawl_delay(), 2.0)
+        self.now += 3599
+        self.assertIs(self.rules(), rules)
+        self.now += 2
+        self.assertIsNot(self.rules(), rules)
+        self.assertEqual(self.site.paths(), ["/robots.txt"] * 2)
+
+    def test_server_errors_allow_everything_and_expire_sooner(self):
+        self.answers = [(503, {}, "down"), (200, {}, "User-agent: *\nDisallow: /\n"), (403, {}, "no")]
+        self.assertTrue(self.rules().can_fetch(self.site.url + "/private/page"))
+        self.now += 301
+        rules = self.rules()
+        self.assertFalse(rules.can_fetch(self.site.url + "/anything"))
+        self.assertEqual(len(self.site.paths()), 2)
+        self.now += 3601
+        self.assertFalse(self.rules().can_fetch(self.site.url + "/"))  # 401/403 disallow everything
+
+class TestCrawlRespectsRobots(unittest.TestCase):
+    def test_disallowed_urls_are_not_fetched(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        site = StubSite({
+            "/robots.txt": (200, {"Content-Type": "text/plain"}, "User-agent: *\nDisallow: /private/\n"),
+            "/": (200, {}, '<a href="/private/report">Private</a> <a href="/public">Public</a>'),
+            "/public": (200, {}, "public"),
+            "/private/report": (200, {}, "secret"),
+        })
+        self.addCleanup(site.close)
+        result = async_crawl_site(site.url + "/", store_path=os.path.join(directory, "crawl.db"),
+                                  use_sitemaps=False, delay=0)
+        self.assertNotIn("/private/report", site.paths())
+        self.assertIn("/public", site.paths())
+        self.assertEqual(result["stats"]["robots_blocked"], 1)
+        self.assertEqual(result["stats"]["pages"], 2)
@@ -0,0 +1,70 @@
+import unittest
+from functions_folder import url_canonicalizer
+from functions_folder.url_canonicalizer import BloomFilter, canonicalize_url, link_target
+
+class TestCanonicalizeUrl(unittest.TestCase):
+    def test_strips_fragment_and_tracking_params(self):
+        url = canonicalize_url("https://Example.com/blog/?utm_source=x&b=2&a=1&gclid=abc#comments")
+        self.assertEqual(url, "https://example.com/blog?a=1&b=2")
+
+    def test_default_port_and_trailing_slash(self):
+        self.assertEqual(canonicalize_url("HTTP://example.com:80/about/"), "http://example.com/about")
+        self.assertEqual(canonicalize_url("https://example.com"), "https://example.com/")
+        self.assertEqual(canonicalize_url("https://example.com:8443/"), "https://example.com:8443/")
+
+    def test_resolves_relative_links_and_dot_segments(self):
+        url = canonicalize_url("../team/./lead", base="https://example.com/about/company/")
+        self.assertEqual(url, "https://example.com/about/team/lead")
+
+    def test_normalizes_percent_encoding(self):
+        self.assertEqual(canonicalize_url("https://example.com/caf%c3%a9%7e"), "https://example.com/caf%C3%A9~")
+        self.assertEqual(canonicalize_url("https://example.com/café 1"), "https://example.com/caf%C3%A9%201")
+
+    def test_keeps_reserved_characters_encoded(self):
+        self.assertEqual(canonicalize_url("https://x.com/a%2fb"), "https://x.com/a%2Fb")
+        self.assertNotEqual(canonicalize_url("https://x.com/a%2Fb"), canonicalize_url("https://x.com/a/b"))
+        self.assertEqual(canonicalize_url("https://x.com/q%3Fa%23b%25"), "https://x.com/q%3Fa%23b%25")
+        self.assertEqual(canonicalize_url("https://x.com/100%"), "https://x.com/100%25")
+        self.assertEqual(canonicalize_url("https://x.com/a/%2e%2E/b"), "https://x.com/b")
+
+    def test_custom_tracking_params(self):
+        url = canonicalize_url("https://example.com/?ref=nav&session=1&page=2", tracking_params=("ref", "sess*"))
+        self.assertEqual(url, "https://example.com/?page=2")
+
+    def test_ignore_path_case(self):
+        self.assertEqual(canonicalize_url("https://example.com/About"), "https://example.com/About")
+        self.assertEqual(canonicalize_url("https://example.com/About", ignore_path_case=True), "https://example.com/about")
+
+    def test_rejects_non_http_links(self):
+        self.assertIsNone(canonicalize_url("mailto:info@example.com"))
+        self.assertIsNone(canonicalize_url("javascript:void(0)"))
+
+    def test_parse_tracking_params(self):
+        self.assertEqual(url_canonicalizer.parse_tracking_params(" utm_*, GCLID ref "), ("utm_*", "gclid", "ref"))
+
+class TestLinkTarget(unittest.TestCase):
+    def test_only_fragment_and_host_case_change(self):
+        self.assertEqual(link_target("HTTPS://Example.COM/docs/#intro"), "https://example.com/docs/")
+        self.assertEqual(link_target("https://example.com/a%2Fb/?b=2&a=1"), "https://example.com/a%2Fb/?b=2&a=1")
+        self.assertEqual(link_target("http://User@Example.com:8080/About"), "http://User@example.com:8080/About")
+        self.assertIsNone(link_target("mailto:info@example.com"))
+
+class TestBloomFilter(unittest.TestCase):
+    def test_add_and_contains(self):
+        seen = BloomFilter(capacity=1000, error_rate=0.01)
+        self.assertTrue(seen.add("https://example.com/a"))
+        self.assertFalse(seen.add("https://example.com/a"))
+        self.assertIn("https://example.com/a", seen)
+        self.assertNotIn("https://example.com/b", seen)
+        self.assertEqual(len(seen), 1)
+
+    def test_memory_is_fixed_and_false_positives_bounded(self):
+        seen = BloomFilter(capacity=5000, error_rate=0.01)
+        size = seen.size_bytes
+        seen.update(f"https://example.com/page/{i}" for i in range(5000))
+        self.assertEqual(seen.size_bytes, size)
+        false_positives = sum(f"https://example.com/other/{i}" in seen for i in range(5000))
+        self.assertLess(false_positives, 5000 * 0.03)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# File: functions_folder/tool_jobs.py
+
+# The long-running tools as background jobs: each function is called as
+# function(progress, **params) by a job_queue worker and returns what the
+# tool's page renders, in JSON-serializable form. Importing this module
+# registers them on job_queue.
+
+from functions_folder.job_queue import job_queue
+from functions_folder.brief_generator import generate_brief
+from functions_folder.crawler import crawl_site
+from functions_folder.internal_link_optimizer import extract_internal_links, suggest_internal_links
+from functions_folder.performance_audit import run_lighthouse_audit
+from functions_folder.ranking_forecast_model import (generate_forecast_summary, load_sample_data,
+                                                     ranking_forecast_model, visualize_forecast_results)
+from functions_folder.topic_modeler import bert_topic_modeling, lda_topic_modeling, visualize_topics
+from functions_folder.url_canonicalizer import parse_tracking_params
+from functions_folder.APP_loggerSetup import app_loggerSetup
+
+logger = app_loggerSetup()
+
+
+def performance_audit_job(progress, url):
+    progress(0.05, "Running Lighthouse")
+    return run_lighthouse_audit(url)
+
+
+def brief_generator_job(progress, seed_text, faq_count=5, model=None):
+    progress(0.05, f"Writing the outline and {faq_count} FAQ answers")
+    return generate_brief(seed_text, faq_count, model=model)
+
+
+def ranking_forecast_job(progress, keyword, forecast_horizon=30):
+    progress(0.05, "Loading ranking history")
+    sample_data = load_sample_data(keyword=keyword)
+    progress(0.15, "Fitting Prophet and XGBoost")
+    forecast_output = ranking_forecast_model(sample_data, forecast_horizon)
+    progress(0.9, "Drawing the forecast")
+    return {
+        "forecast_output": forecast_output,
+        "chart_html": visualize_forecast_results(forecast_output),
+        "summary_text": generate_forecast_summary(forecast_output)
+    }
+
+
+def topic_modeler_job(progress, texts, method="lda", num_topics=3, show_viz=False):
+    topics = []
+    error = None
+    if method == "lda":
+        progress(0.1, "Training the LDA model")
+        topics, lda_model, corpus, dictionary = lda_topic_modeling(texts, num_topics=num_topics)
+        if show_viz:
+            progress(0.7, "Drawing the topic map")
+            visualize_topics("lda", lda_model=lda_model, corpus=corpus, dictionary=dictionary)
+
+    elif method == "bert":
+        if len(texts) < num_topics:
+            error = f"You entered {len(texts)} text(s), but requested {num_topics} clusters. Please enter more texts or reduce the number of clusters."
+        else:
+            progress(0.1, "Embedding and clustering the texts")
+            topics, embeddings, labels = bert_topic_modeling(texts, num_clusters=num_topics)
+            if show_viz:
+                progress(0.7, "Drawing the cluster plot")
+                visualize_topics("bert", embeddings=embeddings, labels=labels)
+    return {"topics": topics, "error": error}
+
+
+def website_crawler_job(progress, url, max_pages=50, engine="async", max_depth=None, incremental=True,
+                        tracking_params="", respect_robots=True, use_sitemaps=True, resume=None, changed_only=False):
+    crawled = [0]
+
+    def on_page(page):
+        crawled[0] += 1
+        progress(crawled[0] / max_pages, f"{crawled[0]} pages crawled, last: {page['url']}")
+
+    progress(0, "Starting the crawl")
+    results = crawl_site(url, max_pages=max_pages, engine=engine, max_depth=max_depth, incremental=incremental,
+                         tracking_params=parse_tracking_params(tracking_params) if tracking_params else None,
+                         respect_robots=respect_robots, use_sitemaps=use_sitemaps, resume=resume,
+                         changed_only=changed_only, on_page=on_page)
+    # 'pages' is a lazy iterator over the store; the page reads them again by crawl_id
+    results.pop("pages", None)
+    return results
+
+
+def internal_link_optimizer_job(progress, url, max_links=10):
+    progress(0.05, f"Crawling homepage: {url}")
+    suggestions = []
+    slugs, error = extract_internal_links(url, max_links=max_links)
+    if not error and slugs:
+        progress(0.3, f"Fetching the titles of {len(slugs)} pages")
+        suggestions = suggest_internal_links(slugs, url, top_n=3)
+    return {"suggestions": suggestions, "error": error}
+
+
+# Forecasts and topic models are CPU-bound Python: they get worker processes so
+# they cannot hold the GIL the web workers need. Lighthouse, crawls and link
+# checks mostly wait on the network or a subprocess, and brief generation runs
+# in torch (which releases the GIL) with its model loaded once, so they use threads.
+job_queue.register("performance_audit", "functions_folder.tool_jobs:performance_audit_job", "thread", 1)
+job_queue.register("brief_generator", "functions_folder.tool_jobs:brief_generator_job", "thread", 1)
+job_queue.register("ranking_forecast", "functions_folder.tool_jobs:ranking_forecast_job", "process", 1)
+job_queue.register("topic_modeler", "functions_folder.tool_jobs:topic_modeler_job", "process", 1)
+job_queue.register("website_crawler", "functions_folder.tool_jobs:website_crawler_job", "thread", 2)
+job_queue.register("internal_link_optimizer", "functions_folder.tool_jobs:internal_link_optimizer_job", "thread", 2)
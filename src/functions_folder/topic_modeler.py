@@ -1,17 +1,12 @@
 # File: functions_folder/topic_modeler.py
 
 from typing import List, Dict, Optional
-from sklearn.cluster import KMeans
-from sklearn.manifold import TSNE
-from sentence_transformers import SentenceTransformer
-from gensim import corpora
-from gensim.models.ldamodel import LdaModel
-from gensim.parsing.preprocessing import preprocess_string, strip_punctuation, strip_numeric, remove_stopwords
 import numpy as np
-import matplotlib.pyplot as plt
-import pyLDAvis.gensim_models as gensimvis
-import pyLDAvis
 
+# gensim, pyLDAvis, matplotlib and sklearn are imported inside the functions
+# that use them: together they take seconds to import and most requests
+# never touch this tool.
+from functions_folder.embedding_service import encode
 from functions_folder.APP_loggerSetup import app_loggerSetup
 from functions_folder.LOCAL_loggerSetup import local_loggerSetup
 logger = app_loggerSetup()
@@ -19,11 +14,15 @@ logger = app_loggerSetup()
 
 # 🧹 Text Cleaning
 def clean_texts(texts: List[str]) -> List[List[str]]:
+    from gensim.parsing.preprocessing import preprocess_string, strip_punctuation, strip_numeric, remove_stopwords
     CUSTOM_FILTERS = [lambda x: x.lower(), strip_punctuation, strip_numeric, remove_stopwords]
     return [preprocess_string(text, CUSTOM_FILTERS) for text in texts]
 
 # 📚 LDA Topic Modeling
 def lda_topic_modeling(texts: List[str], num_topics: int = 5):
+    from gensim import corpora
+    from gensim.models.ldamodel import LdaModel
+
     cleaned = clean_texts(texts)
     dictionary = corpora.Dictionary(cleaned)
     corpus = [dictionary.doc2bow(text) for text in cleaned]
@@ -39,8 +38,9 @@ def lda_topic_modeling(texts: List[str], num_topics: int = 5):
 
 # 🧠 BERT Topic Modeling
 def bert_topic_modeling(texts: List[str], num_clusters: Optional[int] = None):
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    embeddings = model.encode(texts)
+    from sklearn.cluster import KMeans
+
+    embeddings = encode(texts)
     
     if not num_clusters:
         num_clusters = max(2, int(len(texts) / 5))
@@ -64,17 +64,24 @@ def bert_topic_modeling(texts: List[str], num_clusters: Optional[int] = None):
 # 📊 Visualization Function
 def visualize_topics(method: str, lda_model=None, corpus=None, dictionary=None, embeddings=None, labels=None):
     if method == "lda":
+        import pyLDAvis
+        import pyLDAvis.gensim_models as gensimvis
         vis_data = gensimvis.prepare(lda_model, corpus, dictionary)
         pyLDAvis.save_html(vis_data, "static/lda_visualization.html")
         print("✅ LDA visualization saved as lda_visualization.html")
         logger.info("✅ LDA visualization saved as lda_visualization.html")
     elif method == "bert":
+        import matplotlib
+        matplotlib.use("Agg")  # rendered to a file from web and job worker threads, never shown
+        import matplotlib.pyplot as plt
+        from sklearn.manifold import TSNE
         tsne = TSNE(n_components=2, perplexity = max(2, min(30, len(embeddings) - 1)), random_state=42)
         reduced = tsne.fit_transform(embeddings)
-        plt.figure(figsize=(8, 6))
+        fig = plt.figure(figsize=(8, 6))
         plt.scatter(reduced[:, 0], reduced[:, 1], c=labels, cmap='tab10')
         plt.title("BERT Embedding Clusters")
         plt.savefig("static/bert_clusters.png")
+        plt.close(fig)
         print("✅ BERT cluster plot saved as bert_clusters.png")
         logger.info("✅ BERT cluster plot saved as bert_clusters.png")
 
@@ -1,7 +1,6 @@
 # File: functions_folder/trend_visualizer.py
 
 import pandas as pd
-import plotly.express as px
 import numpy as np
 
 from functions_folder.APP_loggerSetup import app_loggerSetup
@@ -17,6 +16,8 @@ def plot_trends(df):
     Returns:
         str: HTML div containing the Plotly chart
     """
+    import plotly.express as px  # deferred: plotly.express is slow to import
+
     df['date'] = pd.to_datetime(df['date'])
     fig = px.line(df, x='date', y='value', color='keyword', markers=True,
                   title='Keyword Performance Over Time')
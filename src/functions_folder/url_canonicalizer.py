@@ -0,0 +1,173 @@
+# File: functions_folder/url_canonicalizer.py
+
+import hashlib
+import math
+import posixpath
+import re
+import string
+from fnmatch import fnmatch
+from urllib.parse import parse_qsl, quote, urlencode, urljoin, urlsplit, urlunsplit
+
+# Query parameters that never change page content. Entries may end in '*'.
+DEFAULT_TRACKING_PARAMS = (
+    "utm_*", "gclid", "gclsrc", "dclid", "fbclid", "msclkid", "yclid", "twclid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "igshid", "ref_src", "srsltid",
+)
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+# Characters that never need percent-encoding in a path or query value.
+SAFE_PATH_CHARS = "/:@!$&'()*+,;=-._~"
+SAFE_QUERY_CHARS = "/:@!$'()*+,;-._~"
+# The only characters whose percent-escapes mean the same as the character itself (RFC 3986 2.3);
+# an escaped reserved character such as %2F is a different URL from the plain one.
+UNRESERVED_CHARS = frozenset(string.ascii_letters + string.digits + "-._~")
+PERCENT_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+STRAY_PERCENT = re.compile(r"%(?![0-9A-Fa-f]{2})")
+
+
+def normalize_escape(match):
+    char = chr(int(match.group(1), 16))
+    return char if char in UNRESERVED_CHARS else match.group(0).upper()
+
+
+def is_tracking_param(name, tracking_params):
+    name = name.lower()
+    return any(fnmatch(name, pattern) for pattern in tracking_params)
+
+
+def normalize_path(path, ignore_case=False):
+    # Decode escaped unreserved characters, uppercase the other escapes, encode what is left unencoded
+    path = PERCENT_ESCAPE.sub(normalize_escape, STRAY_PERCENT.sub("%25", path))
+    path = quote(path, safe=SAFE_PATH_CHARS + "%")
+    if not path:
+        return "/"
+    trailing = path.endswith("/")
+    path = posixpath.normpath(path)
+    if path.startswith("//"):
+        path = "/" + path.lstrip("/")
+    if trailing and path != "/":
+        # Directory-style and file-style URLs are treated as the same page.
+        path = path.rstrip("/")
+    if ignore_case:
+        path = path.lower()
+    return path
+
+
+def canonicalize_url(url, base=None, tracking_params=DEFAULT_TRACKING_PARAMS, ignore_path_case=False):
+    """
+    Normalizes a URL so that trivially different spellings of the same
+    page compare equal.
+
+    Lowercases the scheme and host, drops default ports and fragments,
+    resolves dot segments, removes trailing slashes, normalizes
+    percent-encoding, drops tracking parameters and sorts the rest.
+
+    Args:
+        url (str): Absolute URL, or relative to `base`.
+        base (str): Base URL used to resolve relative links.
+        tracking_params (iterable): Query parameter names to drop; '*' suffix matches prefixes.
+        ignore_path_case (bool): Also lowercase the path, for case-insensitive servers.
+
+    Returns:
+        str: The canonical URL, or None for non-HTTP(S) links (mailto:, javascript:, ...).
+    """
+    url = url.strip()
+    if base:
+        url = urljoin(base, url)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return None
+
+    host = (parts.hostname or "").lower().rstrip(".")
+    if not host:
+        return None
+    netloc = host
+    if parts.port and str(parts.port) != DEFAULT_PORTS[scheme]:
+        netloc = f"{host}:{parts.port}"
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not is_tracking_param(key, tracking_params)
+    ]
+    query.sort()
+    query_string = urlencode(query, quote_via=quote, safe=SAFE_QUERY_CHARS)
+
+    return urlunsplit((scheme, netloc, normalize_path(parts.path, ignore_path_case), query_string, ""))
+
+
+def link_target(url, base=None):
+    """
+    The URL a link actually points at: fragment dropped, scheme and host
+    lowercased, everything else (trailing slash, path encoding, query)
+    exactly as written, because servers may answer those differently.
+    Use it for requesting and reporting links; canonicalize_url() is for
+    deciding whether two links are the same page.
+
+    Returns:
+        str: The target URL, or None for non-HTTP(S) links (mailto:, javascript:, ...).
+    """
+    url = url.strip()
+    if base:
+        url = urljoin(base, url)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+    userinfo, at, hostport = parts.netloc.rpartition("@")
+    return urlunsplit((scheme, userinfo + at + hostport.lower(), parts.path, parts.query, ""))
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set. Memory is decided up front from the
+    expected number of items and the acceptable false-positive rate, and
+    never grows; lookups can report a URL as seen when it was not (with
+    probability ~error_rate) but never the reverse.
+    """
+
+    def __init__(self, capacity=1_000_000, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def add(self, item):
+        """Adds `item`; returns True if it was not (probably) present before."""
+        added = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def size_bytes(self):
+        return len(self.bits)
+
+
+def parse_tracking_params(raw):
+    """Parses a comma/whitespace separated blacklist, e.g. from a form field."""
+    return tuple(param for param in re.split(r"[\s,]+", raw.strip().lower()) if param)
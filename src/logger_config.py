@@ -5,10 +5,10 @@ import os
 import inspect
 
 def get_custom_logger():
-    # Dynamically get the caller module name
-    frame = inspect.stack()[1]
-    module = inspect.getmodule(frame[0])
-    module_name = module.__name__ if module else "unknown"
+    # Dynamically get the caller module name (from the caller's frame only:
+    # inspect.stack() reads source context for every frame and slowed each import)
+    frame = inspect.currentframe().f_back
+    module_name = frame.f_globals.get("__name__", "unknown") if frame else "unknown"
 
     logger = logging.getLogger(module_name)
 